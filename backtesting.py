@@ -1,8 +1,23 @@
-from dataclasses import dataclass
+import heapq
+from dataclasses import dataclass, field
+from typing import Iterable
+import numpy as np
 import pandas as pd
 
+try:
+    from numba import njit, prange
+except ImportError:  # Numba is optional; the NumPy engine is used without it
+    njit = None
+    prange = range
 
-@dataclass
+from metrics import calmar_ratio_batch, OnlineMetrics, _acc_update, _acc_update_jit
+from profiling import instrument, count
+
+COM = 0.125 / 100  # Commission rate (0.125%)
+INITIAL_CASH = 1_000_000  # Starting capital
+
+
+@dataclass(slots=True)
 class Position:
     """
     Represents a trading position.
@@ -19,9 +34,13 @@ class Position:
     n_shares: int
 
 
-def backtest(data: pd.DataFrame, SL: float, TP: float, n_shares: float) -> tuple[list[float], float]:
+@instrument("backtest_reference")
+def backtest_reference(data: pd.DataFrame, SL: float, TP: float, n_shares: float) -> tuple[list[float], float]:
     """
-    Simulate a trading strategy over historical data.
+    Simulate a trading strategy over historical data, one row at a time.
+
+    This is the original row-by-row implementation. It is kept as the reference
+    that the array engine in `backtest` is checked against.
 
     Args:
         data (pd.DataFrame): DataFrame containing market data and buy/sell signals.
@@ -36,8 +55,7 @@ def backtest(data: pd.DataFrame, SL: float, TP: float, n_shares: float) -> tuple
             - Final cash balance after all trades.
     """
     data = data.copy()
-    COM = 0.125 / 100  # Commission rate (0.125%)
-    cash = 1_000_000   # Starting capital
+    cash = INITIAL_CASH
     active_long = []   # List of open long positions
     active_short = []  # List of open short positions
     port_hist = []     # Portfolio value history
@@ -98,3 +116,1174 @@ def backtest(data: pd.DataFrame, SL: float, TP: float, n_shares: float) -> tuple
 
     # Return portfolio history and final value
     return port_hist, port_hist[-1] if port_hist else cash
+
+
+class PositionBook:
+    """
+    Open positions of one side stored as parallel NumPy arrays.
+
+    Slots grow by doubling, closed positions are swap-removed (the last open
+    position moves into the freed slot), and the share and notional totals are
+    kept up to date so the mark-to-market value never re-sums the book.
+
+    Attributes:
+        price (np.ndarray): Entry prices (first `len(book)` slots are open).
+        sl (np.ndarray): Stop-loss prices.
+        tp (np.ndarray): Take-profit prices.
+        n_shares (np.ndarray): Number of shares/contracts held.
+        shares_total (float): Sum of `n_shares` over open positions.
+        notional_total (float): Sum of `price * n_shares` over open positions.
+    """
+    __slots__ = ("price", "sl", "tp", "n_shares", "shares_total", "notional_total", "_n")
+
+    def __init__(self, capacity: int = 64):
+        capacity = max(capacity, 1)
+        self.price = np.empty(capacity)
+        self.sl = np.empty(capacity)
+        self.tp = np.empty(capacity)
+        self.n_shares = np.empty(capacity)
+        self.shares_total = 0.0
+        self.notional_total = 0.0
+        self._n = 0
+
+    @classmethod
+    def from_arrays(cls, price: np.ndarray, sl: np.ndarray, tp: np.ndarray,
+                    n_shares: float | np.ndarray, capacity: int = 64) -> "PositionBook":
+        """
+        Build a book holding the given open positions.
+
+        Args:
+            price (np.ndarray): Entry prices.
+            sl (np.ndarray): Stop-loss prices.
+            tp (np.ndarray): Take-profit prices.
+            n_shares (float | np.ndarray): Shares per position (scalar or array).
+            capacity (int): Minimum number of slots to allocate.
+
+        Returns:
+            PositionBook: The filled book.
+        """
+        n = len(price)
+        book = cls(max(capacity, 2 * n))
+        book.price[:n] = price
+        book.sl[:n] = sl
+        book.tp[:n] = tp
+        book.n_shares[:n] = n_shares
+        book._n = n
+        book._recompute_totals()
+        return book
+
+    def __len__(self) -> int:
+        return self._n
+
+    def _recompute_totals(self) -> None:
+        n = self._n
+        self.shares_total = float(self.n_shares[:n].sum())
+        self.notional_total = float(self.price[:n] @ self.n_shares[:n])
+
+    def add(self, price: float, sl: float, tp: float, n_shares: float) -> None:
+        """Open a position in O(1) (amortized)."""
+        n = self._n
+        if n == len(self.price):
+            for name in ("price", "sl", "tp", "n_shares"):
+                grown = np.empty(2 * n)
+                grown[:n] = getattr(self, name)
+                setattr(self, name, grown)
+        self.price[n] = price
+        self.sl[n] = sl
+        self.tp[n] = tp
+        self.n_shares[n] = n_shares
+        self._n = n + 1
+        self.shares_total += n_shares
+        self.notional_total += price * n_shares
+
+    def long_hits(self, close: float) -> np.ndarray:
+        """Slots of long positions whose SL or TP is triggered at `close`."""
+        n = self._n
+        return np.flatnonzero((self.sl[:n] > close) | (self.tp[:n] < close))
+
+    def short_hits(self, close: float) -> np.ndarray:
+        """Slots of short positions whose SL or TP is triggered at `close`."""
+        n = self._n
+        return np.flatnonzero((self.tp[:n] > close) | (self.sl[:n] < close))
+
+    def remove(self, slots: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Close the positions in `slots` (sorted, unique) by swap-removal.
+
+        Costs O(len(slots)): only the freed slots are refilled with the
+        surviving positions from the end of the book.
+
+        Args:
+            slots (np.ndarray): Sorted slot indices to close.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Entry prices and shares of the closed positions.
+        """
+        price = self.price[slots]
+        n_shares = self.n_shares[slots]
+        n_keep = self._n - len(slots)
+
+        # Survivors past the new end move into the holes before it
+        holes = slots[slots < n_keep]
+        tail = np.ones(self._n - n_keep, dtype=bool)
+        tail[slots[slots >= n_keep] - n_keep] = False
+        movers = n_keep + np.flatnonzero(tail)
+        for array in (self.price, self.sl, self.tp, self.n_shares):
+            array[holes] = array[movers]
+        self._n = n_keep
+
+        if n_keep:
+            self.shares_total -= float(n_shares.sum())
+            self.notional_total -= float(price @ n_shares)
+        else:
+            self.shares_total = 0.0
+            self.notional_total = 0.0
+        return price, n_shares
+
+    def long_value(self, close: float) -> float:
+        """Market value of the book held as longs."""
+        return self.shares_total * close
+
+    def short_value(self, close: float) -> float:
+        """Collateral plus unrealized P&L of the book held as shorts."""
+        return 2 * self.notional_total - self.shares_total * close
+
+
+class TriggerIndex:
+    """
+    Open positions of one side ordered by their exit levels.
+
+    A long exits when its stop-loss is above the price or its take-profit below
+    it; a short the other way round. Each position sits in two heaps: a max-heap
+    of the levels that trigger from above and a min-heap of those that trigger
+    from below. On each bar only positions whose level was actually crossed are
+    popped, so the cost scales with the number of exits rather than the number
+    of open positions. Positions closed through one heap are dropped lazily
+    from the other.
+
+    Attributes:
+        side (int): 1 for longs, -1 for shorts.
+        shares_total (float): Sum of shares over open positions.
+        notional_total (float): Sum of `price * n_shares` over open positions.
+    """
+
+    def __init__(self, side: int):
+        self.side = side
+        self.shares_total = 0.0
+        self.notional_total = 0.0
+        self._positions: dict[int, tuple[float, float, float, float]] = {}
+        self._above: list[tuple[float, int]] = []  # (-level, id), max-heap
+        self._below: list[tuple[float, int]] = []  # (level, id), min-heap
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def add(self, price: float, sl: float, tp: float, n_shares: float) -> None:
+        """Open a position in O(log n)."""
+        pos_id = self._next_id
+        self._next_id += 1
+        self._positions[pos_id] = (price, sl, tp, n_shares)
+        upper, lower = (sl, tp) if self.side == 1 else (tp, sl)
+        heapq.heappush(self._above, (-upper, pos_id))
+        heapq.heappush(self._below, (lower, pos_id))
+        self.shares_total += n_shares
+        self.notional_total += price * n_shares
+
+    def pop_triggered(self, close: float) -> tuple[float, float]:
+        """
+        Close every position whose stop-loss or take-profit is hit at `close`.
+
+        Args:
+            close (float): Current price.
+
+        Returns:
+            tuple[float, float]: Total shares and total entry notional
+                                 (`price * n_shares`) of the closed positions.
+        """
+        shares = 0.0
+        notional = 0.0
+        positions = self._positions
+        for heap, crossed in ((self._above, lambda key: -key > close),
+                              (self._below, lambda key: key < close)):
+            while heap and crossed(heap[0][0]):
+                _, pos_id = heapq.heappop(heap)
+                pos = positions.pop(pos_id, None)
+                if pos is not None:
+                    shares += pos[3]
+                    notional += pos[0] * pos[3]
+
+        if shares:
+            if positions:
+                self.shares_total -= shares
+                self.notional_total -= notional
+            else:
+                self.shares_total = 0.0
+                self.notional_total = 0.0
+            self._compact()
+        return shares, notional
+
+    def _compact(self) -> None:
+        """Rebuild the heaps once closed positions make up most of their entries."""
+        if len(self._above) + len(self._below) > 4 * len(self._positions) + 64:
+            self._above = [item for item in self._above if item[1] in self._positions]
+            self._below = [item for item in self._below if item[1] in self._positions]
+            heapq.heapify(self._above)
+            heapq.heapify(self._below)
+
+    def to_arrays(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Entry prices, stop-losses and take-profits of the open positions."""
+        if not self._positions:
+            return np.empty(0), np.empty(0), np.empty(0)
+        price, sl, tp, _ = map(np.array, zip(*self._positions.values()))
+        return price.astype(np.float64), sl.astype(np.float64), tp.astype(np.float64)
+
+    def long_value(self, close: float) -> float:
+        """Market value of the index held as longs."""
+        return self.shares_total * close
+
+    def short_value(self, close: float) -> float:
+        """Collateral plus unrealized P&L of the index held as shorts."""
+        return 2 * self.notional_total - self.shares_total * close
+
+
+@dataclass
+class BacktestState:
+    """
+    Cash and open positions carried between calls of the array engines.
+
+    All positions share the run's `n_shares`, so each side only stores its
+    entry prices and levels (in no particular order).
+
+    Attributes:
+        cash (float): Available cash.
+        long_price (np.ndarray): Entry prices of open longs.
+        long_sl (np.ndarray): Stop-loss prices of open longs.
+        long_tp (np.ndarray): Take-profit prices of open longs.
+        short_price (np.ndarray): Entry prices of open shorts.
+        short_sl (np.ndarray): Stop-loss prices of open shorts.
+        short_tp (np.ndarray): Take-profit prices of open shorts.
+    """
+    cash: float = float(INITIAL_CASH)
+    long_price: np.ndarray = field(default_factory=lambda: np.empty(0))
+    long_sl: np.ndarray = field(default_factory=lambda: np.empty(0))
+    long_tp: np.ndarray = field(default_factory=lambda: np.empty(0))
+    short_price: np.ndarray = field(default_factory=lambda: np.empty(0))
+    short_sl: np.ndarray = field(default_factory=lambda: np.empty(0))
+    short_tp: np.ndarray = field(default_factory=lambda: np.empty(0))
+
+
+def _backtest_numpy(close: np.ndarray, buy: np.ndarray, sell: np.ndarray,
+                    SL: float, TP: float, n_shares: float, com: float, cash: float,
+                    long_price0: np.ndarray, long_sl0: np.ndarray, long_tp0: np.ndarray,
+                    short_price0: np.ndarray, short_sl0: np.ndarray, short_tp0: np.ndarray,
+                    acc: np.ndarray, record: bool) -> tuple:
+    """
+    Array engine behind `backtest`.
+
+    Open positions live in one `PositionBook` per side: SL/TP hits are found
+    with one vectorized comparison per side and bar, closed positions are
+    swap-removed, and the mark-to-market value comes from the books' running
+    totals.
+
+    Args:
+        close (np.ndarray): Close prices (float64).
+        buy (np.ndarray): Buy signals (bool).
+        sell (np.ndarray): Sell signals (bool).
+        SL (float): Stop-loss threshold as a percentage.
+        TP (float): Take-profit threshold as a percentage.
+        n_shares (float): Number of shares/contracts to trade per signal.
+        com (float): Commission rate.
+        cash (float): Starting cash.
+        long_price0, long_sl0, long_tp0 (np.ndarray): Entry price and levels of
+            longs already open.
+        short_price0, short_sl0, short_tp0 (np.ndarray): Entry price and levels
+            of shorts already open.
+        acc (np.ndarray): Online metrics state updated with every portfolio
+            value (see `metrics._acc_update`); pass an empty array to skip.
+        record (bool): Keep the portfolio value of every bar.
+
+    Returns:
+        tuple: Portfolio value at each bar (empty if not `record`), then the
+               final cash and open position arrays in the same order as the inputs.
+    """
+    n_bars = close.shape[0]
+    port_hist = np.empty(n_bars if record else 0)
+    longs = PositionBook.from_arrays(long_price0, long_sl0, long_tp0, n_shares)
+    shorts = PositionBook.from_arrays(short_price0, short_sl0, short_tp0, n_shares)
+
+    for i in range(n_bars):
+        price = close[i]
+
+        # Evaluate and close long positions if SL or TP is triggered
+        if len(longs):
+            hits = longs.long_hits(price)
+            if len(hits):
+                _, hit_shares = longs.remove(hits)
+                cash += hit_shares.sum() * price * (1 - com)
+
+        # Evaluate and close short positions if SL or TP is triggered
+        if len(shorts):
+            hits = shorts.short_hits(price)
+            if len(hits):
+                hit_price, hit_shares = shorts.remove(hits)
+                hit_notional = hit_price @ hit_shares
+                cash += hit_notional + \
+                    (hit_notional - hit_shares.sum() * price) * (1 - com)
+
+        # Open long position if buy signal is present
+        if buy[i]:
+            cost = price * n_shares * (1 + com)
+            if cash > cost:
+                cash -= cost
+                longs.add(price, price * (1 - SL), price * (1 + TP), n_shares)
+
+        # Open short position if sell signal is present
+        if sell[i]:
+            cost = price * n_shares * (1 + com)
+            if cash > cost:
+                cash -= cost
+                shorts.add(price, price * (1 + SL), price * (1 - TP), n_shares)
+
+        # Portfolio value: cash + longs at market + shorts' collateral and P&L
+        port_value = cash + longs.long_value(price) + shorts.short_value(price)
+        if record:
+            port_hist[i] = port_value
+        if acc.shape[0]:
+            _acc_update(acc, port_value)
+
+    n_long, n_short = len(longs), len(shorts)
+    return (port_hist, cash, longs.price[:n_long].copy(), longs.sl[:n_long].copy(),
+            longs.tp[:n_long].copy(), shorts.price[:n_short].copy(),
+            shorts.sl[:n_short].copy(), shorts.tp[:n_short].copy())
+
+
+def _backtest_heap(close: np.ndarray, buy: np.ndarray, sell: np.ndarray,
+                   SL: float, TP: float, n_shares: float, com: float, cash: float,
+                   long_price0: np.ndarray, long_sl0: np.ndarray, long_tp0: np.ndarray,
+                   short_price0: np.ndarray, short_sl0: np.ndarray, short_tp0: np.ndarray,
+                   acc: np.ndarray, record: bool) -> tuple:
+    """
+    Engine that keeps open positions in a `TriggerIndex` per side.
+
+    Same arguments, results and semantics as `_backtest_numpy`. Bars that
+    close nothing cost O(1) however many positions are open, which pays off
+    for long-running, signal-heavy configurations.
+    """
+    n_bars = close.shape[0]
+    port_hist = np.empty(n_bars if record else 0)
+    longs = TriggerIndex(side=1)
+    shorts = TriggerIndex(side=-1)
+    for pos in zip(long_price0, long_sl0, long_tp0):
+        longs.add(*map(float, pos), n_shares)
+    for pos in zip(short_price0, short_sl0, short_tp0):
+        shorts.add(*map(float, pos), n_shares)
+
+    for i, price in enumerate(close.tolist()):
+        # Close long positions if SL or TP is triggered
+        hit_shares, _ = longs.pop_triggered(price)
+        if hit_shares:
+            cash += hit_shares * price * (1 - com)
+
+        # Close short positions if SL or TP is triggered
+        hit_shares, hit_notional = shorts.pop_triggered(price)
+        if hit_shares:
+            cash += hit_notional + (hit_notional - hit_shares * price) * (1 - com)
+
+        # Open new positions on signals
+        cost = price * n_shares * (1 + com)
+        if buy[i] and cash > cost:
+            cash -= cost
+            longs.add(price, price * (1 - SL), price * (1 + TP), n_shares)
+        if sell[i] and cash > cost:
+            cash -= cost
+            shorts.add(price, price * (1 + SL), price * (1 - TP), n_shares)
+
+        port_value = cash + longs.long_value(price) + shorts.short_value(price)
+        if record:
+            port_hist[i] = port_value
+        if acc.shape[0]:
+            _acc_update(acc, port_value)
+
+    return (port_hist, cash, *longs.to_arrays(), *shorts.to_arrays())
+
+
+def _backtest_kernel(close: np.ndarray, buy: np.ndarray, sell: np.ndarray,
+                     SL: float, TP: float, n_shares: float, com: float, cash: float,
+                     long_price0: np.ndarray, long_sl0: np.ndarray, long_tp0: np.ndarray,
+                     short_price0: np.ndarray, short_sl0: np.ndarray, short_tp0: np.ndarray,
+                     acc: np.ndarray, record: bool) -> tuple:
+    """
+    Scalar bar-by-bar loop over the position buffers, written for Numba.
+
+    Same arguments, results and semantics as `_backtest_numpy`, but closed
+    positions are compacted with an explicit loop so that the whole simulation
+    compiles to native code.
+    """
+    n_bars = close.shape[0]
+    port_hist = np.empty(n_bars if record else 0)
+
+    n_long = long_sl0.shape[0]
+    long_price = np.empty(n_bars + n_long)
+    long_sl = np.empty(n_bars + n_long)
+    long_tp = np.empty(n_bars + n_long)
+    long_price[:n_long] = long_price0
+    long_sl[:n_long] = long_sl0
+    long_tp[:n_long] = long_tp0
+
+    n_short = short_price0.shape[0]
+    short_price = np.empty(n_bars + n_short)
+    short_sl = np.empty(n_bars + n_short)
+    short_tp = np.empty(n_bars + n_short)
+    short_price[:n_short] = short_price0
+    short_sl[:n_short] = short_sl0
+    short_tp[:n_short] = short_tp0
+    short_price_sum = short_price0.sum()
+
+    for i in range(n_bars):
+        price = close[i]
+
+        # Close triggered longs, keeping the survivors in entry order
+        n_keep = 0
+        for j in range(n_long):
+            if long_sl[j] > price or long_tp[j] < price:
+                cash += n_shares * price * (1 - com)
+            else:
+                long_price[n_keep] = long_price[j]
+                long_sl[n_keep] = long_sl[j]
+                long_tp[n_keep] = long_tp[j]
+                n_keep += 1
+        n_long = n_keep
+
+        # Close triggered shorts, keeping the survivors in entry order
+        n_keep = 0
+        for j in range(n_short):
+            if short_tp[j] > price or short_sl[j] < price:
+                cash += short_price[j] * n_shares + \
+                    (short_price[j] - price) * n_shares * (1 - com)
+                short_price_sum -= short_price[j]
+            else:
+                short_price[n_keep] = short_price[j]
+                short_sl[n_keep] = short_sl[j]
+                short_tp[n_keep] = short_tp[j]
+                n_keep += 1
+        n_short = n_keep
+
+        if buy[i]:
+            cost = price * n_shares * (1 + com)
+            if cash > cost:
+                cash -= cost
+                long_price[n_long] = price
+                long_sl[n_long] = price * (1 - SL)
+                long_tp[n_long] = price * (1 + TP)
+                n_long += 1
+
+        if sell[i]:
+            cost = price * n_shares * (1 + com)
+            if cash > cost:
+                cash -= cost
+                short_price[n_short] = price
+                short_sl[n_short] = price * (1 + SL)
+                short_tp[n_short] = price * (1 - TP)
+                n_short += 1
+                short_price_sum += price
+
+        port_value = cash + n_long * n_shares * price + \
+            (2 * short_price_sum - n_short * price) * n_shares
+        if record:
+            port_hist[i] = port_value
+        if acc.shape[0]:
+            _acc_update_jit(acc, port_value)
+
+    return (port_hist, cash, long_price[:n_long].copy(), long_sl[:n_long].copy(),
+            long_tp[:n_long].copy(), short_price[:n_short].copy(),
+            short_sl[:n_short].copy(), short_tp[:n_short].copy())
+
+
+_backtest_jit = njit(cache=True, nogil=True)(_backtest_kernel) if njit is not None else None
+
+
+def _backtest_batch_kernel(close: np.ndarray, buy: np.ndarray, sell: np.ndarray,
+                           params: np.ndarray, com: float, cash: float) -> np.ndarray:
+    """
+    Run the compiled kernel for every (SL, TP, n_shares) row of `params`.
+
+    Rows are independent, so they are spread over threads with `prange`.
+
+    Returns:
+        np.ndarray: Portfolio values, one row per parameter set.
+    """
+    n_configs = params.shape[0]
+    port = np.empty((n_configs, close.shape[0]))
+    no_positions = np.empty(0)
+    for k in prange(n_configs):
+        port[k] = _backtest_jit(close, buy, sell, params[k, 0], params[k, 1],
+                                params[k, 2], com, cash, no_positions, no_positions,
+                                no_positions, no_positions, no_positions, no_positions,
+                                no_positions, True)[0]
+    return port
+
+
+_backtest_batch_jit = njit(parallel=True, cache=True)(
+    _backtest_batch_kernel) if njit is not None else None
+
+
+def _backtest_batch_numpy(close: np.ndarray, buy: np.ndarray, sell: np.ndarray,
+                          params: np.ndarray, com: float, cash: float) -> np.ndarray:
+    """
+    Advance every (SL, TP, n_shares) row of `params` together, one bar at a time.
+
+    Open positions of all configurations share one buffer per side, tagged
+    with their row, so each bar costs a few vectorized operations over the
+    configurations and their open positions instead of one Python iteration
+    per configuration. Every row keeps its own cash and follows the rules of
+    `_backtest_numpy`.
+
+    Returns:
+        np.ndarray: Portfolio values, one row per parameter set.
+    """
+    n_configs, n_bars = params.shape[0], close.shape[0]
+    sl_pct, tp_pct, n_shares = params[:, 0], params[:, 1], params[:, 2]
+    port = np.empty((n_configs, n_bars))
+    cash = np.full(n_configs, float(cash))
+    long_shares = np.zeros(n_configs)
+    short_shares = np.zeros(n_configs)
+    short_notional = np.zeros(n_configs)
+
+    # Open positions per side: owning row, entry price, SL and TP levels
+    books = {side: [np.empty(64, dtype=np.int64), np.empty(64), np.empty(64), np.empty(64)]
+             for side in (1, -1)}
+    n_open = {1: 0, -1: 0}
+
+    for i in range(n_bars):
+        price = close[i]
+
+        # Close triggered positions of every configuration
+        for side in (1, -1):
+            n = n_open[side]
+            if not n:
+                continue
+            row, entry, sl, tp = (a[:n] for a in books[side])
+            if side == 1:
+                hit = (sl > price) | (tp < price)
+            else:
+                hit = (tp > price) | (sl < price)
+            if not hit.any():
+                continue
+            hit_row = row[hit]
+            hit_shares = np.bincount(hit_row, n_shares[hit_row], n_configs)
+            if side == 1:
+                cash += hit_shares * price * (1 - com)
+                long_shares -= hit_shares
+            else:
+                hit_notional = np.bincount(hit_row, entry[hit] * n_shares[hit_row], n_configs)
+                cash += hit_notional + (hit_notional - hit_shares * price) * (1 - com)
+                short_shares -= hit_shares
+                short_notional -= hit_notional
+            keep = ~hit
+            n_keep = n - len(hit_row)
+            for a in books[side]:
+                a[:n_keep] = a[:n][keep]
+            n_open[side] = n_keep
+
+        # Open a long, then a short, in every configuration that can afford it
+        cost = price * n_shares * (1 + com)
+        for side, signal in ((1, buy[i]), (-1, sell[i])):
+            if not signal:
+                continue
+            rows = np.flatnonzero(cash > cost)
+            if not len(rows):
+                continue
+            cash[rows] -= cost[rows]
+            n, k = n_open[side], len(rows)
+            if n + k > len(books[side][0]):
+                size = max(2 * len(books[side][0]), n + k)
+                books[side] = [np.concatenate((a[:n], np.empty(size - n, dtype=a.dtype)))
+                               for a in books[side]]
+            books[side][0][n:n + k] = rows
+            books[side][1][n:n + k] = price
+            books[side][2][n:n + k] = price * (1 - side * sl_pct[rows])
+            books[side][3][n:n + k] = price * (1 + side * tp_pct[rows])
+            n_open[side] = n + k
+            if side == 1:
+                long_shares[rows] += n_shares[rows]
+            else:
+                short_shares[rows] += n_shares[rows]
+                short_notional[rows] += price * n_shares[rows]
+
+        # Portfolio value: cash + longs at market + shorts' collateral and P&L
+        port[:, i] = cash + long_shares * price + 2 * short_notional - short_shares * price
+
+    return port
+
+
+@dataclass
+class PortfolioResult:
+    """
+    Outcome of a shared-cash backtest over several symbols.
+
+    Per-symbol arrays follow the column order of the price panel.
+
+    Attributes:
+        port_hist (np.ndarray): Portfolio value at each bar (empty if not recorded).
+        cash (float): Final cash.
+        final_value (float): Final portfolio value.
+        trades (np.ndarray): Positions opened per symbol.
+        long_open (np.ndarray): Longs still open per symbol at the end.
+        short_open (np.ndarray): Shorts still open per symbol at the end.
+        pnl (np.ndarray): Profit per symbol: net cash flow of its trades plus
+                          the value of its open positions at the last bar. Sums
+                          to `final_value` minus the starting cash.
+    """
+    port_hist: np.ndarray
+    cash: float
+    final_value: float
+    trades: np.ndarray
+    long_open: np.ndarray
+    short_open: np.ndarray
+    pnl: np.ndarray
+
+
+def _portfolio_numpy(close: np.ndarray, buy: np.ndarray, sell: np.ndarray,
+                     SL: float, TP: float, n_shares: np.ndarray, com: float, cash: float,
+                     acc: np.ndarray, record: bool) -> tuple:
+    """
+    Array engine behind `backtest_portfolio`.
+
+    Open positions of every symbol share one buffer per side, tagged with
+    their symbol's column, so SL/TP hits, proceeds, new positions and
+    per-symbol counts come from a few vectorized operations per bar whatever
+    the number of symbols. Signals are funded in column order (a symbol's long
+    before its short); only bars whose signals cost more than the available
+    cash walk through them one by one.
+
+    Args:
+        close (np.ndarray): Bars x symbols close prices without gaps (0 before
+                            a symbol's first bar).
+        buy (np.ndarray): Bars x symbols buy signals.
+        sell (np.ndarray): Bars x symbols sell signals.
+        SL (float): Stop-loss threshold as a percentage.
+        TP (float): Take-profit threshold as a percentage.
+        n_shares (np.ndarray): Shares/contracts traded per signal, per symbol.
+        com (float): Commission rate.
+        cash (float): Starting cash.
+        acc (np.ndarray): Online metrics state updated with every portfolio
+            value (see `metrics._acc_update`); pass an empty array to skip.
+        record (bool): Keep the portfolio value of every bar.
+
+    Returns:
+        tuple: Portfolio value at each bar (empty if not `record`), final cash,
+               then per symbol: positions opened, open longs, open shorts, sum
+               of open short entry prices and net cash flow of the trades.
+    """
+    n_bars, n_syms = close.shape
+    port_hist = np.empty(n_bars if record else 0)
+    trades = np.zeros(n_syms, dtype=np.int64)
+    long_count = np.zeros(n_syms, dtype=np.int64)
+    short_count = np.zeros(n_syms, dtype=np.int64)
+    short_sum = np.zeros(n_syms)
+    flow = np.zeros(n_syms)
+
+    # Open positions per side: symbol column, entry price, SL and TP levels
+    books = {side: [np.empty(64, dtype=np.int64), np.empty(64), np.empty(64), np.empty(64)]
+             for side in (1, -1)}
+    n_open = {1: 0, -1: 0}
+
+    # Order in which a bar's signals are funded: (symbol 0 long, symbol 0 short, ...)
+    signal_sym = np.repeat(np.arange(n_syms), 2)
+    signal_side = np.tile([1, -1], n_syms)
+
+    for i in range(n_bars):
+        price = close[i]
+
+        # Close triggered positions of every symbol
+        for side, counts in ((1, long_count), (-1, short_count)):
+            n = n_open[side]
+            if not n:
+                continue
+            sym, entry, sl, tp = (a[:n] for a in books[side])
+            mark = price[sym]
+            if side == 1:
+                hit = (sl > mark) | (tp < mark)
+            else:
+                hit = (tp > mark) | (sl < mark)
+            if not hit.any():
+                continue
+            hit_sym, hit_mark = sym[hit], mark[hit]
+            hit_shares = n_shares[hit_sym]
+            if side == 1:
+                proceeds = hit_shares * hit_mark * (1 - com)
+            else:
+                hit_entry = entry[hit]
+                proceeds = hit_entry * hit_shares + \
+                    (hit_entry - hit_mark) * hit_shares * (1 - com)
+                short_sum -= np.bincount(hit_sym, hit_entry, n_syms)
+            counts -= np.bincount(hit_sym, minlength=n_syms)
+            flow += np.bincount(hit_sym, proceeds, n_syms)
+            cash += proceeds.sum()
+            keep = ~hit
+            n_keep = n - len(hit_sym)
+            for a in books[side]:
+                a[:n_keep] = a[:n][keep]
+            n_open[side] = n_keep
+
+        # Fund the bar's signals in order while cash lasts
+        wanted = np.flatnonzero(np.column_stack((buy[i], sell[i])).ravel())
+        if len(wanted):
+            sym = signal_sym[wanted]
+            cost = price[sym] * n_shares[sym] * (1 + com)
+            if cash <= cost.sum():
+                funded = np.zeros(len(wanted), dtype=bool)
+                left = cash
+                for k, c in enumerate(cost.tolist()):
+                    if left > c:
+                        left -= c
+                        funded[k] = True
+                wanted, sym, cost = wanted[funded], sym[funded], cost[funded]
+            cash -= cost.sum()
+            flow -= np.bincount(sym, cost, n_syms)
+            trades += np.bincount(sym, minlength=n_syms)
+
+            for side, counts in ((1, long_count), (-1, short_count)):
+                new_sym = sym[signal_side[wanted] == side]
+                if not len(new_sym):
+                    continue
+                n, k = n_open[side], len(new_sym)
+                if n + k > len(books[side][0]):
+                    size = max(2 * len(books[side][0]), n + k)
+                    books[side] = [np.concatenate((a[:n], np.empty(size - n, dtype=a.dtype)))
+                                   for a in books[side]]
+                entry = price[new_sym]
+                books[side][0][n:n + k] = new_sym
+                books[side][1][n:n + k] = entry
+                books[side][2][n:n + k] = entry * (1 - side * SL)
+                books[side][3][n:n + k] = entry * (1 + side * TP)
+                n_open[side] = n + k
+                counts += np.bincount(new_sym, minlength=n_syms)
+                if side == -1:
+                    short_sum += np.bincount(new_sym, entry, n_syms)
+
+        # Portfolio value: cash + longs at market + shorts' collateral and P&L
+        port_value = cash + (long_count * n_shares) @ price + \
+            ((2 * short_sum - short_count * price) * n_shares).sum()
+        if record:
+            port_hist[i] = port_value
+        if acc.shape[0]:
+            _acc_update(acc, port_value)
+
+    return port_hist, cash, trades, long_count, short_count, short_sum, flow
+
+
+def _portfolio_kernel(close: np.ndarray, buy: np.ndarray, sell: np.ndarray,
+                      SL: float, TP: float, n_shares: np.ndarray, com: float, cash: float,
+                      acc: np.ndarray, record: bool) -> tuple:
+    """
+    Scalar loop over bars, symbols and open positions, written for Numba.
+
+    Same arguments, results and semantics as `_portfolio_numpy`. With a single
+    symbol it performs exactly the operations of `_backtest_kernel`.
+    """
+    n_bars, n_syms = close.shape
+    port_hist = np.empty(n_bars if record else 0)
+    trades = np.zeros(n_syms, dtype=np.int64)
+    long_count = np.zeros(n_syms, dtype=np.int64)
+    short_count = np.zeros(n_syms, dtype=np.int64)
+    short_sum = np.zeros(n_syms)
+    flow = np.zeros(n_syms)
+
+    # Open positions: symbol column, SL/TP levels (and short entry price)
+    n_long = 0
+    long_sym = np.empty(64, dtype=np.int64)
+    long_sl = np.empty(64)
+    long_tp = np.empty(64)
+    n_short = 0
+    short_sym = np.empty(64, dtype=np.int64)
+    short_price = np.empty(64)
+    short_sl = np.empty(64)
+    short_tp = np.empty(64)
+
+    for i in range(n_bars):
+        # Close triggered longs, keeping the survivors in entry order
+        n_keep = 0
+        for j in range(n_long):
+            s = long_sym[j]
+            price = close[i, s]
+            if long_sl[j] > price or long_tp[j] < price:
+                proceeds = n_shares[s] * price * (1 - com)
+                cash += proceeds
+                flow[s] += proceeds
+                long_count[s] -= 1
+            else:
+                long_sym[n_keep] = s
+                long_sl[n_keep] = long_sl[j]
+                long_tp[n_keep] = long_tp[j]
+                n_keep += 1
+        n_long = n_keep
+
+        # Close triggered shorts, keeping the survivors in entry order
+        n_keep = 0
+        for j in range(n_short):
+            s = short_sym[j]
+            price = close[i, s]
+            if short_tp[j] > price or short_sl[j] < price:
+                proceeds = short_price[j] * n_shares[s] + \
+                    (short_price[j] - price) * n_shares[s] * (1 - com)
+                cash += proceeds
+                flow[s] += proceeds
+                short_count[s] -= 1
+                short_sum[s] -= short_price[j]
+            else:
+                short_sym[n_keep] = s
+                short_price[n_keep] = short_price[j]
+                short_sl[n_keep] = short_sl[j]
+                short_tp[n_keep] = short_tp[j]
+                n_keep += 1
+        n_short = n_keep
+
+        # Room for one new position per symbol and side, reserved outside the symbol loop
+        if n_long + n_syms > long_sym.shape[0]:
+            size = max(2 * long_sym.shape[0], n_long + n_syms)
+            long_sym = np.concatenate((long_sym[:n_long], np.empty(size - n_long, dtype=np.int64)))
+            long_sl = np.concatenate((long_sl[:n_long], np.empty(size - n_long)))
+            long_tp = np.concatenate((long_tp[:n_long], np.empty(size - n_long)))
+        if n_short + n_syms > short_sym.shape[0]:
+            size = max(2 * short_sym.shape[0], n_short + n_syms)
+            short_sym = np.concatenate((short_sym[:n_short], np.empty(size - n_short, dtype=np.int64)))
+            short_price = np.concatenate((short_price[:n_short], np.empty(size - n_short)))
+            short_sl = np.concatenate((short_sl[:n_short], np.empty(size - n_short)))
+            short_tp = np.concatenate((short_tp[:n_short], np.empty(size - n_short)))
+
+        # Fund the bar's signals in column order, a symbol's long before its short
+        for s in range(n_syms):
+            price = close[i, s]
+            if buy[i, s]:
+                cost = price * n_shares[s] * (1 + com)
+                if cash > cost:
+                    cash -= cost
+                    flow[s] -= cost
+                    long_sym[n_long] = s
+                    long_sl[n_long] = price * (1 - SL)
+                    long_tp[n_long] = price * (1 + TP)
+                    n_long += 1
+                    long_count[s] += 1
+                    trades[s] += 1
+
+            if sell[i, s]:
+                cost = price * n_shares[s] * (1 + com)
+                if cash > cost:
+                    cash -= cost
+                    flow[s] -= cost
+                    short_sym[n_short] = s
+                    short_price[n_short] = price
+                    short_sl[n_short] = price * (1 + SL)
+                    short_tp[n_short] = price * (1 - TP)
+                    n_short += 1
+                    short_count[s] += 1
+                    short_sum[s] += price
+                    trades[s] += 1
+
+        # Portfolio value: cash + longs at market + shorts' collateral and P&L
+        port_value = cash
+        for s in range(n_syms):
+            price = close[i, s]
+            port_value += long_count[s] * n_shares[s] * price
+            port_value += (2 * short_sum[s] - short_count[s] * price) * n_shares[s]
+        if record:
+            port_hist[i] = port_value
+        if acc.shape[0]:
+            _acc_update_jit(acc, port_value)
+
+    return port_hist, cash, trades, long_count, short_count, short_sum, flow
+
+
+_portfolio_jit = njit(cache=True, nogil=True)(_portfolio_kernel) if njit is not None else None
+
+BACKENDS = ("auto", "numba", "numpy", "heap", "python")
+
+
+def _resolve_backend(backend: str) -> str:
+    """
+    Map a requested backend to the one that will actually run.
+
+    'auto' and 'numba' use the compiled kernel when Numba is installed and fall
+    back to the NumPy engine otherwise.
+
+    Args:
+        backend (str): One of 'auto', 'numba', 'numpy', 'heap' or 'python'.
+
+    Returns:
+        str: 'numba', 'numpy', 'heap' or 'python'.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(
+            f"Unknown backend '{backend}'. Expected one of {BACKENDS}.")
+    if backend in ("auto", "numba"):
+        return "numba" if _backtest_jit is not None else "numpy"
+    return backend
+
+
+@instrument("backtest_arrays")
+def backtest_arrays(close: np.ndarray, buy: np.ndarray, sell: np.ndarray,
+                    SL: float, TP: float, n_shares: float,
+                    backend: str = "auto", state: BacktestState | None = None,
+                    metrics: OnlineMetrics | None = None, record: bool = True) -> np.ndarray:
+    """
+    Simulate a trading strategy directly on price and signal arrays.
+
+    Passing the same `state` to consecutive calls continues the simulation
+    across them, with cash and open positions carried over. With `metrics`,
+    every portfolio value is folded into the online metrics as it is produced,
+    so `record=False` can skip storing the history altogether.
+
+    Args:
+        close (np.ndarray): Close prices.
+        buy (np.ndarray): Buy signals.
+        sell (np.ndarray): Sell signals.
+        SL (float): Stop-loss threshold as a percentage (e.g., 0.1 for 10%).
+        TP (float): Take-profit threshold as a percentage (e.g., 0.1 for 10%).
+        n_shares (float): Number of shares/contracts to trade per signal.
+        backend (str): 'auto', 'numba', 'numpy' or 'heap' (see `backtest`).
+        state (BacktestState | None): Cash and open positions to start from; it
+                                      is updated in place with the final state.
+        metrics (OnlineMetrics | None): Online metrics updated on every bar.
+        record (bool): Return the portfolio value of every bar.
+
+    Returns:
+        np.ndarray: Portfolio value at each bar (empty if not `record`).
+    """
+    backend = _resolve_backend(backend)
+    if backend == "python":
+        raise ValueError("The 'python' backend needs a DataFrame; use backtest().")
+
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    buy = np.ascontiguousarray(buy, dtype=bool)
+    sell = np.ascontiguousarray(sell, dtype=bool)
+
+    if state is None:
+        state = BacktestState()
+
+    engine = {"numba": _backtest_jit, "numpy": _backtest_numpy,
+              "heap": _backtest_heap}[backend]
+    (port_hist, state.cash, state.long_price, state.long_sl, state.long_tp,
+     state.short_price, state.short_sl, state.short_tp) = engine(
+        close, buy, sell, float(SL), float(TP), float(n_shares), COM,
+        float(state.cash), state.long_price, state.long_sl, state.long_tp,
+        state.short_price, state.short_sl, state.short_tp,
+        metrics.acc if metrics is not None else np.empty(0), record)
+    count("bars_backtested", len(close))
+    return port_hist
+
+
+@instrument("backtest")
+def backtest(data: pd.DataFrame, SL: float, TP: float, n_shares: float,
+             backend: str = "auto") -> tuple[list[float], float]:
+    """
+    Simulate a trading strategy over historical data.
+
+    Runs on contiguous NumPy arrays of 'Close', 'buy_signal' and 'sell_signal'
+    and matches `backtest_reference` to within floating point tolerance.
+
+    Args:
+        data (pd.DataFrame): DataFrame containing market data and buy/sell signals.
+                             Expected columns: 'Close', 'buy_signal', 'sell_signal'.
+        SL (float): Stop-loss threshold as a percentage (e.g., 0.1 for 10%).
+        TP (float): Take-profit threshold as a percentage (e.g., 0.1 for 10%).
+        n_shares (int): Number of shares/contracts to trade per signal.
+        backend (str): 'numba' for the compiled kernel, 'numpy' for the array
+                       engine, 'heap' for the price-ordered trigger index,
+                       'python' for `backtest_reference`. 'auto' (default)
+                       picks 'numba' when Numba is installed and 'numpy' otherwise.
+
+    Returns:
+        tuple[list[float], float]: 
+            - List of portfolio values over time.
+            - Final cash balance after all trades.
+    """
+    if _resolve_backend(backend) == "python":
+        return backtest_reference(data, SL, TP, n_shares)
+
+    port_hist = backtest_arrays(
+        data['Close'].to_numpy(dtype=np.float64),
+        data['buy_signal'].to_numpy(dtype=bool),
+        data['sell_signal'].to_numpy(dtype=bool),
+        SL, TP, n_shares, backend=backend
+    )
+
+    # Return portfolio history and final value
+    return port_hist.tolist(), float(port_hist[-1]) if len(port_hist) else INITIAL_CASH
+
+
+@instrument("backtest_batch")
+def backtest_batch(data: pd.DataFrame, params_matrix: np.ndarray,
+                   return_portfolios: bool = False, periods_per_year: int = 8760,
+                   backend: str = "auto") -> np.ndarray | tuple[np.ndarray, np.ndarray]:
+    """
+    Simulate many trade-management parameter sets over the same signals.
+
+    The price and signal arrays are extracted once and shared by every
+    configuration. With Numba the configurations run in parallel inside one
+    compiled call. The NumPy engine makes a single time-major pass that
+    advances every configuration bar by bar. The 'heap' and 'python'
+    backends run the configurations one after another.
+
+    Args:
+        data (pd.DataFrame): DataFrame containing market data and buy/sell signals.
+                             Expected columns: 'Close', 'buy_signal', 'sell_signal'.
+        params_matrix (np.ndarray): N x 3 array of (SL, TP, n_shares) rows.
+        return_portfolios (bool): If True, return the full N x T portfolio matrix.
+        periods_per_year (int): Number of periods per year, for the Calmar Ratio.
+        backend (str): 'auto', 'numba', 'numpy', 'heap' or 'python' (see `backtest`).
+
+    Returns:
+        np.ndarray | tuple[np.ndarray, np.ndarray]:
+            - N x T matrix of portfolio values if `return_portfolios` is True.
+            - Otherwise, final portfolio values and Calmar Ratios (length N each).
+    """
+    params = np.ascontiguousarray(params_matrix, dtype=np.float64)
+    if params.ndim != 2 or params.shape[1] != 3:
+        raise ValueError("params_matrix must have shape (N, 3): SL, TP, n_shares.")
+
+    backend = _resolve_backend(backend)
+    close = np.ascontiguousarray(data['Close'].to_numpy(dtype=np.float64))
+    buy = np.ascontiguousarray(data['buy_signal'].to_numpy(dtype=bool))
+    sell = np.ascontiguousarray(data['sell_signal'].to_numpy(dtype=bool))
+
+    if backend == "numba":
+        port = _backtest_batch_jit(close, buy, sell, params, COM, float(INITIAL_CASH))
+    elif backend == "numpy":
+        port = _backtest_batch_numpy(close, buy, sell, params, COM, float(INITIAL_CASH))
+    elif backend == "heap":
+        port = np.empty((params.shape[0], close.shape[0]))
+        for k, (sl, tp, n_shares) in enumerate(params):
+            port[k] = backtest_arrays(close, buy, sell, sl, tp, n_shares, backend)
+    else:
+        port = np.array([backtest_reference(data, sl, tp, n_shares)[0]
+                         for sl, tp, n_shares in params]).reshape(params.shape[0], -1)
+
+    if return_portfolios:
+        return port
+
+    final_values = port[:, -1] if port.shape[1] else np.full(
+        params.shape[0], float(INITIAL_CASH))
+    return final_values, calmar_ratio_batch(port, periods_per_year)
+
+
+def backtest_stream(chunks: Iterable[pd.DataFrame], SL: float, TP: float, n_shares: float,
+                    backend: str = "auto", metrics: OnlineMetrics | None = None,
+                    record: bool = True) -> tuple[np.ndarray, float]:
+    """
+    Simulate a trading strategy over data that arrives in chronological chunks.
+
+    Cash and open positions are carried across chunk boundaries, so the result
+    matches `backtest` on the concatenated chunks.
+
+    Args:
+        chunks (Iterable[pd.DataFrame]): Chunks with 'Close', 'buy_signal' and
+                                         'sell_signal' columns.
+        SL (float): Stop-loss threshold as a percentage (e.g., 0.1 for 10%).
+        TP (float): Take-profit threshold as a percentage (e.g., 0.1 for 10%).
+        n_shares (float): Number of shares/contracts to trade per signal.
+        backend (str): 'auto', 'numba', 'numpy' or 'heap' (see `backtest`).
+        metrics (OnlineMetrics | None): Online metrics updated on every bar.
+        record (bool): Keep the portfolio value history. With `metrics` and
+                       `record=False`, memory stays constant in the data size.
+
+    Returns:
+        tuple[np.ndarray, float]:
+            - Portfolio values over time (empty if not `record`).
+            - Final portfolio value.
+    """
+    state = BacktestState()
+    if metrics is None and not record:
+        metrics = OnlineMetrics()
+    port_chunks = [
+        backtest_arrays(
+            chunk['Close'].to_numpy(dtype=np.float64),
+            chunk['buy_signal'].to_numpy(dtype=bool),
+            chunk['sell_signal'].to_numpy(dtype=bool),
+            SL, TP, n_shares, backend=backend, state=state,
+            metrics=metrics, record=record
+        )
+        for chunk in chunks
+    ]
+    port_hist = np.concatenate(port_chunks) if port_chunks else np.empty(0)
+    if len(port_hist):
+        return port_hist, float(port_hist[-1])
+    if metrics is not None and metrics.last_value is not None:
+        return port_hist, metrics.last_value
+    return port_hist, state.cash
+
+
+@instrument("backtest_portfolio")
+def backtest_portfolio(close: np.ndarray, buy: np.ndarray, sell: np.ndarray,
+                       SL: float, TP: float, n_shares: float | np.ndarray,
+                       backend: str = "auto", metrics: OnlineMetrics | None = None,
+                       record: bool = True) -> PortfolioResult:
+    """
+    Simulate the strategy on many symbols trading from one cash balance.
+
+    Each symbol follows the single-asset rules of `backtest_arrays` (SL/TP
+    exits first, then one long per buy signal and one short per sell signal,
+    each funded only if cash exceeds its cost), but every position draws on and
+    returns to the same cash. Within a bar, signals are funded in column order.
+    With one symbol the result matches `backtest_arrays`.
+
+    Args:
+        close (np.ndarray): Bars x symbols close prices. NaN marks bars without
+                            a price (e.g. before a symbol is listed): signals
+                            there are ignored and open positions keep their
+                            last close.
+        buy (np.ndarray): Bars x symbols buy signals (e.g. from
+                          `indicators.panel_signals`).
+        sell (np.ndarray): Bars x symbols sell signals.
+        SL (float): Stop-loss threshold as a percentage (e.g., 0.1 for 10%).
+        TP (float): Take-profit threshold as a percentage (e.g., 0.1 for 10%).
+        n_shares (float | np.ndarray): Shares/contracts traded per signal, one
+                                       value for every symbol or one per symbol.
+        backend (str): 'auto', 'numba' or 'numpy' (see `backtest`).
+        metrics (OnlineMetrics | None): Online metrics updated on every bar.
+        record (bool): Keep the portfolio value of every bar.
+
+    Returns:
+        PortfolioResult: Portfolio values, final cash and per-symbol positions and P&L.
+    """
+    backend = _resolve_backend(backend)
+    if backend not in ("numba", "numpy"):
+        raise ValueError(f"The '{backend}' backend cannot simulate a portfolio; "
+                         "use 'auto', 'numba' or 'numpy'.")
+
+    close = np.asarray(close, dtype=np.float64)
+    if close.ndim != 2 or np.shape(buy) != close.shape or np.shape(sell) != close.shape:
+        raise ValueError("close, buy and sell must be 2-D arrays of the same shape.")
+    n_syms = close.shape[1]
+    n_shares = np.ascontiguousarray(np.broadcast_to(
+        np.asarray(n_shares, dtype=np.float64), (n_syms,)))
+
+    # Missing bars repeat the last close (0 before the first) and take no new positions
+    listed = ~np.isnan(close)
+    buy = np.ascontiguousarray(np.logical_and(buy, listed))
+    sell = np.ascontiguousarray(np.logical_and(sell, listed))
+    if not listed.all():
+        last_seen = np.maximum.accumulate(
+            np.where(listed, np.arange(len(close))[:, None], 0), axis=0)
+        close = np.nan_to_num(np.take_along_axis(close, last_seen, axis=0))
+    close = np.ascontiguousarray(close)
+
+    engine = _portfolio_jit if backend == "numba" else _portfolio_numpy
+    port_hist, cash, trades, long_count, short_count, short_sum, flow = engine(
+        close, buy, sell, float(SL), float(TP), n_shares, COM, float(INITIAL_CASH),
+        metrics.acc if metrics is not None else np.empty(0), record)
+    count("symbol_bars_backtested", close.size)
+
+    # Value of the positions still open at the last bar
+    last = close[-1] if len(close) else np.zeros(n_syms)
+    open_value = (long_count * last + 2 * short_sum - short_count * last) * n_shares
+    return PortfolioResult(
+        port_hist=port_hist,
+        cash=float(cash),
+        final_value=float(cash + open_value.sum()),
+        trades=trades,
+        long_open=long_count,
+        short_open=short_count,
+        pnl=flow + open_value
+    )
@@ -0,0 +1,487 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable
+
+import numpy as np
+import optuna
+import pandas as pd
+
+from indicators import add_indicators, get_signals, precompute_indicators, INDICATOR_CACHE
+from backtesting import backtest, BACKENDS, _resolve_backend
+from metrics import performance_summary, calmar_ratio
+from optimize import optimize
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000, 10_000_000)
+
+# Fixed parameters of every single-run benchmark (middle of the search space)
+BENCH_PARAMS = {
+    "rsi_window": 14,
+    "sma_window": 20,
+    "bb_window": 20,
+    "bb_dev": 2.0,
+    "rsi_buy": 30,
+    "rsi_sell": 70,
+    "SL": 0.1,
+    "TP": 0.1,
+    "n_shares": 1.0
+}
+
+
+def synthetic_data(n_bars: int, seed: int = 0, s0: float = 30_000.0,
+                   mu: float = 0.0, sigma: float = 0.01) -> pd.DataFrame:
+    """
+    Generate hourly bars from a geometric Brownian motion.
+
+    The frame has the same columns, dtypes and chronological order as the one
+    returned by `data.load_data` for a Binance export.
+
+    Args:
+        n_bars (int): Number of bars.
+        seed (int): Seed of the random generator.
+        s0 (float): Opening price of the first bar.
+        mu (float): Drift of the log price per bar.
+        sigma (float): Volatility of the log price per bar.
+
+    Returns:
+        pd.DataFrame: Synthetic OHLCV bars.
+    """
+    rng = np.random.default_rng(seed)
+    log_ret = rng.normal(mu - 0.5 * sigma ** 2, sigma, n_bars)
+    close = s0 * np.exp(np.cumsum(log_ret))
+    open_ = np.empty(n_bars)
+    open_[0] = s0
+    open_[1:] = close[:-1]
+
+    # Intrabar range scaled to the bar's volatility
+    wick = np.abs(rng.normal(0.0, sigma, (2, n_bars)))
+    high = np.maximum(open_, close) * (1 + wick[0])
+    low = np.minimum(open_, close) * (1 - wick[1])
+
+    dates = pd.date_range("2018-01-01", periods=n_bars, freq="h")
+    volume = rng.lognormal(3.0, 1.0, n_bars)
+    return pd.DataFrame({
+        "Date": dates,
+        "Unix": dates.asi8 // 1_000_000,
+        "Symbol": "BTCUSDT",
+        "Open": open_,
+        "High": high,
+        "Low": low,
+        "Close": close,
+        "Volume BTC": volume,
+        "Volume USDT": volume * close,
+        "tradecount": rng.integers(100, 10_000, n_bars)
+    })
+
+
+def _measure(fn: Callable[[], object], repeat: int) -> dict:
+    """
+    Time a call and record its peak memory.
+
+    A first traced run records the peak of Python and NumPy allocations made
+    by the call and also warms up JIT compilation and caches, so the timed
+    runs that follow measure the steady state without tracing overhead.
+
+    Args:
+        fn (Callable[[], object]): Call to benchmark.
+        repeat (int): Number of timed runs; the best one is reported.
+
+    Returns:
+        dict: 'seconds' (best run), 'runs' (every run) and 'peak_mb'.
+    """
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - t0)
+    return {"seconds": min(runs), "runs": runs, "peak_mb": peak / 2 ** 20}
+
+
+def _max_rss_mb() -> float:
+    """Peak resident set size of this process so far."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return rss / 2 ** 20 if sys.platform == "darwin" else rss / 2 ** 10
+
+
+def _proc_status_mb(field: str) -> float | None:
+    """A memory field of /proc/self/status (e.g. 'VmRSS'), or None off Linux."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 2 ** 10
+    except OSError:
+        pass
+    return None
+
+
+def _reset_peak_rss() -> bool:
+    """Reset the kernel's peak RSS mark (VmHWM) of this process; False if unsupported."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def bench_size(n_bars: int, n_trials: int = 20, repeat: int = 3,
+               backend: str = "auto", seed: int = 0) -> dict:
+    """
+    Benchmark every hot path on one synthetic series.
+
+    Args:
+        n_bars (int): Number of bars of the series.
+        n_trials (int): Number of trials of the study benchmark (0 skips it).
+        repeat (int): Timed runs per single-call benchmark.
+        backend (str): Backtest backend (see `backtesting.backtest`).
+        seed (int): Seed of the synthetic data and of the study's sampler.
+
+    Returns:
+        dict: Timings, throughput and peak memory per benchmark.
+    """
+    data = synthetic_data(n_bars, seed=seed)
+    p = BENCH_PARAMS
+
+    def indicators():
+        return add_indicators(data.copy(), rsi_window=p["rsi_window"],
+                              sma_window=p["sma_window"], bb_window=p["bb_window"],
+                              bb_dev=p["bb_dev"])
+
+    with_indicators = indicators()
+
+    def signals():
+        return get_signals(with_indicators.copy(), rsi_buy=p["rsi_buy"],
+                           rsi_sell=p["rsi_sell"], sma_window=p["sma_window"],
+                           bb_window=p["bb_window"], bb_dev=p["bb_dev"])
+
+    with_signals = signals()
+
+    def run_backtest():
+        return backtest(with_signals, SL=p["SL"], TP=p["TP"],
+                        n_shares=p["n_shares"], backend=backend)
+
+    port_hist, _ = run_backtest()
+    port_series = pd.Series(port_hist, index=with_signals.index)
+
+    def summary():
+        return performance_summary(port_series, periods_per_year=8760)
+
+    def trial():
+        # Cold: the indicator series are computed, as for new parameters
+        INDICATOR_CACHE.clear()
+        optimize(optuna.trial.FixedTrial(p), data)
+
+    def warm_trial():
+        # Warm: every indicator series is a cache hit from the previous run
+        optimize(optuna.trial.FixedTrial(p), data)
+
+    results = {}
+    for name, fn, bars in (("add_indicators", indicators, len(data)),
+                           ("get_signals", signals, len(with_indicators)),
+                           ("backtest", run_backtest, len(with_signals)),
+                           ("performance_summary", summary, len(port_series)),
+                           ("optimize_trial", trial, len(data)),
+                           ("optimize_trial_warm", warm_trial, len(data))):
+        result = _measure(fn, repeat)
+        result["bars_per_sec"] = bars / result["seconds"]
+        results[name] = result
+    for name in ("optimize_trial", "optimize_trial_warm"):
+        results[name]["trials_per_sec"] = 1 / results[name]["seconds"]
+
+    if n_trials > 0:
+        study = optuna.create_study(direction="maximize",
+                                    sampler=optuna.samplers.TPESampler(seed=seed))
+        t0 = time.perf_counter()
+        study.optimize(lambda t: optimize(t, data), n_trials=n_trials)
+        seconds = time.perf_counter() - t0
+        results["optimize_study"] = {
+            "seconds": seconds,
+            "n_trials": n_trials,
+            "trials_per_sec": n_trials / seconds,
+            "bars_per_sec": n_trials * len(data) / seconds
+        }
+
+    results["max_rss_mb"] = _max_rss_mb()
+    return results
+
+
+def run_benchmarks(sizes: tuple[int, ...] = DEFAULT_SIZES, n_trials: int = 20,
+                   repeat: int = 3, backend: str = "auto", seed: int = 0,
+                   verbose: bool = True) -> dict:
+    """
+    Benchmark the hot paths at several series lengths.
+
+    Args:
+        sizes (tuple[int, ...]): Series lengths in bars.
+        n_trials (int): Number of trials of each study benchmark (0 skips it).
+        repeat (int): Timed runs per single-call benchmark.
+        backend (str): Backtest backend (see `backtesting.backtest`).
+        seed (int): Seed of the synthetic data and of the study's sampler.
+        verbose (bool): Print each result as it is measured.
+
+    Returns:
+        dict: Run metadata under 'meta' and per-size results under 'results'.
+    """
+    try:
+        import numba
+        numba_version = numba.__version__
+    except ImportError:
+        numba_version = None
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "optuna": optuna.__version__,
+            "numba": numba_version,
+            "backend": _resolve_backend(backend),
+            "n_trials": n_trials,
+            "repeat": repeat,
+            "seed": seed
+        },
+        "results": {}
+    }
+
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    for n_bars in sizes:
+        results = bench_size(n_bars, n_trials=n_trials, repeat=repeat,
+                             backend=backend, seed=seed)
+        report["results"][str(n_bars)] = results
+        if verbose:
+            print(f"\n{n_bars:,} bars")
+            for name, result in results.items():
+                if isinstance(result, dict):
+                    line = f"  {name:<20} {result['seconds']:>10.4f} s " \
+                           f"{result['bars_per_sec']:>14,.0f} bars/s"
+                    if "trials_per_sec" in result:
+                        line += f" {result['trials_per_sec']:>8.2f} trials/s"
+                    if "peak_mb" in result:
+                        line += f" {result['peak_mb']:>9.1f} MB peak"
+                    print(line)
+            print(f"  {'max RSS':<20} {results['max_rss_mb']:>10.1f} MB")
+    return report
+
+
+def _sample_params(rng: np.random.Generator) -> dict:
+    """Draw one parameter set uniformly from the search space of `optimize.optimize`."""
+    return {
+        "rsi_window": int(rng.integers(7, 22)),
+        "sma_window": int(rng.integers(10, 31)),
+        "bb_window": int(rng.integers(10, 26)),
+        "bb_dev": round(float(rng.choice(np.arange(1.5, 2.501, 0.05))), 2),
+        "rsi_buy": int(rng.integers(10, 41)),
+        "rsi_sell": int(rng.integers(60, 91)),
+        "SL": float(rng.uniform(0.02, 0.2)),
+        "TP": float(rng.uniform(0.02, 0.2)),
+        "n_shares": float(rng.uniform(0.3, 10.0))
+    }
+
+
+def _frame_trial(data: pd.DataFrame, params: dict, n_splits: int = 7) -> float:
+    """
+    The DataFrame-based objective `optimize.optimize` used to run, kept as the
+    baseline of `trial_memory`: the frame is copied, indicators and signals are
+    added as columns and every fold backtests a copied `iloc` slice.
+    """
+    frame = add_indicators(data.copy(), rsi_window=params["rsi_window"],
+                           sma_window=params["sma_window"], bb_window=params["bb_window"],
+                           bb_dev=params["bb_dev"])
+    frame = get_signals(frame, rsi_buy=params["rsi_buy"], rsi_sell=params["rsi_sell"],
+                        sma_window=params["sma_window"], bb_window=params["bb_window"],
+                        bb_dev=params["bb_dev"])
+    size = len(frame) // n_splits
+    calmars = []
+    for i in range(n_splits):
+        chunk = frame.iloc[i * size:(i + 1) * size, :].copy()
+        port_vals, _ = backtest(chunk, params["SL"], params["TP"], params["n_shares"])
+        returns = pd.Series(port_vals).pct_change().dropna()
+        calmars.append(calmar_ratio(returns, periods_per_year=8760))
+    return float(np.mean(calmars))
+
+
+def _trial_memory_worker(path: str, n_bars: int, n_trials: int, seed: int) -> dict:
+    """
+    Measure one objective path in a fresh process.
+
+    Args:
+        path (str): 'frame' for the DataFrame objective, 'array' for
+                    `optimize.optimize` on a precomputed indicator grid.
+        n_bars (int): Number of bars of the synthetic series.
+        n_trials (int): Number of trials.
+        seed (int): Seed of the data and of the parameter draws.
+
+    Returns:
+        dict: RSS after setup, the largest RSS growth of a single trial over
+              the RSS it started from, the largest traced peak of a single
+              trial and the mean time per trial.
+    """
+    data = synthetic_data(n_bars, seed=seed)
+    rng = np.random.default_rng(seed)
+    params = [_sample_params(rng) for _ in range(n_trials)]
+
+    def trial_runner(data: pd.DataFrame) -> Callable[[dict], object]:
+        if path == "array":
+            grid = precompute_indicators(data['Close'])
+            return lambda p: optimize(optuna.trial.FixedTrial(p), data, grid=grid)
+        return lambda p: _frame_trial(data, p)
+
+    # Compile the JIT kernels on a short series, so the baseline holds no
+    # trial-sized allocations
+    trial_runner(synthetic_data(2_000, seed=seed))(params[0])
+    run = trial_runner(data)
+    setup_rss = _proc_status_mb("VmRSS") or _max_rss_mb()
+
+    # Per-trial peak where the kernel lets us reset the mark, otherwise the
+    # growth of the lifetime peak over the whole loop
+    per_trial = _reset_peak_rss()
+    trial_rss = 0.0
+    seconds = 0.0
+    for p in params:
+        if per_trial:
+            _reset_peak_rss()
+            before = _proc_status_mb("VmRSS")
+        t0 = time.perf_counter()
+        run(p)
+        seconds += time.perf_counter() - t0
+        if per_trial:
+            trial_rss = max(trial_rss, _proc_status_mb("VmHWM") - before)
+    if not per_trial:
+        trial_rss = _max_rss_mb() - setup_rss
+
+    traced_peak = 0
+    tracemalloc.start()
+    try:
+        for p in params:
+            tracemalloc.reset_peak()
+            run(p)
+            traced_peak = max(traced_peak, tracemalloc.get_traced_memory()[1])
+    finally:
+        tracemalloc.stop()
+
+    return {"setup_rss_mb": setup_rss,
+            "trial_peak_rss_mb": trial_rss,
+            "trial_traced_peak_mb": traced_peak / 2 ** 20,
+            "seconds_per_trial": seconds / n_trials}
+
+
+def trial_memory(n_bars: int, n_trials: int = 10, seed: int = 0) -> dict:
+    """
+    Compare the memory of one optimization trial on DataFrames and on array views.
+
+    Each path runs in its own freshly spawned process, so the peak resident
+    set size of one does not hide the other's. The array path's indicator grid
+    is built once per study and is counted in its setup RSS, not per trial.
+
+    Args:
+        n_bars (int): Number of bars of the synthetic series.
+        n_trials (int): Trials per path, with the same parameter draws.
+        seed (int): Seed of the data and of the parameter draws.
+
+    Returns:
+        dict: Results of `_trial_memory_worker` for 'frame' and 'array'.
+    """
+    results = {}
+    context = multiprocessing.get_context("spawn")
+    for path in ("frame", "array"):
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            results[path] = pool.submit(_trial_memory_worker, path, n_bars,
+                                        n_trials, seed).result()
+    return results
+
+
+def compare_results(baseline: dict, current: dict, tolerance: float = 0.1) -> list[str]:
+    """
+    List the benchmarks that got slower than a saved baseline.
+
+    Args:
+        baseline (dict): Report loaded from a previous run.
+        current (dict): Report of this run.
+        tolerance (float): Allowed relative slowdown (0.1 for 10%).
+
+    Returns:
+        list[str]: One line per regression; empty if there is none.
+    """
+    regressions = []
+    for size, results in current["results"].items():
+        for name, result in results.items():
+            old = baseline["results"].get(size, {}).get(name)
+            if not isinstance(result, dict) or not isinstance(old, dict):
+                continue
+            ratio = result["seconds"] / old["seconds"]
+            if ratio > 1 + tolerance:
+                regressions.append(
+                    f"{name} @ {size} bars: {old['seconds']:.4f} s -> "
+                    f"{result['seconds']:.4f} s ({ratio:.2f}x)")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the backtest, indicator and optimize hot paths.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="Series lengths in bars.")
+    parser.add_argument("--trials", type=int, default=20,
+                        help="Trials of the study benchmark (0 skips it).")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Timed runs per benchmark; the best one is kept.")
+    parser.add_argument("--backend", default="auto", choices=BACKENDS,
+                        help="Backtest backend.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark.json",
+                        help="JSON file the results are written to.")
+    parser.add_argument("--baseline", default=None,
+                        help="Previous results to check for regressions.")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="Allowed relative slowdown against the baseline.")
+    parser.add_argument("--memory", action="store_true",
+                        help="Also compare per-trial memory of the DataFrame and array paths.")
+    parser.add_argument("--memory-trials", type=int, default=10,
+                        help="Trials per path of the memory benchmark.")
+    args = parser.parse_args()
+
+    report = run_benchmarks(tuple(args.sizes), n_trials=args.trials, repeat=args.repeat,
+                            backend=args.backend, seed=args.seed)
+    if args.memory:
+        report["memory"] = {}
+        print("\nMemory per trial (DataFrame path -> array path):")
+        for n_bars in args.sizes:
+            memory = trial_memory(n_bars, n_trials=args.memory_trials, seed=args.seed)
+            report["memory"][str(n_bars)] = memory
+            frame, array = memory["frame"], memory["array"]
+            print(f"  {n_bars:>11,} bars  "
+                  f"peak RSS {frame['trial_peak_rss_mb']:8.1f} -> {array['trial_peak_rss_mb']:8.1f} MB  "
+                  f"traced peak {frame['trial_traced_peak_mb']:8.1f} -> {array['trial_traced_peak_mb']:8.1f} MB  "
+                  f"{frame['seconds_per_trial']:.4f} -> {array['seconds_per_trial']:.4f} s")
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            regressions = compare_results(json.load(f), report, args.tolerance)
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\nNo regressions.")
@@ -1,15 +1,26 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+from typing import Iterator
+
+import numpy as np
 import pandas as pd
 
+from profiling import instrument
+
 
-def load_data(file_path: str) -> pd.DataFrame:
+def _parse_csv(file_path: str) -> pd.DataFrame:
     """
-    Load and preprocess historical price data from a CSV file.
+    Parse the raw CSV into a chronologically ordered DataFrame.
 
     Args:
         file_path (str): Path to the CSV file containing historical price data.
 
     Returns:
-        pd.DataFrame: Preprocessed DataFrame with datetime index and chronological order.
+        pd.DataFrame: Preprocessed DataFrame with a 'Date' column in chronological order.
     """
     df = pd.read_csv(file_path, skiprows=1)
     df['Date'] = pd.to_datetime(df['Date'], format='mixed')
@@ -17,3 +28,318 @@ def load_data(file_path: str) -> pd.DataFrame:
     df = df.iloc[::-1].reset_index(drop=False)
 
     return df
+
+
+def _cache_dir(file_path: str) -> str:
+    """Directory holding the binary cache of `file_path`."""
+    return file_path + ".cache"
+
+
+def _source_stamp(file_path: str) -> dict:
+    """Modification time and size of the source file, used to invalidate the cache."""
+    stat = os.stat(file_path)
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def _read_cache(file_path: str, mmap: bool) -> pd.DataFrame | None:
+    """
+    Load the cached frame if it exists and matches the source file.
+
+    Args:
+        file_path (str): Path to the source CSV file.
+        mmap (bool): Memory-map the column arrays read-only instead of loading them.
+
+    Returns:
+        pd.DataFrame | None: Cached DataFrame, or None if the cache is missing or stale.
+    """
+    cache_dir = _cache_dir(file_path)
+    meta_path = os.path.join(cache_dir, "meta.json")
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("source") != _source_stamp(file_path):
+        return None
+
+    columns = {}
+    try:
+        for i, name in enumerate(meta["columns"]):
+            values = np.load(os.path.join(cache_dir, f"{i}.npy"),
+                             mmap_mode="r" if mmap else None, allow_pickle=False)
+            if values.dtype.kind == "U":
+                values = values.astype(object)
+            columns[name] = values
+    except (OSError, ValueError, KeyError):
+        # Missing or truncated column files: treat the cache as stale
+        return None
+    return pd.DataFrame(columns, copy=False)
+
+
+def _write_cache(file_path: str, df: pd.DataFrame) -> None:
+    """
+    Store every column of `df` as a .npy file next to the source CSV.
+
+    The cache is written to a temporary directory and moved into place, so a
+    concurrent reader never sees a half-written cache. If the cache cannot be
+    written (e.g. a read-only directory), nothing is stored.
+
+    Args:
+        file_path (str): Path to the source CSV file.
+        df (pd.DataFrame): Parsed DataFrame to cache.
+    """
+    cache_dir = _cache_dir(file_path)
+    tmp_dir = None
+    try:
+        tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(file_path)))
+        for i, name in enumerate(df.columns):
+            values = df[name].to_numpy()
+            if values.dtype == object:
+                values = values.astype(str)
+            np.save(os.path.join(tmp_dir, f"{i}.npy"), values, allow_pickle=False)
+        with open(os.path.join(tmp_dir, "meta.json"), "w") as f:
+            json.dump({"source": _source_stamp(file_path),
+                       "columns": list(df.columns)}, f)
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        os.replace(tmp_dir, cache_dir)
+    except OSError:
+        # Unwritable data directory or disk full: carry on without a cache
+        if tmp_dir is not None:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+@instrument("load_data")
+def load_data(file_path: str, use_cache: bool = True, mmap: bool = False) -> pd.DataFrame:
+    """
+    Load and preprocess historical price data from a CSV file.
+
+    The cleaned frame is cached column by column as .npy files in
+    `<file_path>.cache/` and reused until the CSV's modification time or size
+    changes.
+
+    Args:
+        file_path (str): Path to the CSV file containing historical price data.
+        use_cache (bool): Read from and write to the binary cache.
+        mmap (bool): Memory-map cached columns read-only, so several processes
+                     share one copy of the OHLCV arrays.
+
+    Returns:
+        pd.DataFrame: Preprocessed DataFrame with datetime index and chronological order.
+    """
+    if use_cache:
+        df = _read_cache(file_path, mmap)
+        if df is not None:
+            return df
+
+    df = _parse_csv(file_path)
+    if use_cache:
+        _write_cache(file_path, df)
+        if mmap:
+            cached = _read_cache(file_path, mmap=True)
+            if cached is not None:
+                return cached
+    return df
+
+
+@dataclass
+class Universe:
+    """
+    Close prices of several symbols aligned on one time axis.
+
+    Attributes:
+        symbols (list[str]): Symbol of each column.
+        dates (pd.DatetimeIndex): Union of every symbol's bar dates.
+        close (np.ndarray): Bars x symbols close prices (C order). NaN before a
+                            symbol's first bar; later missing bars repeat the
+                            last close.
+    """
+    symbols: list[str]
+    dates: pd.DatetimeIndex
+    close: np.ndarray
+
+    @classmethod
+    def from_frame(cls, prices: pd.DataFrame) -> "Universe":
+        """
+        Build a universe from a wide frame of close prices.
+
+        Args:
+            prices (pd.DataFrame): One column per symbol, indexed by bar date.
+
+        Returns:
+            Universe: Aligned prices in chronological order.
+        """
+        prices = prices.sort_index().ffill()
+        return cls(symbols=[str(c) for c in prices.columns],
+                   dates=pd.DatetimeIndex(prices.index),
+                   close=np.ascontiguousarray(prices.to_numpy(dtype=np.float64)))
+
+    def frame(self) -> pd.DataFrame:
+        """Close prices as a DataFrame with one column per symbol."""
+        return pd.DataFrame(self.close, index=self.dates, columns=self.symbols)
+
+
+def _symbol_name(file_path: str) -> str:
+    """Symbol of a price file: 'BTCUSDT' for 'Binance_BTCUSDT_1h.csv', else the file stem."""
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    parts = stem.split("_")
+    return parts[1] if len(parts) == 3 else stem
+
+
+def load_universe(paths: list[str] | dict[str, str], use_cache: bool = True,
+                  mmap: bool = False) -> Universe:
+    """
+    Load several price files and align their close prices on shared dates.
+
+    Each file goes through `load_data` (and its binary cache), then the
+    closes are outer-joined on their dates, so symbols listed at different
+    times or with missing bars share one bars x symbols array.
+
+    Args:
+        paths (list[str] | dict[str, str]): CSV files, or symbol -> CSV file.
+                                            Symbols of a list are taken from
+                                            the file names.
+        use_cache (bool): Read from and write to the binary cache.
+        mmap (bool): Memory-map cached columns while aligning.
+
+    Returns:
+        Universe: Aligned close prices, one column per file.
+    """
+    if not isinstance(paths, dict):
+        names = [_symbol_name(path) for path in paths]
+        if len(set(names)) != len(names):
+            raise ValueError("Several files map to the same symbol; pass a "
+                             "{symbol: path} dict instead.")
+        paths = dict(zip(names, paths))
+
+    closes = {}
+    for symbol, path in paths.items():
+        df = load_data(path, use_cache=use_cache, mmap=mmap)
+        close = pd.Series(df['Close'].to_numpy(dtype=np.float64),
+                          index=pd.DatetimeIndex(df['Date']))
+        closes[symbol] = close[~close.index.duplicated(keep='last')]
+    return Universe.from_frame(pd.concat(closes, axis=1))
+
+
+# Aggregation applied to each column when resampling bars
+_RESAMPLE_AGG = {'Unix': 'first', 'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last'}
+
+
+def _reversed_lines(f: io.BufferedReader, start: int, block_size: int = 1 << 20) -> Iterator[bytes]:
+    """
+    Yield the non-empty lines of a binary file from the end back to `start`.
+
+    Args:
+        f (io.BufferedReader): File opened in binary mode.
+        start (int): Byte offset where the data rows begin.
+        block_size (int): Number of bytes read per seek.
+    """
+    f.seek(0, os.SEEK_END)
+    pos = f.tell()
+    tail = b""
+    while pos > start:
+        read = min(block_size, pos - start)
+        pos -= read
+        f.seek(pos)
+        lines = (f.read(read) + tail).split(b"\n")
+        tail = lines[0]
+        for line in reversed(lines[1:]):
+            if line.strip():
+                yield line
+    if tail.strip():
+        yield tail
+
+
+def _resample_bars(df: pd.DataFrame, rule: str) -> pd.DataFrame:
+    """
+    Aggregate bars to a coarser bar size.
+
+    OHLC columns use first/max/min/last, volume-like columns are summed and
+    every other column keeps its last value.
+
+    Args:
+        df (pd.DataFrame): Chronological bars with a 'Date' column.
+        rule (str): Pandas offset alias of the target bar size (e.g., '4h').
+
+    Returns:
+        pd.DataFrame: Resampled bars with a 'Date' column.
+    """
+    agg = {
+        col: _RESAMPLE_AGG.get(col, 'sum' if col.lower().startswith(('volume', 'tradecount')) else 'last')
+        for col in df.columns if col != 'Date'
+    }
+    return df.resample(rule, on='Date').agg(agg).dropna(subset=['Close']).reset_index()
+
+
+def stream_data(file_path: str, chunk_size: int = 100_000, resample: str | None = None,
+                newest_first: bool | None = None) -> Iterator[pd.DataFrame]:
+    """
+    Stream historical price data from a CSV file in chronological chunks.
+
+    Binance exports list the newest bar first. Such files are read backwards
+    from the end in fixed-size byte blocks, so chunks come out oldest first
+    without loading (or reversing a copy of) the whole file.
+
+    Args:
+        file_path (str): Path to the CSV file containing historical price data.
+        chunk_size (int): Number of raw rows parsed per chunk.
+        resample (str | None): Optional pandas offset alias (e.g., '1h') to
+                               aggregate bars to while reading. Bars spanning
+                               a chunk boundary are completed before they are
+                               yielded.
+        newest_first (bool | None): Whether the file lists the newest bar first.
+                                    Detected from the first two rows if None.
+
+    Yields:
+        pd.DataFrame: Chronological chunks in the same format as `load_data`.
+    """
+    with open(file_path, 'rb') as f:
+        f.readline()  # Source banner, skipped like in load_data
+        header = f.readline()
+        data_start = f.tell()
+
+        if newest_first is None:
+            first_rows = pd.read_csv(io.BytesIO(header + f.readline() + f.readline()))
+            dates = pd.to_datetime(first_rows['Date'], format='mixed')
+            newest_first = len(dates) == 2 and dates.iloc[0] > dates.iloc[1]
+
+        def clean(chunk: pd.DataFrame) -> pd.DataFrame:
+            # Same layout as load_data: parsed 'Date' as the first column
+            chunk['Date'] = pd.to_datetime(chunk['Date'], format='mixed')
+            return chunk[['Date'] + [col for col in chunk.columns if col != 'Date']]
+
+        def parse(lines: list[bytes]) -> pd.DataFrame:
+            return clean(pd.read_csv(io.BytesIO(header + b"\n".join(lines))))
+
+        def raw_chunks() -> Iterator[pd.DataFrame]:
+            if newest_first:
+                lines = []
+                for line in _reversed_lines(f, data_start):
+                    lines.append(line)
+                    if len(lines) == chunk_size:
+                        yield parse(lines)
+                        lines = []
+                if lines:
+                    yield parse(lines)
+            else:
+                f.seek(data_start)
+                for chunk in pd.read_csv(f, names=pd.read_csv(io.BytesIO(header)).columns,
+                                         chunksize=chunk_size):
+                    yield clean(chunk)
+
+        if resample is None:
+            yield from (chunk.reset_index(drop=True) for chunk in raw_chunks())
+            return
+
+        # Hold back the last (possibly incomplete) bar until the next chunk arrives
+        pending = None
+        for chunk in raw_chunks():
+            if pending is not None:
+                chunk = pd.concat([pending, chunk], ignore_index=True)
+            bins = chunk['Date'].dt.floor(resample)
+            is_last_bin = bins == bins.iloc[-1]
+            pending = chunk[is_last_bin]
+            complete = chunk[~is_last_bin]
+            if len(complete):
+                yield _resample_bars(complete, resample)
+        if pending is not None and len(pending):
+            yield _resample_bars(pending, resample)
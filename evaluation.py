@@ -0,0 +1,167 @@
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from split import split_bounds
+from indicators import add_indicators, get_signals
+from backtesting import backtest
+from metrics import performance_summary
+
+SPLIT_NAMES = ("Train", "Test", "Validation")
+
+
+@dataclass
+class SplitResult:
+    """
+    Backtest of one split.
+
+    Attributes:
+        name (str): Split name.
+        data (pd.DataFrame): Bars of the split with indicators and signals.
+        port_hist (np.ndarray): Portfolio value at each bar.
+        final_cash (float): Final portfolio value.
+        metrics (dict): `performance_summary` of the portfolio values.
+    """
+    name: str
+    data: pd.DataFrame
+    port_hist: np.ndarray
+    final_cash: float
+    metrics: dict
+
+    @property
+    def port_series(self) -> pd.Series:
+        """Portfolio values indexed by bar date."""
+        return pd.Series(self.port_hist, index=pd.to_datetime(self.data['Date']))
+
+
+@dataclass
+class Evaluation:
+    """
+    Backtests of one parameter set on every split.
+
+    Attributes:
+        params (dict): Strategy parameters that were evaluated.
+        splits (dict[str, SplitResult]): Results by split name, in time order.
+    """
+    params: dict
+    splits: dict[str, SplitResult]
+
+    def __getitem__(self, name: str) -> SplitResult:
+        return self.splits[name]
+
+    def summary(self) -> pd.DataFrame:
+        """
+        Tabulate the metrics of every split.
+
+        Returns:
+            pd.DataFrame: One row per split with its metrics and final cash.
+        """
+        return pd.DataFrame({
+            name: {**result.metrics, "Final Cash": result.final_cash}
+            for name, result in self.splits.items()
+        }).T
+
+    def to_dict(self) -> dict:
+        """
+        Convert the parameters and metrics to JSON-serializable types.
+
+        Returns:
+            dict: 'params' and, per split, 'final_cash' and 'metrics'.
+        """
+        return {
+            "params": self.params,
+            "splits": {
+                name: {"final_cash": float(result.final_cash),
+                       "metrics": {k: float(v) for k, v in result.metrics.items()}}
+                for name, result in self.splits.items()
+            }
+        }
+
+
+def _backtest_split(name: str, data: pd.DataFrame, params: dict, backend: str) -> SplitResult:
+    """Backtest one slice of signals and summarize it."""
+    port_hist, final_cash = backtest(
+        data,
+        SL=params["SL"],
+        TP=params["TP"],
+        n_shares=params["n_shares"],
+        backend=backend
+    )
+    port_hist = np.asarray(port_hist)
+    metrics = performance_summary(
+        pd.Series(port_hist, index=data.index), periods_per_year=8760)
+    return SplitResult(name, data, port_hist, final_cash, metrics)
+
+
+def evaluate_splits(
+    data: pd.DataFrame,
+    params: dict,
+    bounds: list[tuple[int, int]] | None = None,
+    names: tuple[str, ...] = SPLIT_NAMES,
+    executor: Executor | None = None,
+    backend: str = "auto"
+) -> Evaluation:
+    """
+    Backtest one parameter set on the train, test and validation splits.
+
+    Indicators and signals are computed once on the full series and then sliced
+    per split. Every indicator only looks back, so a split's signals match what
+    would have been known at the time, and only the first split loses bars to
+    the indicator warm-up; the later ones are warmed up by the bars before them.
+    Each split still starts from fresh capital. The backtests run concurrently
+    (the compiled engine releases the GIL).
+
+    Args:
+        data (pd.DataFrame): Full chronological price data, as from `load_data`.
+        params (dict): Strategy parameters as found by `optimize`.
+        bounds (list[tuple[int, int]] | None): (start, end) positions of each
+                                               split in `data`. Defaults to
+                                               `split.split_bounds`.
+        names (tuple[str, ...]): Name of each split.
+        executor (Executor | None): Runs the backtests. A thread pool with one
+                                    thread per split is used if None.
+        backend (str): Backtest backend (see `backtesting.backtest`).
+
+    Returns:
+        Evaluation: Results of every split.
+    """
+    if bounds is None:
+        bounds = split_bounds(len(data))
+    if len(bounds) != len(names):
+        raise ValueError("bounds and names must have the same length.")
+
+    signals = add_indicators(
+        data.reset_index(drop=True),
+        rsi_window=params["rsi_window"],
+        sma_window=params["sma_window"],
+        bb_window=params["bb_window"],
+        bb_dev=params["bb_dev"]
+    )
+    signals = get_signals(
+        signals,
+        rsi_buy=params["rsi_buy"],
+        rsi_sell=params["rsi_sell"],
+        sma_window=params["sma_window"],
+        bb_window=params["bb_window"],
+        bb_dev=params["bb_dev"]
+    )
+
+    # Rows kept after the warm-up still carry their position in `data`
+    positions = signals.index.to_numpy()
+    slices = [signals.iloc[np.searchsorted(positions, start):np.searchsorted(positions, end)]
+              for start, end in bounds]
+
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor(max_workers=len(bounds))
+    try:
+        futures = [executor.submit(_backtest_split, name, split, params, backend)
+                   for name, split in zip(names, slices)]
+        results = [future.result() for future in futures]
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+    return Evaluation(params, {result.name: result for result in results})
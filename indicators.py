@@ -1,13 +1,127 @@
+import hashlib
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator
+
 import ta
+import numpy as np
 import pandas as pd
 
+try:
+    from numba import njit, prange
+except ImportError:  # Numba is optional; panels fall back to pandas rolling windows
+    njit = None
+    prange = range
+
+from profiling import instrument
+
+
+class IndicatorCache:
+    """
+    Thread-safe LRU cache of indicator series shared across Optuna trials.
+
+    Entries are keyed by a fingerprint of the input 'Close' array plus the
+    indicator name and its parameters. Least recently used entries are evicted
+    once the cached arrays exceed `max_bytes`.
+
+    Attributes:
+        max_bytes (int): Memory cap for cached arrays, in bytes.
+        hits (int): Number of lookups served from the cache.
+        misses (int): Number of lookups that had to compute the indicator.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 ** 2):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple, np.ndarray] = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(close: pd.Series | np.ndarray) -> str:
+        """
+        Hash the raw bytes of a price array.
+
+        Args:
+            close (pd.Series | np.ndarray): Close prices.
+
+        Returns:
+            str: Hex digest identifying the array contents.
+        """
+        values = np.ascontiguousarray(np.asarray(close, dtype=np.float64))
+        return hashlib.blake2b(values.view(np.uint8), digest_size=16).hexdigest()
+
+    def get(self, key: tuple, compute: Callable[[], np.ndarray]) -> np.ndarray:
+        """
+        Return the cached array for `key`, computing and storing it on a miss.
+
+        Args:
+            key (tuple): (fingerprint, indicator name, *parameters).
+            compute (Callable[[], np.ndarray]): Builds the array on a miss.
+
+        Returns:
+            np.ndarray: Read-only indicator values.
+        """
+        with self._lock:
+            values = self._entries.get(key)
+            if values is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return values
+            self.misses += 1
+
+        values = np.asarray(compute(), dtype=np.float64)
+        values.flags.writeable = False
+
+        with self._lock:
+            if key not in self._entries and values.nbytes <= self.max_bytes:
+                self._entries[key] = values
+                self._nbytes += values.nbytes
+                while self._nbytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._nbytes -= evicted.nbytes
+        return values
 
+    def clear(self) -> None:
+        """Drop every entry and reset the hit/miss counters."""
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """
+        Summarize cache usage.
+
+        Returns:
+            dict: Hits, misses, hit rate, number of entries and bytes in use.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._entries),
+                "nbytes": self._nbytes,
+            }
+
+
+# Cache shared by every trial of a study (including threaded n_jobs=-1 runs)
+INDICATOR_CACHE = IndicatorCache()
+
+
+@instrument("add_indicators")
 def add_indicators(
     data: pd.DataFrame,
     rsi_window: int = 14,
     sma_window: int = 20,
     bb_window: int = 20,
-    bb_dev: float = 2.0
+    bb_dev: float = 2.0,
+    cache: IndicatorCache | None = None
 ) -> pd.DataFrame:
     """
     Computes and appends technical indicators to a financial time series DataFrame.
@@ -21,6 +135,8 @@ def add_indicators(
         sma_window (int): Lookback period for SMA calculation.
         bb_window (int): Lookback period for Bollinger Bands.
         bb_dev (float): Number of standard deviations for Bollinger Band width.
+        cache (IndicatorCache | None): If given, indicator series are looked up in
+                                       (and stored to) this cache.
 
     Returns:
         pd.DataFrame: Modified DataFrame with added columns:
@@ -29,6 +145,9 @@ def add_indicators(
             - 'BB_Upper': Upper Bollinger Band
             - 'BB_Lower': Lower Bollinger Band
     """
+    if cache is not None:
+        return _add_cached_indicators(
+            data, rsi_window, sma_window, bb_window, bb_dev, cache)
 
     rsi_indicator = ta.momentum.RSIIndicator(
         close=data.Close, window=rsi_window)
@@ -46,6 +165,62 @@ def add_indicators(
     return data
 
 
+def _rsi(close: pd.Series, window: int, cache: IndicatorCache | None = None,
+         key: str | None = None) -> np.ndarray:
+    """RSI values from `ta`, served from `cache` when given."""
+    def compute() -> np.ndarray:
+        return ta.momentum.RSIIndicator(close=close, window=window).rsi().to_numpy()
+    return compute() if cache is None else cache.get((key, "rsi", window), compute)
+
+
+def _rolling_mean(close: pd.Series, window: int, cache: IndicatorCache | None = None,
+                  key: str | None = None) -> np.ndarray:
+    """Rolling mean, served from `cache` when given."""
+    def compute() -> np.ndarray:
+        return close.rolling(window).mean().to_numpy()
+    return compute() if cache is None else cache.get((key, "sma", window), compute)
+
+
+def _rolling_std(close: pd.Series, window: int, ddof: int,
+                 cache: IndicatorCache | None = None, key: str | None = None) -> np.ndarray:
+    """Rolling std with the given ddof, served from `cache` when given."""
+    def compute() -> np.ndarray:
+        return close.rolling(window).std(ddof=ddof).to_numpy()
+    return compute() if cache is None else cache.get(
+        (key, "rolling_std", window, ddof), compute)
+
+
+def _add_cached_indicators(
+    data: pd.DataFrame,
+    rsi_window: int,
+    sma_window: int,
+    bb_window: int,
+    bb_dev: float,
+    cache: IndicatorCache
+) -> pd.DataFrame:
+    """
+    Same output as `add_indicators`, with series served from `cache`.
+
+    Bollinger Bands are cached as their rolling mean and rolling std (ddof=0, as
+    in `ta`) so that every `bb_dev` reuses the same entries, and the rolling mean
+    doubles as the SMA for an equal window.
+    """
+    close = data['Close']
+    key = cache.fingerprint(close)
+
+    bb_ma = _rolling_mean(close, bb_window, cache, key)
+    bb_std = _rolling_std(close, bb_window, 0, cache, key)
+
+    data['RSI'] = _rsi(close, rsi_window, cache, key)
+    data['SMA'] = _rolling_mean(close, sma_window, cache, key)
+    data['BB_Upper'] = bb_ma + bb_dev * bb_std
+    data['BB_Lower'] = bb_ma - bb_dev * bb_std
+
+    data = data.dropna()
+    return data
+
+
+@instrument("get_signals")
 def get_signals(
     data: pd.DataFrame,
     rsi_buy: int = 30,
@@ -101,3 +276,870 @@ def get_signals(
     ) >= 2
 
     return data
+
+
+def stream_signals(
+    chunks: Iterable[pd.DataFrame],
+    rsi_window: int = 14,
+    sma_window: int = 20,
+    bb_window: int = 20,
+    bb_dev: float = 2.0,
+    rsi_buy: int = 30,
+    rsi_sell: int = 70,
+    history: int = 1000
+) -> Iterator[pd.DataFrame]:
+    """
+    Add buy/sell signals to chronological chunks of price data.
+
+    The last `history` bars of each chunk are carried into the next one so the
+    rolling windows continue across boundaries. RSI uses Wilder smoothing, whose
+    memory decays as (1 - 1/window) per bar, so with the default history the
+    carried-over RSI matches the full-series value to machine precision.
+
+    Args:
+        chunks (Iterable[pd.DataFrame]): Chronological chunks with a 'Close' column.
+        rsi_window (int): Lookback period for RSI.
+        sma_window (int): Window size for Simple Moving Average.
+        bb_window (int): Window size for Bollinger Bands.
+        bb_dev (float): Number of standard deviations for Bollinger Bands.
+        rsi_buy (int): RSI threshold below which to trigger a buy signal.
+        rsi_sell (int): RSI threshold above which to trigger a sell signal.
+        history (int): Number of trailing bars carried between chunks.
+
+    Yields:
+        pd.DataFrame: Chunks with 'buy_signal' and 'sell_signal' columns. The
+                      warm-up rows `add_indicators` would drop are skipped.
+    """
+    if history < 2 * max(rsi_window, sma_window, bb_window):
+        raise ValueError("history must be at least twice the longest window.")
+
+    tail = None
+    for chunk in chunks:
+        frame = chunk if tail is None else pd.concat([tail, chunk], ignore_index=True)
+        start, buy, sell = fused_signals(
+            frame['Close'], rsi_window, sma_window, bb_window, bb_dev, rsi_buy, rsi_sell)
+
+        n_tail = 0 if tail is None else len(tail)
+        first_new = max(start, n_tail)
+        out = frame.iloc[first_new:].copy()
+        out['buy_signal'] = buy[first_new - start:]
+        out['sell_signal'] = sell[first_new - start:]
+        tail = frame.iloc[-history:]
+        if len(out):
+            yield out.reset_index(drop=True)
+
+
+@dataclass
+class IndicatorGrid:
+    """
+    Indicator values for every window of a bounded search space.
+
+    Each 2-D array has one row per window (in the order of the matching
+    `*_windows` array) and one column per bar of `close`.
+
+    Attributes:
+        close (np.ndarray): Close prices the grid was computed on.
+        rsi_windows (np.ndarray): RSI windows, one per row of `rsi`.
+        rsi (np.ndarray): RSI values.
+        mean_windows (np.ndarray): Rolling-mean windows, one per row of `mean`.
+        mean (np.ndarray): Rolling means (shared by SMA and Bollinger Bands).
+        std_windows (np.ndarray): Rolling-std windows, one per row of `std`.
+        std (np.ndarray): Rolling sample std (ddof=1), as used by `get_signals`.
+    """
+    close: np.ndarray
+    rsi_windows: np.ndarray
+    rsi: np.ndarray
+    mean_windows: np.ndarray
+    mean: np.ndarray
+    std_windows: np.ndarray
+    std: np.ndarray
+
+    def row(self, windows: np.ndarray, window: int) -> int:
+        """Row of `windows` holding `window`."""
+        idx = int(np.searchsorted(windows, window))
+        if idx == len(windows) or windows[idx] != window:
+            raise KeyError(f"Window {window} is not in the precomputed grid.")
+        return idx
+
+
+def _rolling_std_cumsum(values: np.ndarray, window: int, out: np.ndarray,
+                        block: int = 1 << 12) -> None:
+    """
+    Rolling sample std (ddof=1) from cumulative sums, written to `out[window - 1:]`.
+
+    The sums run over blocks of `block` bars (plus the `window - 1` bars before
+    each), demeaned per block, so they stay small enough that subtracting them
+    keeps full precision however long the series. Temporaries are O(block).
+    """
+    n = len(values)
+    for lo in range(window - 1, n, block):
+        hi = min(lo + block, n)
+        seg = values[lo - window + 1:hi]
+        seg = seg - seg.mean()
+        csum = np.concatenate(([0.0], np.cumsum(seg)))
+        csum_sq = np.concatenate(([0.0], np.cumsum(seg * seg)))
+        s1 = csum[window:] - csum[:-window]
+        s2 = csum_sq[window:] - csum_sq[:-window]
+        var = (s2 - s1 * s1 / window) / (window - 1)
+        np.sqrt(np.maximum(var, 0.0), out=out[lo:hi])
+
+
+@instrument("precompute_indicators")
+def precompute_indicators(
+    close: pd.Series | np.ndarray,
+    rsi_windows: range = range(7, 22),
+    sma_windows: range = range(10, 31),
+    bb_windows: range = range(10, 26)
+) -> IndicatorGrid:
+    """
+    Compute RSI, rolling means and rolling stds for every window up front.
+
+    Rolling means and stds come from cumulative sums over the (demeaned)
+    prices, so the whole grid takes a handful of array passes and no
+    bars x window temporaries. The default windows match the search space in
+    `optimize.optimize`.
+
+    Args:
+        close (pd.Series | np.ndarray): Close prices.
+        rsi_windows (range): RSI lookback periods.
+        sma_windows (range): SMA lookback periods.
+        bb_windows (range): Bollinger Band lookback periods.
+
+    Returns:
+        IndicatorGrid: Precomputed indicator arrays.
+    """
+    close_series = pd.Series(np.asarray(close, dtype=np.float64))
+    values = close_series.to_numpy()
+    n = len(values)
+
+    rsi_w = np.array(sorted(set(rsi_windows)))
+    mean_w = np.array(sorted(set(sma_windows) | set(bb_windows)))
+    std_w = np.array(sorted(set(bb_windows)))
+
+    rsi = np.vstack([
+        ta.momentum.RSIIndicator(close=close_series, window=w).rsi().to_numpy()
+        for w in rsi_w
+    ]) if len(rsi_w) else np.empty((0, n))
+
+    # Rolling means: demeaning keeps the cumulative sum well conditioned
+    offset = values.mean() if n else 0.0
+    csum = np.concatenate(([0.0], np.cumsum(values - offset)))
+    mean = np.full((len(mean_w), n), np.nan)
+    for k, w in enumerate(mean_w):
+        if w <= n:
+            mean[k, w - 1:] = (csum[w:] - csum[:-w]) / w + offset
+
+    # Rolling sample std from cumulative sums and sums of squares
+    std = np.full((len(std_w), n), np.nan)
+    for k, w in enumerate(std_w):
+        if w <= n:
+            _rolling_std_cumsum(values, w, out=std[k])
+
+    return IndicatorGrid(close=values, rsi_windows=rsi_w, rsi=rsi,
+                         mean_windows=mean_w, mean=mean, std_windows=std_w, std=std)
+
+
+def _mask_warmup(vote: np.ndarray, mask: int | np.ndarray) -> None:
+    """Switch off the votes of the first `mask` bars (of each column when `mask` is an array)."""
+    if np.ndim(mask):
+        vote &= np.arange(vote.shape[0])[:, None] >= mask
+    else:
+        vote[:mask] = False
+
+
+def _vote_signals(
+    close: np.ndarray,
+    rsi: np.ndarray,
+    sma: np.ndarray,
+    bb_ma: np.ndarray,
+    bb_std: np.ndarray,
+    sma_mask: int | np.ndarray,
+    bb_mask: int | np.ndarray,
+    bb_dev: float,
+    rsi_buy: int,
+    rsi_sell: int,
+    return_votes: bool = True
+) -> tuple[np.ndarray, np.ndarray, dict[str, np.ndarray] | None]:
+    """
+    Combine RSI, SMA and Bollinger votes on bars already past the warm-up cut.
+
+    `get_signals` recomputes the SMA and Bollinger Bands after `add_indicators`
+    has dropped the warm-up rows, so their votes stay off for the first
+    `window - 1` kept bars; the first `sma_mask` / `bb_mask` bars given here are
+    masked the same way.
+
+    Without `return_votes`, the votes are counted in place through two scratch
+    buffers instead of being kept as six separate arrays.
+
+    The arrays may also be 2-D panels with one column per symbol, in which
+    case the masks are per-column arrays of bar counts.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, dict[str, np.ndarray] | None]:
+            - Buy signals.
+            - Sell signals.
+            - Per-indicator votes, keyed like the `get_signals` columns (None
+              unless `return_votes`).
+    """
+    if not return_votes:
+        vote = np.empty(close.shape, dtype=bool)
+        band = np.empty(close.shape)
+        half_width = np.multiply(bb_std, bb_dev)
+        buy_n = np.less(rsi, rsi_buy).view(np.int8)
+        sell_n = np.greater(rsi, rsi_sell).view(np.int8)
+        for counts, compare, level, mask in (
+                (buy_n, np.greater, sma, sma_mask),
+                (sell_n, np.less, sma, sma_mask),
+                (buy_n, np.less, np.subtract(bb_ma, half_width, out=band), bb_mask)):
+            compare(close, level, out=vote)
+            _mask_warmup(vote, mask)
+            counts += vote
+        np.add(bb_ma, half_width, out=band)
+        np.greater(close, band, out=vote)
+        _mask_warmup(vote, bb_mask)
+        sell_n += vote
+        return buy_n >= 2, sell_n >= 2, None
+
+    votes = {
+        'buy_signal_rsi': rsi < rsi_buy,
+        'sell_signal_rsi': rsi > rsi_sell,
+        'buy_signal_sma': close > sma,
+        'sell_signal_sma': close < sma,
+        'buy_signal_bb': close < bb_ma - bb_dev * bb_std,
+        'sell_signal_bb': close > bb_ma + bb_dev * bb_std,
+    }
+    for name, mask in (('sma', sma_mask), ('bb', bb_mask)):
+        _mask_warmup(votes[f'buy_signal_{name}'], mask)
+        _mask_warmup(votes[f'sell_signal_{name}'], mask)
+
+    # Final signals: require at least 2 of 3 indicators to agree
+    buy = (votes['buy_signal_rsi'].view(np.int8) +
+           votes['buy_signal_sma'].view(np.int8) +
+           votes['buy_signal_bb'].view(np.int8)) >= 2
+    sell = (votes['sell_signal_rsi'].view(np.int8) +
+            votes['sell_signal_sma'].view(np.int8) +
+            votes['sell_signal_bb'].view(np.int8)) >= 2
+    return buy, sell, votes
+
+
+def _signal_range(n_bars: int, start: int, bars: tuple[int, int] | None) -> tuple[int, int]:
+    """Bars to build signals for: `bars` clipped to [start, n_bars), everything from `start` if None."""
+    if bars is None:
+        return start, n_bars
+    lo = min(max(bars[0], start), n_bars)
+    return lo, min(max(bars[1], lo), n_bars)
+
+
+@instrument("fused_signals")
+def fused_signals(
+    close: pd.Series | np.ndarray,
+    rsi_window: int = 14,
+    sma_window: int = 20,
+    bb_window: int = 20,
+    bb_dev: float = 2.0,
+    rsi_buy: int = 30,
+    rsi_sell: int = 70,
+    return_votes: bool = False,
+    cache: IndicatorCache | None = None,
+    bars: tuple[int, int] | None = None
+) -> tuple[int, np.ndarray, np.ndarray] | tuple[int, np.ndarray, np.ndarray, dict[str, np.ndarray]]:
+    """
+    Single-pass replacement for `get_signals(add_indicators(...))`.
+
+    Each rolling series is computed once on the raw prices (the Bollinger mean is
+    reused as the SMA when the windows match), no DataFrame is copied, and only
+    boolean signal arrays are returned.
+
+    Args:
+        close (pd.Series | np.ndarray): Close prices.
+        rsi_window (int): Lookback period for RSI.
+        sma_window (int): Window size for Simple Moving Average.
+        bb_window (int): Window size for Bollinger Bands.
+        bb_dev (float): Number of standard deviations for Bollinger Bands.
+        rsi_buy (int): RSI threshold below which to trigger a buy signal.
+        rsi_sell (int): RSI threshold above which to trigger a sell signal.
+        return_votes (bool): Also return the per-indicator votes.
+        cache (IndicatorCache | None): Optional cache for the indicator series.
+        bars (tuple[int, int] | None): (start, end) positions of the bars to
+                                       vote on, e.g. one fold or walk-forward
+                                       window. Bars before the warm-up cut are
+                                       skipped. Defaults to every bar after it.
+
+    Returns:
+        tuple: (start, buy, sell) or (start, buy, sell, votes), where `start` is
+               the position of the first bar covered (without `bars`, the first
+               bar `add_indicators` would keep) and the arrays cover the bars
+               from `start` on.
+    """
+    close = pd.Series(np.asarray(close, dtype=np.float64))
+    key = cache.fingerprint(close) if cache is not None else None
+    start = max(rsi_window, sma_window, bb_window) - 1
+
+    bb_ma = _rolling_mean(close, bb_window, cache, key)
+    sma = bb_ma if sma_window == bb_window else _rolling_mean(close, sma_window, cache, key)
+    bb_std = _rolling_std(close, bb_window, 1, cache, key)
+    rsi = _rsi(close, rsi_window, cache, key)
+
+    lo, hi = _signal_range(len(close), start, bars)
+    buy, sell, votes = _vote_signals(
+        close.to_numpy()[lo:hi], rsi[lo:hi], sma[lo:hi], bb_ma[lo:hi], bb_std[lo:hi],
+        max(start + sma_window - 1 - lo, 0), max(start + bb_window - 1 - lo, 0),
+        bb_dev, rsi_buy, rsi_sell, return_votes)
+    if return_votes:
+        return lo, buy, sell, votes
+    return lo, buy, sell
+
+
+@instrument("grid_signals")
+def grid_signals(
+    grid: IndicatorGrid,
+    rsi_window: int = 14,
+    sma_window: int = 20,
+    bb_window: int = 20,
+    bb_dev: float = 2.0,
+    rsi_buy: int = 30,
+    rsi_sell: int = 70,
+    bars: tuple[int, int] | None = None
+) -> tuple[int, np.ndarray, np.ndarray]:
+    """
+    Build buy/sell signals from a precomputed grid.
+
+    Reproduces `get_signals(add_indicators(...))` with the same parameters:
+    rows before the indicator warm-up are dropped, and the SMA and Bollinger
+    votes stay off until their windows fill again after that cut.
+
+    Args:
+        grid (IndicatorGrid): Precomputed indicators.
+        rsi_window (int): Lookback period for RSI.
+        sma_window (int): Window size for Simple Moving Average.
+        bb_window (int): Window size for Bollinger Bands.
+        bb_dev (float): Number of standard deviations for Bollinger Bands.
+        rsi_buy (int): RSI threshold below which to trigger a buy signal.
+        rsi_sell (int): RSI threshold above which to trigger a sell signal.
+        bars (tuple[int, int] | None): (start, end) positions of the bars to
+                                       vote on. Bars before the warm-up cut are
+                                       skipped. Defaults to every bar after it.
+
+    Returns:
+        tuple[int, np.ndarray, np.ndarray]:
+            - Position of the first bar covered (without `bars`, the first row
+              `add_indicators` would keep).
+            - Buy signals from that bar on.
+            - Sell signals from that bar on.
+    """
+    start = max(rsi_window, sma_window, bb_window) - 1
+    lo, hi = _signal_range(len(grid.close), start, bars)
+
+    # Row slices are views into the grid; only the signals are allocated
+    close = grid.close[lo:hi]
+    rsi = grid.rsi[grid.row(grid.rsi_windows, rsi_window), lo:hi]
+    sma = grid.mean[grid.row(grid.mean_windows, sma_window), lo:hi]
+    bb_ma = grid.mean[grid.row(grid.mean_windows, bb_window), lo:hi]
+    bb_std = grid.std[grid.row(grid.std_windows, bb_window), lo:hi]
+
+    buy, sell, _ = _vote_signals(
+        close, rsi, sma, bb_ma, bb_std,
+        max(start + sma_window - 1 - lo, 0), max(start + bb_window - 1 - lo, 0),
+        bb_dev, rsi_buy, rsi_sell, return_votes=False)
+    return lo, buy, sell
+
+
+def first_bars(close: np.ndarray) -> np.ndarray:
+    """
+    Row of each column's first price in a bars x symbols panel.
+
+    Args:
+        close (np.ndarray): Close prices, NaN before each symbol's first bar.
+
+    Returns:
+        np.ndarray: First non-NaN row per column (the number of rows for
+                    columns without any price).
+    """
+    first = np.zeros(close.shape[1], dtype=np.int64)
+    if not len(close):
+        return first
+
+    # Only symbols missing from the first row need a scan
+    late = np.flatnonzero(np.isnan(close[0]))
+    if len(late):
+        listed = ~np.isnan(close[:, late])
+        first[late] = np.where(listed.any(axis=0), listed.argmax(axis=0), close.shape[0])
+    return first
+
+
+def _panel_rsi(values: np.ndarray, window: int, first: np.ndarray) -> np.ndarray:
+    """
+    RSI of every column, as `ta` computes it on each symbol's own bars.
+
+    `ta` counts the undefined first difference as a zero move; rows before a
+    symbol's first bar stay NaN so that its averages start on that bar.
+    """
+    diff = np.full(values.shape, np.nan)
+    np.subtract(values[1:], values[:-1], out=diff[1:])
+    up = np.where(diff > 0, diff, 0.0)
+    down = np.where(diff < 0, -diff, 0.0)
+    unlisted = np.arange(len(values))[:, None] < first
+    up[unlisted] = np.nan
+    down[unlisted] = np.nan
+
+    ewm = dict(alpha=1 / window, min_periods=window, adjust=False)
+    emaup = pd.DataFrame(up).ewm(**ewm).mean().to_numpy()
+    emadn = pd.DataFrame(down).ewm(**ewm).mean().to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(emadn == 0, 100, 100 - 100 / (1 + emaup / emadn))
+
+
+def _panel_signals_kernel(close: np.ndarray, first: np.ndarray, rsi_window: int,
+                          sma_window: int, bb_window: int, bb_dev: float,
+                          rsi_buy: float, rsi_sell: float,
+                          buy: np.ndarray, sell: np.ndarray) -> None:
+    """
+    Single sweep over the bars computing the indicators and votes of `panel_signals`.
+
+    Symbols are processed in blocks whose running state stays in cache while
+    each row of the panel is read contiguously; blocks are independent and
+    spread over threads with `prange`. The rolling sums, Welford variance and
+    Wilder averages follow the update rules of pandas' rolling and ewm, so each
+    indicator equals what `fused_signals` computes on the symbol's own bars.
+    `buy` and `sell` must be all False.
+    """
+    n_bars, n_syms = close.shape
+    windows = np.array([sma_window, bb_window])
+    longest = max(rsi_window, sma_window, bb_window)
+    alpha = 1.0 / rsi_window
+    decay = 1.0 - alpha
+    norm = decay + alpha
+    block = 64
+    for b in prange((n_syms + block - 1) // block):
+        lo = b * block
+        n = min(block, n_syms - lo)
+
+        # Rolling means of the SMA and Bollinger windows (compensated sums)
+        m_nobs = np.zeros((2, n), dtype=np.int64)
+        m_same = np.zeros((2, n), dtype=np.int64)
+        m_sum = np.zeros((2, n))
+        m_comp = np.zeros((2, n))
+        m_prev = np.full((2, n), np.nan)
+        means = np.empty(2)
+
+        # Rolling variance of the Bollinger window (compensated Welford)
+        v_nobs = np.zeros(n, dtype=np.int64)
+        v_same = np.zeros(n, dtype=np.int64)
+        v_mean = np.zeros(n)
+        v_ssq = np.zeros(n)
+        v_comp = np.zeros(n)
+        v_prev = np.full(n, np.nan)
+
+        # Wilder averages of up and down moves; the first move counts as zero
+        up_avg = np.zeros(n)
+        dn_avg = np.zeros(n)
+
+        for i in range(n_bars):
+            for j in range(n):
+                s = lo + j
+                f = first[s]
+                if i < f:
+                    continue
+                price = close[i, s]
+
+                for k in range(2):
+                    w = windows[k]
+                    if i - w >= f:
+                        old = close[i - w, s]
+                        if old == old:
+                            m_nobs[k, j] -= 1
+                            y = -old - m_comp[k, j]
+                            t = m_sum[k, j] + y
+                            m_comp[k, j] = t - m_sum[k, j] - y
+                            m_sum[k, j] = t
+                    if price == price:
+                        m_nobs[k, j] += 1
+                        y = price - m_comp[k, j]
+                        t = m_sum[k, j] + y
+                        m_comp[k, j] = t - m_sum[k, j] - y
+                        m_sum[k, j] = t
+                        m_same[k, j] = m_same[k, j] + 1 if price == m_prev[k, j] else 1
+                        m_prev[k, j] = price
+
+                if i - bb_window >= f:
+                    old = close[i - bb_window, s]
+                    if old == old:
+                        v_nobs[j] -= 1
+                        if v_nobs[j]:
+                            prev_mean = v_mean[j] - v_comp[j]
+                            y = old - v_comp[j]
+                            t = y - v_mean[j]
+                            v_comp[j] = t + v_mean[j] - y
+                            v_mean[j] -= t / v_nobs[j]
+                            v_ssq[j] -= (old - prev_mean) * (old - v_mean[j])
+                        else:
+                            v_mean[j] = 0.0
+                            v_ssq[j] = 0.0
+                if price == price:
+                    v_nobs[j] += 1
+                    v_same[j] = v_same[j] + 1 if price == v_prev[j] else 1
+                    v_prev[j] = price
+                    prev_mean = v_mean[j] - v_comp[j]
+                    y = price - v_comp[j]
+                    t = y - v_mean[j]
+                    v_comp[j] = t + v_mean[j] - y
+                    v_mean[j] += t / v_nobs[j]
+                    v_ssq[j] += (price - prev_mean) * (price - v_mean[j])
+
+                if i > f:
+                    move = price - close[i - 1, s]
+                    up = move if move > 0 else 0.0
+                    dn = -move if move < 0 else 0.0
+                    if up_avg[j] != up:
+                        avg = decay * up_avg[j] + alpha * up
+                        up_avg[j] = avg if norm == 1.0 else avg / norm
+                    if dn_avg[j] != dn:
+                        avg = decay * dn_avg[j] + alpha * dn
+                        dn_avg[j] = avg if norm == 1.0 else avg / norm
+
+                start = f + longest - 1
+                if i < start:
+                    continue
+
+                if dn_avg[j] == 0:
+                    rsi = 100.0
+                else:
+                    rsi = 100.0 - 100.0 / (1.0 + up_avg[j] / dn_avg[j])
+                buy_n = 1 if rsi < rsi_buy else 0
+                sell_n = 1 if rsi > rsi_sell else 0
+                for k in range(2):
+                    if m_nobs[k, j] < windows[k]:
+                        means[k] = np.nan
+                    elif m_same[k, j] >= m_nobs[k, j]:
+                        means[k] = m_prev[k, j]
+                    else:
+                        means[k] = m_sum[k, j] / m_nobs[k, j]
+                if i >= start + sma_window - 1:
+                    buy_n += 1 if price > means[0] else 0
+                    sell_n += 1 if price < means[0] else 0
+                if i >= start + bb_window - 1 and v_nobs[j] >= bb_window:
+                    var = 0.0
+                    if v_nobs[j] > 1 and v_same[j] < v_nobs[j]:
+                        var = max(v_ssq[j] / (v_nobs[j] - 1), 0.0)
+                    half_width = np.sqrt(var) * bb_dev
+                    buy_n += 1 if price < means[1] - half_width else 0
+                    sell_n += 1 if price > means[1] + half_width else 0
+                buy[i, s] = buy_n >= 2
+                sell[i, s] = sell_n >= 2
+
+
+_panel_signals_jit = njit(parallel=True, cache=True)(
+    _panel_signals_kernel) if njit is not None else None
+
+
+@instrument("panel_signals")
+def panel_signals(
+    close: np.ndarray,
+    rsi_window: int = 14,
+    sma_window: int = 20,
+    bb_window: int = 20,
+    bb_dev: float = 2.0,
+    rsi_buy: int = 30,
+    rsi_sell: int = 70
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Build buy/sell signals for every symbol of a price panel at once.
+
+    With Numba, one compiled sweep over the bars updates every symbol's
+    indicators in place, with blocks of symbols running in parallel. Without it, each rolling series is
+    computed column-wise over the whole bars x symbols array and the votes are
+    combined on the full panel. Either way there is no Python loop over
+    symbols, and every column matches `fused_signals` on that symbol's own
+    bars, warm-up included: a symbol listed later than the others starts its
+    warm-up at its own first bar.
+
+    Args:
+        close (np.ndarray): Bars x symbols close prices, NaN before each
+                            symbol's first bar (see `data.Universe`).
+        rsi_window (int): Lookback period for RSI.
+        sma_window (int): Window size for Simple Moving Average.
+        bb_window (int): Window size for Bollinger Bands.
+        bb_dev (float): Number of standard deviations for Bollinger Bands.
+        rsi_buy (int): RSI threshold below which to trigger a buy signal.
+        rsi_sell (int): RSI threshold above which to trigger a sell signal.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Bars x symbols buy and sell signals,
+                                       False until each symbol's warm-up ends.
+    """
+    values = np.asarray(close, dtype=np.float64)
+    if values.ndim != 2:
+        raise ValueError("close must be a 2-D bars x symbols array.")
+    first = first_bars(values)
+
+    if _panel_signals_jit is not None:
+        values = np.ascontiguousarray(values)
+        buy = np.zeros(values.shape, dtype=bool)
+        sell = np.zeros(values.shape, dtype=bool)
+        _panel_signals_jit(values, first, rsi_window, sma_window, bb_window,
+                           float(bb_dev), float(rsi_buy), float(rsi_sell), buy, sell)
+        return buy, sell
+
+    prices = pd.DataFrame(values, copy=False)
+    start = first + max(rsi_window, sma_window, bb_window) - 1
+
+    bb_ma = prices.rolling(bb_window).mean().to_numpy()
+    sma = bb_ma if sma_window == bb_window else prices.rolling(sma_window).mean().to_numpy()
+    bb_std = prices.rolling(bb_window).std(ddof=1).to_numpy()
+    rsi = _panel_rsi(values, rsi_window, first)
+
+    buy, sell, _ = _vote_signals(
+        values, rsi, sma, bb_ma, bb_std,
+        start + sma_window - 1, start + bb_window - 1,
+        bb_dev, rsi_buy, rsi_sell, return_votes=False)
+
+    # Rows `add_indicators` would drop for each symbol
+    _mask_warmup(buy, start)
+    _mask_warmup(sell, start)
+    return buy, sell
+
+
+# --- Incremental indicators ---
+
+
+class RollingMean:
+    """
+    Simple moving average updated in O(1) per price.
+
+    Keeps the window in a ring buffer with a running sum. The sum is rebuilt
+    from the buffer once per window length so rounding errors cannot pile up.
+
+    Attributes:
+        window (int): Lookback period.
+        value (float | None): Current average, None until the window is full.
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self.value = None
+        self._buffer = deque(maxlen=window)
+        self._sum = 0.0
+        self._since_rebuild = 0
+
+    def update(self, price: float) -> float | None:
+        """Add a price and return the current average."""
+        if len(self._buffer) == self.window:
+            self._sum -= self._buffer[0]
+        self._buffer.append(price)
+        self._sum += price
+
+        self._since_rebuild += 1
+        if self._since_rebuild >= self.window:
+            self._sum = sum(self._buffer)
+            self._since_rebuild = 0
+
+        if len(self._buffer) == self.window:
+            self.value = self._sum / self.window
+        return self.value
+
+
+class RollingStd:
+    """
+    Rolling standard deviation updated in O(1) per price.
+
+    Uses Welford's algorithm while the window fills and its sliding-window form
+    afterwards (replace the oldest value by the newest), which stays accurate
+    for large prices with small variations. Mean and sum of squares are rebuilt
+    from the buffer once per window length to stop drift on long streams.
+
+    Attributes:
+        window (int): Lookback period.
+        ddof (int): Delta degrees of freedom (1 for pandas' default, 0 for `ta`).
+        mean (float | None): Rolling mean, None until the window is full.
+        value (float | None): Rolling std, None until the window is full.
+    """
+
+    def __init__(self, window: int, ddof: int = 1):
+        self.window = window
+        self.ddof = ddof
+        self.mean = None
+        self.value = None
+        self._buffer = deque(maxlen=window)
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._since_rebuild = 0
+
+    def update(self, price: float) -> float | None:
+        """Add a price and return the current standard deviation."""
+        if len(self._buffer) < self.window:
+            self._buffer.append(price)
+            delta = price - self._mean
+            self._mean += delta / len(self._buffer)
+            self._m2 += delta * (price - self._mean)
+        else:
+            old = self._buffer[0]
+            self._buffer.append(price)
+            old_mean = self._mean
+            self._mean += (price - old) / self.window
+            self._m2 += (price - old) * (price - self._mean + old - old_mean)
+
+            self._since_rebuild += 1
+            if self._since_rebuild >= self.window:
+                self._mean = sum(self._buffer) / self.window
+                self._m2 = sum((x - self._mean) ** 2 for x in self._buffer)
+                self._since_rebuild = 0
+
+        if len(self._buffer) == self.window:
+            self.mean = self._mean
+            self.value = np.sqrt(max(self._m2, 0.0) / (self.window - self.ddof))
+        return self.value
+
+
+class RollingRSI:
+    """
+    Relative Strength Index with Wilder smoothing, updated in O(1) per price.
+
+    Reproduces `ta.momentum.RSIIndicator`: gains and losses are smoothed with an
+    exponential average (alpha = 1 / window, no bias adjustment) seeded by a
+    zero first change, and values are reported once `window` prices were seen.
+
+    Attributes:
+        window (int): Lookback period.
+        value (float | None): Current RSI, None during the warm-up.
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self.value = None
+        self._alpha = 1 / window
+        self._prev = None
+        self._avg_up = 0.0
+        self._avg_down = 0.0
+        self._count = 0
+
+    def update(self, price: float) -> float | None:
+        """Add a price and return the current RSI."""
+        if self._prev is not None:
+            change = price - self._prev
+            self._avg_up += self._alpha * (max(change, 0.0) - self._avg_up)
+            self._avg_down += self._alpha * (max(-change, 0.0) - self._avg_down)
+        self._prev = price
+        self._count += 1
+
+        if self._count >= self.window:
+            if self._avg_down == 0:
+                self.value = 100.0
+            else:
+                self.value = 100 - 100 / (1 + self._avg_up / self._avg_down)
+        return self.value
+
+
+class RollingBollinger:
+    """
+    Bollinger Bands updated in O(1) per price.
+
+    Matches `ta.volatility.BollingerBands`, which uses the population standard
+    deviation (ddof=0).
+
+    Attributes:
+        window (int): Lookback period.
+        dev (float): Number of standard deviations for the band width.
+        mavg (float | None): Middle band, None until the window is full.
+        upper (float | None): Upper band, None until the window is full.
+        lower (float | None): Lower band, None until the window is full.
+    """
+
+    def __init__(self, window: int, dev: float = 2.0, ddof: int = 0):
+        self.window = window
+        self.dev = dev
+        self.mavg = None
+        self.upper = None
+        self.lower = None
+        self._std = RollingStd(window, ddof=ddof)
+
+    def update(self, price: float) -> tuple[float, float] | None:
+        """Add a price and return the (upper, lower) bands."""
+        std = self._std.update(price)
+        if std is None:
+            return None
+        self.mavg = self._std.mean
+        self.upper = self.mavg + self.dev * std
+        self.lower = self.mavg - self.dev * std
+        return self.upper, self.lower
+
+
+class IndicatorState:
+    """
+    Incremental counterpart of `add_indicators`.
+
+    Produces the 'RSI', 'SMA', 'BB_Upper' and 'BB_Lower' values of one new bar
+    in constant time, so indicators can be extended as bars arrive instead of
+    being recomputed over the whole history.
+    """
+
+    def __init__(self, rsi_window: int = 14, sma_window: int = 20,
+                 bb_window: int = 20, bb_dev: float = 2.0):
+        self.rsi = RollingRSI(rsi_window)
+        self.sma = RollingMean(sma_window)
+        self.bb = RollingBollinger(bb_window, bb_dev)
+
+    @classmethod
+    def from_history(cls, close: pd.Series | np.ndarray, rsi_window: int = 14,
+                     sma_window: int = 20, bb_window: int = 20,
+                     bb_dev: float = 2.0) -> "IndicatorState":
+        """
+        Build a state by replaying the full price history once.
+
+        Args:
+            close (pd.Series | np.ndarray): Every close price seen so far, in order.
+            rsi_window (int): Lookback period for RSI calculation.
+            sma_window (int): Lookback period for SMA calculation.
+            bb_window (int): Lookback period for Bollinger Bands.
+            bb_dev (float): Number of standard deviations for Bollinger Band width.
+
+        Returns:
+            IndicatorState: State positioned after the last price.
+        """
+        state = cls(rsi_window, sma_window, bb_window, bb_dev)
+        for price in np.asarray(close, dtype=np.float64):
+            state.update(price)
+        return state
+
+    def update(self, price: float) -> dict:
+        """
+        Add a price and return its indicator values (NaN during warm-up).
+
+        Args:
+            price (float): New close price.
+
+        Returns:
+            dict: 'RSI', 'SMA', 'BB_Upper' and 'BB_Lower' for this bar.
+        """
+        rsi = self.rsi.update(price)
+        sma = self.sma.update(price)
+        bands = self.bb.update(price)
+        return {
+            'RSI': np.nan if rsi is None else rsi,
+            'SMA': np.nan if sma is None else sma,
+            'BB_Upper': np.nan if bands is None else bands[0],
+            'BB_Lower': np.nan if bands is None else bands[1],
+        }
+
+
+def append_bars(data: pd.DataFrame, new_bars: pd.DataFrame, state: IndicatorState) -> pd.DataFrame:
+    """
+    Append new bars to a DataFrame that already has indicator columns.
+
+    Only the new bars go through `state`, so the cost is O(1) per bar however
+    long the history is. Bars still in the indicator warm-up are dropped, like
+    in `add_indicators`.
+
+    Args:
+        data (pd.DataFrame): Output of `add_indicators` (or of a previous call).
+        new_bars (pd.DataFrame): New rows with a 'Close' column, in order.
+        state (IndicatorState): State positioned after the last bar of `data`
+                                (see `IndicatorState.from_history`).
+
+    Returns:
+        pd.DataFrame: `data` followed by the new bars with their indicators.
+    """
+    rows = [state.update(price) for price in new_bars['Close'].to_numpy(dtype=np.float64)]
+    new_bars = new_bars.copy()
+    for column in ('RSI', 'SMA', 'BB_Upper', 'BB_Lower'):
+        new_bars[column] = [row[column] for row in rows]
+    return pd.concat([data, new_bars.dropna()])
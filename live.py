@@ -0,0 +1,228 @@
+import asyncio
+from typing import AsyncIterator, Callable
+
+from backtesting import COM, INITIAL_CASH, PositionBook
+from indicators import RollingMean, RollingStd, RollingRSI
+
+
+class StrategyEngine:
+    """
+    Bar-by-bar state machine of the RSI/SMA/Bollinger strategy.
+
+    Holds the cash, the open positions and incremental indicators, and applies
+    the same rules as `backtesting.backtest` to each new close price. Open
+    positions live in one `PositionBook` per side, so the portfolio value comes
+    from running totals and each bar costs O(1) plus the positions it closes.
+
+    Attributes:
+        cash (float): Available cash.
+        port_value (float): Portfolio value after the last bar.
+        last_buy (bool): Buy signal of the last bar.
+        last_sell (bool): Sell signal of the last bar.
+        longs (PositionBook): Open long positions.
+        shorts (PositionBook): Open short positions.
+    """
+
+    def __init__(
+        self,
+        rsi_window: int = 14,
+        sma_window: int = 20,
+        bb_window: int = 20,
+        bb_dev: float = 2.0,
+        rsi_buy: int = 30,
+        rsi_sell: int = 70,
+        SL: float = 0.1,
+        TP: float = 0.1,
+        n_shares: float = 1.0,
+        cash: float = INITIAL_CASH
+    ):
+        self.rsi_buy = rsi_buy
+        self.rsi_sell = rsi_sell
+        self.bb_dev = bb_dev
+        self.SL = SL
+        self.TP = TP
+        self.n_shares = n_shares
+
+        self._rsi = RollingRSI(rsi_window)
+        self._sma = RollingMean(sma_window)
+        self._bb = RollingStd(bb_window, ddof=1)
+        # Bars `add_indicators` drops before `get_signals` sees the series
+        self._warmup = max(rsi_window, sma_window, bb_window) - 1
+        self._bars = 0
+
+        self.cash = float(cash)
+        self.port_value = float(cash)
+        self.last_buy = False
+        self.last_sell = False
+
+        self.longs = PositionBook()
+        self.shorts = PositionBook()
+
+    @classmethod
+    def from_params(cls, params: dict, cash: float = INITIAL_CASH) -> "StrategyEngine":
+        """
+        Build an engine from a parameter dict such as `study.best_params`.
+
+        Args:
+            params (dict): Keys as suggested in `optimize.optimize`.
+            cash (float): Starting capital.
+
+        Returns:
+            StrategyEngine: Engine with those parameters.
+        """
+        return cls(
+            rsi_window=params["rsi_window"],
+            sma_window=params["sma_window"],
+            bb_window=params["bb_window"],
+            bb_dev=params["bb_dev"],
+            rsi_buy=params["rsi_buy"],
+            rsi_sell=params["rsi_sell"],
+            SL=params["SL"],
+            TP=params["TP"],
+            n_shares=params["n_shares"],
+            cash=cash
+        )
+
+    @property
+    def n_open(self) -> int:
+        """Number of open positions (longs and shorts)."""
+        return len(self.longs) + len(self.shorts)
+
+    def _signals(self, close: float) -> tuple[bool, bool]:
+        """
+        Update the indicators and vote as `get_signals(add_indicators(...))` does.
+
+        No signals come out while `add_indicators` would still drop the bar.
+        After that each indicator votes as soon as it is warm: `get_signals`
+        recomputes the SMA and Bollinger Bands on the kept bars only, so their
+        votes start `window - 1` bars later than the RSI's.
+        """
+        rsi = self._rsi.update(close)
+        sma = self._sma.update(close)
+        bb_std = self._bb.update(close)
+        bar = self._bars
+        self._bars += 1
+        if bar < self._warmup:
+            return False, False
+
+        buy_votes = int(rsi < self.rsi_buy)
+        sell_votes = int(rsi > self.rsi_sell)
+        if bar >= self._warmup + self._sma.window - 1:
+            buy_votes += close > sma
+            sell_votes += close < sma
+        if bar >= self._warmup + self._bb.window - 1:
+            bb_upper = self._bb.mean + self.bb_dev * bb_std
+            bb_lower = self._bb.mean - self.bb_dev * bb_std
+            buy_votes += close < bb_lower
+            sell_votes += close > bb_upper
+        return buy_votes >= 2, sell_votes >= 2
+
+    def on_bar(self, close: float, buy: bool | None = None, sell: bool | None = None) -> float:
+        """
+        Process one new bar.
+
+        Args:
+            close (float): Close price of the bar.
+            buy (bool | None): Externally supplied buy signal. If both signals
+                               are None they come from the engine's indicators.
+            sell (bool | None): Externally supplied sell signal.
+
+        Returns:
+            float: Portfolio value after the bar.
+        """
+        if buy is None and sell is None:
+            buy, sell = self._signals(close)
+        self.last_buy, self.last_sell = bool(buy), bool(sell)
+        n_shares = self.n_shares
+
+        # Close long positions if SL or TP is triggered
+        if len(self.longs):
+            hits = self.longs.long_hits(close)
+            if len(hits):
+                _, hit_shares = self.longs.remove(hits)
+                self.cash += hit_shares.sum() * close * (1 - COM)
+
+        # Close short positions if SL or TP is triggered
+        if len(self.shorts):
+            hits = self.shorts.short_hits(close)
+            if len(hits):
+                hit_price, hit_shares = self.shorts.remove(hits)
+                hit_notional = hit_price @ hit_shares
+                self.cash += hit_notional + \
+                    (hit_notional - hit_shares.sum() * close) * (1 - COM)
+
+        # Open new positions on signals
+        cost = close * n_shares * (1 + COM)
+        if buy and self.cash > cost:
+            self.cash -= cost
+            self.longs.add(close, close * (1 - self.SL), close * (1 + self.TP), n_shares)
+        if sell and self.cash > cost:
+            self.cash -= cost
+            self.shorts.add(close, close * (1 + self.SL), close * (1 - self.TP), n_shares)
+
+        self.port_value = self.cash + self.longs.long_value(close) + \
+            self.shorts.short_value(close)
+        return self.port_value
+
+
+async def queue_source(queue: asyncio.Queue) -> AsyncIterator[float]:
+    """
+    Yield close prices put on a local queue until a None sentinel arrives.
+
+    Args:
+        queue (asyncio.Queue): Queue of close prices.
+
+    Yields:
+        float: Next close price.
+    """
+    while True:
+        close = await queue.get()
+        if close is None:
+            return
+        yield float(close)
+
+
+async def socket_source(host: str, port: int) -> AsyncIterator[float]:
+    """
+    Yield close prices from a line-based TCP feed.
+
+    Each line carries one bar; the close price is its last comma-separated
+    field, so plain prices and 'timestamp,close' lines both work.
+
+    Args:
+        host (str): Feed host.
+        port (int): Feed port.
+
+    Yields:
+        float: Next close price.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while line := await reader.readline():
+            line = line.strip()
+            if line:
+                yield float(line.rsplit(b",", 1)[-1])
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+async def run_live(engine: StrategyEngine, source: AsyncIterator[float],
+                   on_update: Callable[[StrategyEngine, float], None] | None = None) -> float:
+    """
+    Drive a strategy engine from an asynchronous feed of close prices.
+
+    Args:
+        engine (StrategyEngine): Engine to feed.
+        source (AsyncIterator[float]): Feed such as `queue_source` or `socket_source`.
+        on_update (Callable | None): Called with the engine and the close price
+                                     after every bar (e.g. to log or place orders).
+
+    Returns:
+        float: Portfolio value when the feed ends.
+    """
+    async for close in source:
+        engine.on_bar(close)
+        if on_update is not None:
+            on_update(engine, close)
+    return engine.port_value
@@ -1,217 +1,291 @@
-import optuna
-import pandas as pd
-
-from data import load_data
-from split import data_split
-from indicators import add_indicators, get_signals
-from backtesting import backtest
-from metrics import performance_summary
-from optimize import optimize
-from plots import plot_port_value_train, plot_port_value_test_val, plot_return_distribution, plot_rolling_volatility, plot_signals
-from tables import returns_table, show_table
+import argparse
+import json
+import os
+import sys
+from contextlib import ExitStack
+
+# Optuna, Numba, ta and the plotting stack are imported inside the commands
+# that need them, so `--help` starts instantly and optimize/backtest runs never
+# load matplotlib, seaborn or scipy.
+
+DEFAULT_DATA = "Binance_BTCUSDT_1h.csv"
+DEFAULT_STORAGE = "studies.journal"
+COMMANDS = ("optimize", "backtest", "report", "portfolio")
+
+
+# ============================
+# Helpers
+# ============================
+
+def _load(path: str):
+    """Load the full price series and its training set."""
+    from data import load_data
+    from split import data_split
+
+    data = load_data(path)
+    return data, data_split(data)[0]
+
+
+def _params(args: argparse.Namespace, train_data) -> dict:
+    """Read the parameters from --params, or optimize them on the train set."""
+    if args.params:
+        with open(args.params) as f:
+            return json.load(f)
+    return _optimize(args, train_data)
+
+
+def _optimize(args: argparse.Namespace, train_data) -> dict:
+    """Run the study on the train set, print and save the best parameters."""
+    import optuna
+    from parallel import optimize_parallel
 
-if __name__ == "__main__":
-    # ============================
-    # 1. Load and Split Data
-    # ============================
-    df = load_data("Binance_BTCUSDT_1h.csv")
-    train_data, test_data, val_data = data_split(df)
-
-    # ============================
-    # 2. Hyperparameter Optimization (Train Set)
-    # ============================
     optuna.logging.set_verbosity(optuna.logging.WARNING)
-    study = optuna.create_study(direction="maximize")
-    study.optimize(
-        lambda trial: optimize(trial, train_data),
-        n_trials=50,
-        n_jobs=-1,
-        show_progress_bar=True
-    )
+    study = optimize_parallel(train_data, n_trials=args.trials, n_workers=args.workers,
+                              storage_path=args.storage or None, seed=args.seed)
 
     print("\nBest parameters found:")
     params = study.best_params
     for k, v in params.items():
         print(f"  {k}: {v}")
 
-    # ============================
-    # 3. Backtest on Train Set
-    # ============================
-    print("\n--- Running on Train set ---")
-    train_data_proc = add_indicators(
-        train_data.copy(),
-        rsi_window=params["rsi_window"],
-        sma_window=params["sma_window"],
-        bb_window=params["bb_window"],
-        bb_dev=params["bb_dev"]
-    )
-    train_data_proc = get_signals(
-        train_data_proc,
-        rsi_buy=params["rsi_buy"],
-        rsi_sell=params["rsi_sell"],
-        sma_window=params["sma_window"],
-        bb_window=params["bb_window"],
-        bb_dev=params["bb_dev"]
-    )
-    port_hist_train, final_cash_train = backtest(
-        train_data_proc,
-        SL=params["SL"],
-        TP=params["TP"],
-        n_shares=params["n_shares"]
-    )
-    metrics_train = performance_summary(
-        pd.Series(port_hist_train, index=train_data_proc.index), periods_per_year=8760)
-    plot_port_value_train(port_hist_train, train_data_proc.Date)
+    if args.params_out:
+        with open(args.params_out, "w") as f:
+            json.dump(params, f, indent=2)
+        print(f"Parameters written to {args.params_out}")
+    return params
 
-    print("\nPerformance Summary (Train):")
-    for key, value in metrics_train.items():
-        print(f"{key}: {value:.4f}")
-    print(f"Final Cash: {final_cash_train:.2f}")
-
-    # ============================
-    # 4. Backtest on Test Set
-    # ============================
-    print("\n--- Running on Test set ---")
-    test_data_proc = add_indicators(
-        test_data.copy(),
-        rsi_window=params["rsi_window"],
-        sma_window=params["sma_window"],
-        bb_window=params["bb_window"],
-        bb_dev=params["bb_dev"]
-    )
-    test_data_proc = get_signals(
-        test_data_proc,
-        rsi_buy=params["rsi_buy"],
-        rsi_sell=params["rsi_sell"],
-        sma_window=params["sma_window"],
-        bb_window=params["bb_window"],
-        bb_dev=params["bb_dev"]
-    )
-    port_hist_test, final_cash_test = backtest(
-        test_data_proc,
-        SL=params["SL"],
-        TP=params["TP"],
-        n_shares=params["n_shares"]
+
+# ============================
+# Commands
+# ============================
+
+def cmd_optimize(args: argparse.Namespace) -> dict:
+    """Optimize the strategy on the train set."""
+    _, train_data = _load(args.data)
+    return _optimize(args, train_data)
+
+
+def cmd_backtest(args: argparse.Namespace):
+    """Backtest the parameters on the train, test and validation sets."""
+    from evaluation import evaluate_splits
+
+    data, train_data = _load(args.data)
+    params = _params(args, train_data)
+    evaluation = evaluate_splits(data, params)
+
+    for name, result in evaluation.splits.items():
+        print(f"\nPerformance Summary ({name}):")
+        for key, value in result.metrics.items():
+            print(f"{key}: {value:.4f}")
+        print(f"Final Cash: {result.final_cash:.2f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(evaluation.to_dict(), f, indent=2)
+        print(f"\nResults written to {args.output}")
+    return evaluation
+
+
+def cmd_report(args: argparse.Namespace) -> None:
+    """Backtest every split and draw the figures and returns tables."""
+    if args.output_dir:
+        # Render off-screen; must be set before matplotlib is first imported
+        os.environ.setdefault("MPLBACKEND", "Agg")
+    evaluation = cmd_backtest(args)
+
+    import plots
+    from tables import returns_table, show_table
+
+    plots.set_output_dir(args.output_dir)
+    train, test, val = evaluation.splits.values()
+
+    # Portfolio value
+    plots.plot_port_value_train(train.port_hist, train.data.Date)
+    plots.plot_port_value_test_val(
+        test_hist=test.port_hist,
+        test_dates=test.data.Date,
+        val_hist=val.port_hist,
+        val_dates=val.data.Date
     )
-    metrics_test = performance_summary(
-        pd.Series(port_hist_test, index=test_data_proc.index), periods_per_year=8760)
-    print("\nPerformance Summary (Test):")
-    for key, value in metrics_test.items():
-        print(f"{key}: {value:.4f}")
-    print(f"Final Cash: {final_cash_test:.2f}")
-
-    # ============================
-    # 5. Backtest on Validation Set
-    # ============================
-    print("\n--- Running on Validation set ---")
-    val_data_proc = add_indicators(
-        val_data.copy(),
+
+    # Returns tables
+    port_series = {name: result.port_series for name, result in evaluation.splits.items()}
+
+    for name, series in port_series.items():
+        table = returns_table(series)
+        if args.output_dir:
+            table.to_csv(os.path.join(args.output_dir, f"returns_{name.lower()}.csv"))
+        show_table(table, f"{name} Set Returns Table")
+
+    # Extra charts
+    for name, series in port_series.items():
+        plots.plot_return_distribution(
+            series, title=f"{name} Set Monthly Returns Distribution")
+    for name, series in port_series.items():
+        plots.plot_rolling_volatility(
+            series, window=60, title=f"{name} Set Rolling Volatility (60-period)")
+    for name, result in evaluation.splits.items():
+        plots.plot_signals(
+            df=result.data,
+            buy_signals=result.data['buy_signal'],
+            sell_signals=result.data['sell_signal'],
+            title=f"{name} Set Buy/Sell Points on Price Chart"
+        )
+
+    if args.output_dir:
+        print(f"Figures and tables written to {args.output_dir}")
+
+
+def cmd_portfolio(args: argparse.Namespace):
+    """Backtest the parameters on several symbols trading from one cash balance."""
+    import numpy as np
+    import pandas as pd
+    from data import load_universe
+    from indicators import panel_signals, first_bars
+    from backtesting import backtest_portfolio
+    from metrics import fused_metrics
+
+    with open(args.params) as f:
+        params = json.load(f)
+    universe = load_universe(args.data)
+    close = universe.close
+
+    buy, sell = panel_signals(
+        close,
         rsi_window=params["rsi_window"],
         sma_window=params["sma_window"],
         bb_window=params["bb_window"],
-        bb_dev=params["bb_dev"]
-    )
-    val_data_proc = get_signals(
-        val_data_proc,
+        bb_dev=params["bb_dev"],
         rsi_buy=params["rsi_buy"],
-        rsi_sell=params["rsi_sell"],
-        sma_window=params["sma_window"],
-        bb_window=params["bb_window"],
-        bb_dev=params["bb_dev"]
+        rsi_sell=params["rsi_sell"]
     )
-    port_hist_val, final_cash_val = backtest(
-        val_data_proc,
-        SL=params["SL"],
-        TP=params["TP"],
-        n_shares=params["n_shares"]
-    )
-    metrics_val = performance_summary(
-        pd.Series(port_hist_val, index=val_data_proc.index), periods_per_year=8760)
-    print("\nPerformance Summary (Validation):")
-    for key, value in metrics_val.items():
+
+    n_shares = params["n_shares"]
+    if args.notional:
+        # Same quote-currency size per trade whatever the price level
+        first = np.minimum(first_bars(close), len(close) - 1)
+        n_shares = args.notional / close[first, np.arange(close.shape[1])]
+
+    result = backtest_portfolio(close, buy, sell, params["SL"], params["TP"], n_shares)
+    metrics = fused_metrics(result.port_hist, periods_per_year=8760)
+    symbols = pd.DataFrame({
+        "trades": result.trades,
+        "long_open": result.long_open,
+        "short_open": result.short_open,
+        "pnl": result.pnl
+    }, index=universe.symbols).sort_values("pnl", ascending=False)
+
+    print(f"\nPortfolio Performance ({len(universe.symbols)} symbols, {len(close)} bars):")
+    for key, value in metrics.items():
         print(f"{key}: {value:.4f}")
-    print(f"Final Cash: {final_cash_val:.2f}")
-
-    # ============================
-    # 6. Plot Combined Test + Validation
-    # ============================
-    plot_port_value_test_val(
-        test_hist=port_hist_test,
-        test_dates=test_data_proc.Date,
-        val_hist=port_hist_val,
-        val_dates=val_data_proc.Date
-    )
+    print(f"Final Value: {result.final_value:.2f}")
+    print("\nPer-symbol results:")
+    print(symbols.to_string(float_format=lambda x: f"{x:.2f}"))
 
-    # ============================
-    # 7. Generate Returns Tables
-    # ============================
-    port_series_train = pd.Series(
-        port_hist_train,
-        index=pd.to_datetime(train_data_proc['Date'])
-    )
-    returns_table_train = returns_table(port_series_train)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "params": params,
+                "metrics": {k: float(v) for k, v in metrics.items()},
+                "final_value": result.final_value,
+                "symbols": {name: {k: float(v) for k, v in row.items()}
+                            for name, row in symbols.iterrows()}
+            }, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    return result
 
-    port_series_test = pd.Series(
-        port_hist_test,
-        index=pd.to_datetime(test_data_proc['Date'])
-    )
-    returns_table_test = returns_table(port_series_test)
 
-    port_series_val = pd.Series(
-        port_hist_val,
-        index=pd.to_datetime(val_data_proc['Date'])
-    )
-    returns_table_val = returns_table(port_series_val)
+# ============================
+# Command line
+# ============================
 
-    print(port_series_val.index.min(), port_series_val.index.max())
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser with one subcommand per pipeline stage."""
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--profile", action="store_true",
+                        help="Report per-stage timings at the end (or set BACKTEST_PROFILE=1).")
+    common.add_argument("--cprofile", metavar="FILE",
+                        help="Save cProfile stats of the main process to FILE.")
+    common.add_argument("--sample", metavar="FILE",
+                        help="Save sampled stacks of the main process to FILE (folded format).")
 
-    # ============================
-    # 8. Display Tables
-    # ============================
-    show_table(returns_table_train, "Train Set Returns Table")
-    show_table(returns_table_test, "Test Set Returns Table")
-    show_table(returns_table_val, "Validation Set Returns Table")
+    single = argparse.ArgumentParser(add_help=False)
+    single.add_argument("--data", default=DEFAULT_DATA, help="Price CSV file.")
 
-    # ============================
-    # 9. Extra Charts / Visualizations
-    # ============================
+    study = argparse.ArgumentParser(add_help=False)
+    study.add_argument("--trials", type=int, default=50, help="Number of Optuna trials.")
+    study.add_argument("--workers", type=int, default=None,
+                       help="Worker processes (default: CPU count).")
+    study.add_argument("--seed", type=int, default=None, help="Sampler seed.")
+    study.add_argument("--storage", metavar="PATH", default=DEFAULT_STORAGE,
+                       help="Journal file, .db/.sqlite file or SQLite URL holding the "
+                            "study, resumed on later runs with the same data ('' for "
+                            "a throwaway in-memory study).")
+    study.add_argument("--params-out", metavar="FILE", default="best_params.json",
+                       help="Write the best parameters to FILE ('' to skip).")
 
-    # Histogram of returns (train)
-    plot_return_distribution(
-        port_series_train, title="Train Set Monthly Returns Distribution")
+    evaluate = argparse.ArgumentParser(add_help=False)
+    evaluate.add_argument("--params", metavar="FILE",
+                          help="JSON file of parameters; optimized on the train set if omitted.")
+    evaluate.add_argument("--output", metavar="FILE",
+                          help="Write the metrics of every split to FILE as JSON.")
 
-    # Histogram of returns (test)
-    plot_return_distribution(
-        port_series_test, title="Test Set Monthly Returns Distribution")
+    parser = argparse.ArgumentParser(
+        description="Optimize and evaluate the trading strategy. Without a "
+                    "command, runs the full interactive report.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("optimize", parents=[single, common, study],
+                        help="Optimize the strategy on the train set.")
+    commands.add_parser("backtest", parents=[single, common, study, evaluate],
+                        help="Backtest on the train, test and validation sets.")
+    report = commands.add_parser("report", parents=[single, common, study, evaluate],
+                                 help="Backtest and draw the figures and tables.")
+    report.add_argument("--output-dir", metavar="DIR",
+                        help="Write figures (PNG) and tables (CSV, PNG) to DIR "
+                             "instead of opening windows.")
+    portfolio = commands.add_parser(
+        "portfolio", parents=[common],
+        help="Backtest on several symbols sharing one cash balance.")
+    portfolio.add_argument("--data", nargs="+", required=True, metavar="CSV",
+                           help="Price CSV files, one per symbol.")
+    portfolio.add_argument("--params", metavar="FILE", default="best_params.json",
+                           help="JSON file of parameters, e.g. written by optimize.")
+    portfolio.add_argument("--notional", type=float, default=None,
+                           help="Quote-currency size of each trade, converted to shares "
+                                "at each symbol's first close (default: the parameters' "
+                                "n_shares in every symbol).")
+    portfolio.add_argument("--output", metavar="FILE",
+                           help="Write the portfolio metrics and per-symbol results to FILE as JSON.")
+    return parser
 
-    # Histogram of returns (validation)
-    plot_return_distribution(
-        port_series_val, title="Validation Set Monthly Returns Distribution")
 
-    # Rolling volatility of returns (train)
-    plot_rolling_volatility(port_series_train, window=60)
+def main(argv: list[str] | None = None) -> None:
+    """
+    Run the command line interface.
 
-    # Rolling volatility of returns (test)
-    plot_rolling_volatility(port_series_test, window=60)
+    Args:
+        argv (list[str] | None): Arguments without the program name. Defaults
+                                 to `sys.argv[1:]`.
+    """
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or (argv[0] not in COMMANDS and argv[0] not in ("-h", "--help")):
+        argv = ["report"] + argv
+    args = build_parser().parse_args(argv)
 
-    # Rolling volatility of returns (validation)
-    plot_rolling_volatility(port_series_val, window=60)
+    from profiling import PROFILER, cprofile, sample_stacks
 
-    # Plot buy/sell signals on price chart (train)
-    plot_signals(
-        df=train_data_proc,
-        buy_signals=train_data_proc['buy_signal'],
-        sell_signals=train_data_proc['sell_signal']
-    )
-    # Plot buy/sell signals on price chart (test)
-    plot_signals(
-        df=test_data_proc,
-        buy_signals=test_data_proc['buy_signal'],
-        sell_signals=test_data_proc['sell_signal']
-    )
-    # Plot buy/sell signals on price chart (validation)
-    plot_signals(
-        df=val_data_proc,
-        buy_signals=val_data_proc['buy_signal'],
-        sell_signals=val_data_proc['sell_signal']
-    )
+    if args.profile:
+        PROFILER.enable()
+    with ExitStack() as profilers:
+        if args.cprofile:
+            profilers.enter_context(cprofile(args.cprofile))
+        if args.sample:
+            profilers.enter_context(sample_stacks(args.sample))
+        {"optimize": cmd_optimize, "backtest": cmd_backtest,
+         "report": cmd_report, "portfolio": cmd_portfolio}[args.command](args)
+    if PROFILER.enabled:
+        PROFILER.report()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,13 @@
 import pandas as pd
 import numpy as np
 
+try:
+    from numba import njit
+except ImportError:  # Numba is optional; fused metrics fall back to NumPy
+    njit = None
+
+from profiling import instrument
+
 # --- Individual metrics ---
 
 # Sharpe Ratio
@@ -66,6 +73,24 @@ def calmar_ratio(returns: pd.Series, periods_per_year: int = 8760) -> float:
     ann_return = np.mean(returns) * periods_per_year
     return ann_return / abs(max_dd) if max_dd != 0 else np.nan
 
+# Calmar ratio over many portfolios
+
+
+def calmar_ratio_batch(port_values: np.ndarray, periods_per_year: int = 8760) -> np.ndarray:
+    """
+    Calculate the Calmar Ratio for every row of a portfolio value matrix.
+
+    Equivalent to calling `calmar_ratio` on the returns of each row.
+
+    Args:
+        port_values (np.ndarray): N x T matrix of portfolio values.
+        periods_per_year (int): Number of periods per year.
+
+    Returns:
+        np.ndarray: Calmar Ratio per row (NaN where the drawdown is zero).
+    """
+    return fused_metrics_batch(port_values, periods_per_year=periods_per_year)["Calmar Ratio"]
+
 # Maximum Drawdown
 
 
@@ -102,6 +127,7 @@ def win_rate(returns: pd.Series) -> float:
 # Metrics summary
 
 
+@instrument("performance_summary")
 def performance_summary(prices: pd.Series, risk_free_rate: float = 0.0, periods_per_year: int = 8760) -> dict:
     """
     Compute a summary of performance metrics from a price series.
@@ -123,3 +149,271 @@ def performance_summary(prices: pd.Series, risk_free_rate: float = 0.0, periods_
         "Win Rate": win_rate(returns)
     }
     return metrics
+
+# --- Online metrics ---
+
+# Layout of the accumulator state vector used by `_acc_update`
+_ACC_N_VALUES = 0    # Portfolio values seen
+_ACC_PREV = 1        # Last portfolio value
+_ACC_N = 2           # Returns seen
+_ACC_MEAN = 3        # Running mean of returns
+_ACC_M2 = 4          # Sum of squared deviations of returns
+_ACC_DOWN_N = 5      # Negative returns seen
+_ACC_DOWN_MEAN = 6   # Running mean of negative returns
+_ACC_DOWN_M2 = 7     # Sum of squared deviations of negative returns
+_ACC_CUM = 8         # Cumulative growth, prod(1 + r)
+_ACC_PEAK = 9        # Running peak of the cumulative growth
+_ACC_MAX_DD = 10     # Most negative drawdown so far
+_ACC_WINS = 11       # Positive returns seen
+ACC_SIZE = 12
+
+
+def new_accumulator() -> np.ndarray:
+    """
+    Create an empty accumulator state vector for `_acc_update`.
+
+    Returns:
+        np.ndarray: Zeroed state, with the peak and drawdown unset.
+    """
+    acc = np.zeros(ACC_SIZE)
+    acc[_ACC_CUM] = 1.0
+    acc[_ACC_PEAK] = -np.inf
+    acc[_ACC_MAX_DD] = np.nan
+    return acc
+
+
+def _acc_update(acc: np.ndarray, value: float) -> None:
+    """
+    Fold one portfolio value into the accumulator in O(1).
+
+    Uses Welford's algorithm for the mean and variance of all returns and of the
+    negative returns. Written with scalar operations only so the backtest kernel
+    can compile it with Numba.
+
+    Args:
+        acc (np.ndarray): State vector from `new_accumulator`, updated in place.
+        value (float): Next portfolio value.
+    """
+    acc[_ACC_N_VALUES] += 1
+    if acc[_ACC_N_VALUES] > 1:
+        r = value / acc[_ACC_PREV] - 1
+
+        acc[_ACC_N] += 1
+        delta = r - acc[_ACC_MEAN]
+        acc[_ACC_MEAN] += delta / acc[_ACC_N]
+        acc[_ACC_M2] += delta * (r - acc[_ACC_MEAN])
+
+        if r < 0:
+            acc[_ACC_DOWN_N] += 1
+            delta = r - acc[_ACC_DOWN_MEAN]
+            acc[_ACC_DOWN_MEAN] += delta / acc[_ACC_DOWN_N]
+            acc[_ACC_DOWN_M2] += delta * (r - acc[_ACC_DOWN_MEAN])
+        elif r > 0:
+            acc[_ACC_WINS] += 1
+
+        acc[_ACC_CUM] *= 1 + r
+        if acc[_ACC_CUM] > acc[_ACC_PEAK]:
+            acc[_ACC_PEAK] = acc[_ACC_CUM]
+        dd = (acc[_ACC_CUM] - acc[_ACC_PEAK]) / acc[_ACC_PEAK]
+        if not dd >= acc[_ACC_MAX_DD]:  # Also replaces the initial NaN
+            acc[_ACC_MAX_DD] = dd
+    acc[_ACC_PREV] = value
+
+
+def _acc_summary_rows(accs: np.ndarray, risk_free_rate: float = 0.0,
+                      periods_per_year: int = 8760) -> dict:
+    """
+    Turn accumulator states (one per row) into performance metrics.
+
+    Args:
+        accs (np.ndarray): N x ACC_SIZE matrix of accumulator states.
+        risk_free_rate (float): Annual risk-free rate.
+        periods_per_year (int): Number of periods per year.
+
+    Returns:
+        dict: Same keys as `performance_summary`, with one value per row.
+    """
+    n = accs[:, _ACC_N]
+    down_n = accs[:, _ACC_DOWN_N]
+    max_dd = accs[:, _ACC_MAX_DD]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = np.where(n > 0, accs[:, _ACC_MEAN], np.nan)
+        ann_return = (mean - risk_free_rate / periods_per_year) * periods_per_year
+        ann_vol = np.where(n > 1, np.sqrt(accs[:, _ACC_M2] / (n - 1)), np.nan) * \
+            np.sqrt(periods_per_year)
+        ann_downside_vol = np.where(
+            down_n > 1, np.sqrt(accs[:, _ACC_DOWN_M2] / (down_n - 1)), np.nan) * \
+            np.sqrt(periods_per_year)
+        return {
+            "Sharpe Ratio": np.where(ann_vol != 0, ann_return / ann_vol, np.nan),
+            "Sortino Ratio": np.where(ann_downside_vol != 0, ann_return / ann_downside_vol, np.nan),
+            "Calmar Ratio": np.where(max_dd != 0, mean * periods_per_year / np.abs(max_dd), np.nan),
+            "Maximum Drawdown": max_dd,
+            "Win Rate": np.where(n > 0, accs[:, _ACC_WINS] / n, np.nan)
+        }
+
+
+def _acc_summary(acc: np.ndarray, risk_free_rate: float = 0.0, periods_per_year: int = 8760) -> dict:
+    """
+    Turn an accumulator state into the same dictionary as `performance_summary`.
+
+    Args:
+        acc (np.ndarray): Accumulator state vector.
+        risk_free_rate (float): Annual risk-free rate.
+        periods_per_year (int): Number of periods per year.
+
+    Returns:
+        dict: Dictionary of performance metrics.
+    """
+    rows = _acc_summary_rows(acc[None, :], risk_free_rate, periods_per_year)
+    return {key: float(values[0]) for key, values in rows.items()}
+
+
+class OnlineMetrics:
+    """
+    Streaming version of `performance_summary` with O(1) work per bar.
+
+    Feed portfolio values one at a time (or pass the object to the backtest,
+    which updates it as it simulates); the full history is never stored.
+
+    Attributes:
+        acc (np.ndarray): Accumulator state vector (see `_acc_update`).
+    """
+
+    def __init__(self):
+        self.acc = new_accumulator()
+
+    def update(self, value: float) -> None:
+        """Fold the next portfolio value into the running metrics."""
+        _acc_update(self.acc, float(value))
+
+    @property
+    def last_value(self) -> float | None:
+        """Most recent portfolio value, or None before the first update."""
+        return float(self.acc[_ACC_PREV]) if self.acc[_ACC_N_VALUES] else None
+
+    @property
+    def n_returns(self) -> int:
+        """Number of returns seen so far."""
+        return int(self.acc[_ACC_N])
+
+    def summary(self, risk_free_rate: float = 0.0, periods_per_year: int = 8760) -> dict:
+        """
+        Current performance metrics.
+
+        Args:
+            risk_free_rate (float): Annual risk-free rate.
+            periods_per_year (int): Number of periods per year.
+
+        Returns:
+            dict: Same keys as `performance_summary`.
+        """
+        return _acc_summary(self.acc, risk_free_rate, periods_per_year)
+
+
+# --- Fused metrics ---
+
+
+def _accumulate_rows_kernel(port_values: np.ndarray) -> np.ndarray:
+    """Accumulator state of every row of `port_values`, in one pass per row."""
+    accs = np.empty((port_values.shape[0], ACC_SIZE))
+    for k in range(port_values.shape[0]):
+        acc = accs[k]
+        acc[:] = 0.0
+        acc[_ACC_CUM] = 1.0
+        acc[_ACC_PEAK] = -np.inf
+        acc[_ACC_MAX_DD] = np.nan
+        for value in port_values[k]:
+            _acc_update_jit(acc, value)
+    return accs
+
+
+if njit is not None:
+    _acc_update_jit = njit(cache=True, nogil=True)(_acc_update)
+    _accumulate_rows_jit = njit(cache=True, nogil=True)(_accumulate_rows_kernel)
+else:
+    _acc_update_jit = _accumulate_rows_jit = None
+
+
+def _accumulate_rows_numpy(port_values: np.ndarray) -> np.ndarray:
+    """Same result as `_accumulate_rows_kernel`, built from whole-array NumPy operations."""
+    n_rows, n_values = port_values.shape
+    accs = np.zeros((n_rows, ACC_SIZE))
+    accs[:, _ACC_N_VALUES] = n_values
+    accs[:, _ACC_CUM] = 1.0
+    accs[:, _ACC_PEAK] = -np.inf
+    accs[:, _ACC_MAX_DD] = np.nan
+    if n_values:
+        accs[:, _ACC_PREV] = port_values[:, -1]
+    if n_values < 2:
+        return accs
+
+    returns = port_values[:, 1:] / port_values[:, :-1] - 1
+    n = n_values - 1
+    accs[:, _ACC_N] = n
+    accs[:, _ACC_MEAN] = returns.mean(axis=1)
+    accs[:, _ACC_M2] = ((returns - accs[:, _ACC_MEAN, None]) ** 2).sum(axis=1)
+
+    downside = returns < 0
+    down_n = downside.sum(axis=1)
+    with np.errstate(invalid='ignore'):
+        down_mean = np.where(downside, returns, 0.0).sum(axis=1) / down_n
+    accs[:, _ACC_DOWN_N] = down_n
+    accs[:, _ACC_DOWN_MEAN] = np.where(down_n > 0, down_mean, 0.0)
+    accs[:, _ACC_DOWN_M2] = np.where(
+        downside, (returns - accs[:, _ACC_DOWN_MEAN, None]) ** 2, 0.0).sum(axis=1)
+    accs[:, _ACC_WINS] = (returns > 0).sum(axis=1)
+
+    cum_returns = np.cumprod(1 + returns, axis=1)
+    peak = np.maximum.accumulate(cum_returns, axis=1)
+    accs[:, _ACC_CUM] = cum_returns[:, -1]
+    accs[:, _ACC_PEAK] = peak[:, -1]
+    accs[:, _ACC_MAX_DD] = ((cum_returns - peak) / peak).min(axis=1)
+    return accs
+
+
+def fused_metrics_batch(port_values: np.ndarray, risk_free_rate: float = 0.0,
+                        periods_per_year: int = 8760) -> dict:
+    """
+    Compute every performance metric for many portfolios at once.
+
+    Each row is a portfolio value history. With Numba each row is scanned once
+    by the online accumulator; otherwise the same statistics are built with
+    whole-matrix NumPy operations. No pandas objects are created.
+
+    Args:
+        port_values (np.ndarray): N x T matrix of portfolio values (float64).
+        risk_free_rate (float): Annual risk-free rate.
+        periods_per_year (int): Number of periods per year.
+
+    Returns:
+        dict: Same keys as `performance_summary`, each an array of length N.
+    """
+    port_values = np.ascontiguousarray(np.atleast_2d(port_values), dtype=np.float64)
+    if _accumulate_rows_jit is not None:
+        accs = _accumulate_rows_jit(port_values)
+    else:
+        accs = _accumulate_rows_numpy(port_values)
+    return _acc_summary_rows(accs, risk_free_rate, periods_per_year)
+
+
+def fused_metrics(port_values: np.ndarray, risk_free_rate: float = 0.0,
+                  periods_per_year: int = 8760) -> dict:
+    """
+    Compute every performance metric of one portfolio from a raw array.
+
+    Array counterpart of `performance_summary` (which takes prices as a
+    pd.Series): same keys, same values up to floating point rounding.
+
+    Args:
+        port_values (np.ndarray): Portfolio values over time.
+        risk_free_rate (float): Annual risk-free rate.
+        periods_per_year (int): Number of periods per year.
+
+    Returns:
+        dict: Dictionary of performance metrics.
+    """
+    rows = fused_metrics_batch(np.asarray(port_values, dtype=np.float64)[None, :],
+                               risk_free_rate, periods_per_year)
+    return {key: float(values[0]) for key, values in rows.items()}
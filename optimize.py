@@ -1,13 +1,210 @@
+import hashlib
+import json
+import weakref
+from concurrent.futures import Executor
+from functools import partial
+
 import optuna
 import pandas as pd
 import numpy as np
 
-from backtesting import backtest
-from indicators import get_signals, add_indicators
-from metrics import calmar_ratio
+from backtesting import backtest_arrays
+from indicators import fused_signals, grid_signals, IndicatorGrid, INDICATOR_CACHE
+from metrics import OnlineMetrics
+from profiling import instrument, count
+
+
+# Search space of `optimize`: name -> (kind, low, high, step). Order matters:
+# parameters are suggested in this order.
+SEARCH_SPACE = {
+    # Indicator hyperparameters
+    "rsi_window": ("int", 7, 21, 1),
+    "sma_window": ("int", 10, 30, 1),
+    "bb_window": ("int", 10, 25, 1),
+    "bb_dev": ("float", 1.5, 2.5, 0.05),
+    # RSI thresholds
+    "rsi_buy": ("int", 10, 40, 1),
+    "rsi_sell": ("int", 60, 90, 1),
+    # Trade hyperparameters
+    "SL": ("float", 0.02, 0.2, None),
+    "TP": ("float", 0.02, 0.2, None),
+    "n_shares": ("float", 0.3, 10.0, None),
+}
+
+# Parameters that go into signal generation (the rest drive the backtest)
+SIGNAL_PARAMS = ("rsi_window", "sma_window", "bb_window", "bb_dev", "rsi_buy", "rsi_sell")
+
+
+def suggest_params(trial: optuna.Trial) -> dict:
+    """
+    Suggest one value for every parameter of `SEARCH_SPACE`.
+
+    Args:
+        trial (optuna.Trial): Optuna trial object.
+
+    Returns:
+        dict: Parameter values by name.
+    """
+    params = {}
+    for name, (kind, low, high, step) in SEARCH_SPACE.items():
+        if kind == "int":
+            params[name] = trial.suggest_int(name, low, high, step=step)
+        else:
+            params[name] = trial.suggest_float(name, low, high, step=step)
+    return params
+
+
+# Finished results per study, by parameter hash (see `_previous_value`);
+# a pruned parameter set maps to None
+_STUDY_RESULTS = weakref.WeakKeyDictionary()
+
 
+def params_hash(params: dict) -> str:
+    """Stable hash of a parameter dict, independent of key order."""
+    return hashlib.blake2b(json.dumps(params, sort_keys=True).encode(),
+                           digest_size=8).hexdigest()
 
-def optimize(trial: optuna.Trial, train_data: pd.DataFrame) -> float:
+
+def _study_results(study: optuna.Study) -> dict[str, float | None]:
+    """Results of `study` by parameter hash, read from its storage on first use."""
+    results = _STUDY_RESULTS.get(study)
+    if results is None:
+        finished = (optuna.trial.TrialState.COMPLETE, optuna.trial.TrialState.PRUNED)
+        results = {
+            params_hash(previous.params):
+                None if previous.state == optuna.trial.TrialState.PRUNED else previous.value
+            for previous in study.get_trials(deepcopy=False, states=finished)
+        }
+        _STUDY_RESULTS[study] = results
+    return results
+
+
+def _previous_value(trial: optuna.Trial) -> float | None:
+    """
+    Result of an earlier finished trial of the same study with identical parameters.
+
+    Lets a resumed or shared study skip parameter sets it has already
+    evaluated. A duplicate of a pruned trial is pruned as well. The study's
+    trials are read once per process and later results added as trials finish
+    (see `_remember_value`), so each lookup is a dict access. Trials finished
+    meanwhile by other processes are not seen and may be evaluated again.
+
+    Returns:
+        float | None: The earlier objective value, or None if there is none.
+    """
+    study = getattr(trial, "study", None)
+    if study is None:
+        return None
+    results = _study_results(study)
+    key = params_hash(trial.params)
+    if key not in results:
+        return None
+    count("trials_skipped")
+    if results[key] is None:
+        raise optuna.TrialPruned()
+    return results[key]
+
+
+def _remember_value(trial: optuna.Trial, value: float | None) -> None:
+    """Record a finished trial's value (None if pruned) for `_previous_value`."""
+    study = getattr(trial, "study", None)
+    if study is not None:
+        _study_results(study)[params_hash(trial.params)] = value
+
+
+def cv_folds(n_bars: int, n_splits: int = 7) -> list[tuple[int, int]]:
+    """
+    Split `n_bars` bars into consecutive, equal-size cross-validation folds.
+
+    Trailing bars that do not fill a whole fold are left out.
+
+    Args:
+        n_bars (int): Number of bars available.
+        n_splits (int): Number of folds.
+
+    Returns:
+        list[tuple[int, int]]: (start, end) index ranges, end exclusive.
+    """
+    size = n_bars // n_splits
+    return [(i * size, (i + 1) * size) for i in range(n_splits)]
+
+
+def order_folds(close: np.ndarray, folds: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    """
+    Sort folds by realized volatility, most volatile first.
+
+    Volatile folds trigger the most trades and separate good parameter sets
+    from bad ones soonest, so running them first lets pruners stop hopeless
+    trials early. The mean over all folds does not depend on the order.
+
+    Args:
+        close (np.ndarray): Close prices the folds index into.
+        folds (list[tuple[int, int]]): (start, end) index ranges.
+
+    Returns:
+        list[tuple[int, int]]: The same folds, reordered.
+    """
+    def volatility(fold: tuple[int, int]) -> float:
+        prices = close[fold[0]:fold[1]]
+        if len(prices) < 2:
+            return 0.0
+        return float(np.std(np.diff(prices) / prices[:-1]))
+
+    return sorted(folds, key=volatility, reverse=True)
+
+
+def make_pruner(name: str = "median") -> optuna.pruners.BasePruner:
+    """
+    Build an Optuna pruner for the per-fold intermediate values.
+
+    Args:
+        name (str): 'median', 'successive_halving', 'hyperband' or 'none'.
+
+    Returns:
+        optuna.pruners.BasePruner: The pruner.
+    """
+    pruners = {
+        "median": lambda: optuna.pruners.MedianPruner(n_startup_trials=5, n_warmup_steps=1),
+        "successive_halving": lambda: optuna.pruners.SuccessiveHalvingPruner(),
+        "hyperband": lambda: optuna.pruners.HyperbandPruner(min_resource=1),
+        "none": lambda: optuna.pruners.NopPruner(),
+    }
+    if name not in pruners:
+        raise ValueError(f"Unknown pruner '{name}'. Expected one of {tuple(pruners)}.")
+    return pruners[name]()
+
+
+def _fold_calmar(close: np.ndarray, buy: np.ndarray, sell: np.ndarray,
+                 fold: tuple[int, int], sl: float, tp: float, n_shares: float) -> float:
+    """Backtest one fold and return its Calmar Ratio, computed while it runs."""
+    start_idx, end_idx = fold
+    metrics = OnlineMetrics()
+    backtest_arrays(
+        close[start_idx:end_idx],
+        buy[start_idx:end_idx],
+        sell[start_idx:end_idx],
+        sl, tp, n_shares,
+        metrics=metrics,
+        record=False
+    )
+    return metrics.summary(periods_per_year=8760)["Calmar Ratio"]
+
+
+def _report(trial: optuna.Trial, calmars: list[float], step: int) -> None:
+    """Report the running mean Calmar Ratio and prune the trial if asked to."""
+    running = np.mean(calmars)
+    trial.report(-1e6 if np.isnan(running) else float(running), step)
+    if trial.should_prune():
+        count("trials_pruned")
+        raise optuna.TrialPruned()
+
+
+@instrument("trial")
+def optimize(trial: optuna.Trial, train_data: pd.DataFrame,
+             grid: IndicatorGrid | None = None, n_splits: int = 7,
+             folds: list[tuple[int, int]] | None = None,
+             executor: Executor | None = None,
+             window: tuple[int, int] | None = None) -> float:
     """
     Objective function for Optuna hyperparameter optimization.
 
@@ -15,68 +212,79 @@ def optimize(trial: optuna.Trial, train_data: pd.DataFrame) -> float:
     using cross-validation on the training data. The optimization target is the median
     Calmar Ratio across splits.
 
+    Folds run most volatile first, and the running mean Calmar Ratio is reported
+    after each one so the study's pruner can stop a hopeless trial early.
+
     Args:
         trial (optuna.Trial): Optuna trial object for suggesting hyperparameters.
         train_data (pd.DataFrame): Historical market data for training.
+        grid (IndicatorGrid | None): Indicators precomputed on `train_data.Close`
+                                     with `precompute_indicators`. When given, the
+                                     trial only indexes into it to build signals.
+        n_splits (int): Number of equal-size folds (see `cv_folds`).
+        folds (list[tuple[int, int]] | None): Explicit (start, end) fold ranges over
+                                              the bars left after the indicator
+                                              warm-up. Overrides `n_splits`.
+        executor (Executor | None): If given, folds are evaluated concurrently on it
+                                    (thread or process pool). Pruning then only
+                                    happens after every fold ran.
+        window (tuple[int, int] | None): (start, end) positions of the bars of
+                                         `train_data` to train on, e.g. one
+                                         walk-forward window. Indicators still
+                                         use the bars before it, and the folds
+                                         split this range instead of the
+                                         whole series.
 
     Returns:
         float: Median Calmar Ratio across cross-validation splits.
                Returns a large negative value if the result is NaN.
     """
-    data = train_data.copy()
+    params = suggest_params(trial)
+    previous = _previous_value(trial)
+    if previous is not None:
+        return previous
 
-    # Indicator hyperparameters
-    rsi_window = trial.suggest_int("rsi_window", 7, 21)
-    sma_window = trial.suggest_int("sma_window", 10, 30)
-    bb_window = trial.suggest_int("bb_window", 10, 25)
-    bb_dev = trial.suggest_float("bb_dev", 1.5, 2.5, step=0.05)
+    signal_params = {name: params[name] for name in SIGNAL_PARAMS}
+    sl, tp, n_shares = params["SL"], params["TP"], params["n_shares"]
 
-    # RSI thresholds
-    rsi_buy = trial.suggest_int("rsi_buy", 10, 40)
-    rsi_sell = trial.suggest_int("rsi_sell", 60, 90)
+    if grid is not None:
+        start, buy, sell = grid_signals(grid, **signal_params, bars=window)
+        close = grid.close
+    else:
+        start, buy, sell = fused_signals(
+            train_data['Close'], **signal_params, cache=INDICATOR_CACHE, bars=window)
+        close = train_data['Close'].to_numpy(dtype=np.float64)
 
-    # Trade hyperparameters
-    sl = trial.suggest_float("SL", 0.02, 0.2)
-    tp = trial.suggest_float("TP", 0.02, 0.2)
-    n_shares = trial.suggest_float("n_shares", 0.3, 10.0)
-
-    # Add indicators with params
-    data = add_indicators(
-        data,
-        rsi_window=rsi_window,
-        sma_window=sma_window,
-        bb_window=bb_window,
-        bb_dev=bb_dev
-    )
-    data = get_signals(
-        data,
-        rsi_buy=rsi_buy,
-        rsi_sell=rsi_sell
-    )
+    # A view of the bars the signals cover; folds slice further views of it,
+    # so no price data is copied per trial or per fold
+    close = close[start:start + len(buy)]
 
     # Cross-validation
-    n_splits = 7
-    calmars = []
-    len_data = len(data)
-
-    for i in range(n_splits):
-        size = len_data // n_splits
-        start_idx = i * size
-        end_idx = (i + 1) * size
-
-        chunk = data.iloc[start_idx:end_idx, :]
-        port_vals, _ = backtest(chunk, sl, tp, n_shares)
-
-        port_series = pd.Series(port_vals)
-        returns = port_series.pct_change().dropna()
+    if folds is None:
+        folds = cv_folds(len(close), n_splits)
+    folds = order_folds(close, folds)
 
-        calmar = calmar_ratio(returns, periods_per_year=8760)
-        calmars.append(calmar)
+    try:
+        if executor is not None:
+            # A partial (unlike a closure) pickles, so process pools work too
+            calmars = list(executor.map(
+                partial(_fold_calmar, close, buy, sell, sl=sl, tp=tp, n_shares=n_shares), folds))
+            for step in range(len(calmars)):
+                _report(trial, calmars[:step + 1], step)
+        else:
+            calmars = []
+            for step, fold in enumerate(folds):
+                calmars.append(_fold_calmar(close, buy, sell, fold, sl, tp, n_shares))
+                _report(trial, calmars, step)
+    except optuna.TrialPruned:
+        _remember_value(trial, None)
+        raise
 
     mean_calmar = np.mean(calmars)
 
     # If mean_calmar is NaN, assign very low value
     if np.isnan(mean_calmar):
-        return -1e6
+        mean_calmar = -1e6
 
+    _remember_value(trial, mean_calmar)
     return mean_calmar
@@ -0,0 +1,264 @@
+import dataclasses
+import hashlib
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import optuna
+import numpy as np
+import pandas as pd
+
+from indicators import precompute_indicators, IndicatorCache, IndicatorGrid
+from optimize import optimize, make_pruner, SEARCH_SPACE
+from profiling import PROFILER
+
+
+def _share_grid(grid: IndicatorGrid) -> tuple[list, dict]:
+    """
+    Copy every array of an indicator grid into its own shared memory block.
+
+    Args:
+        grid (IndicatorGrid): Grid to share.
+
+    Returns:
+        tuple[list, dict]: The blocks (to close and unlink once the workers are
+                           done) and, per grid field, the (block name, shape,
+                           dtype) a worker needs to map it.
+    """
+    blocks, specs = [], {}
+    try:
+        for field in dataclasses.fields(grid):
+            array = np.ascontiguousarray(getattr(grid, field.name))
+            shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            blocks.append(shm)
+            np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+            specs[field.name] = (shm.name, array.shape, array.dtype.str)
+    except BaseException:
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+        raise
+    return blocks, specs
+
+
+def _run_worker(grid_specs: dict, storage_path: str, study_name: str,
+                n_trials: int, seed: int | None, pruner: str, n_splits: int,
+                folds: list[tuple[int, int]] | None) -> dict | None:
+    """
+    Run a share of the study's trials in a worker process.
+
+    The training prices and the precomputed indicator grid are read straight
+    from the parent's shared memory blocks, so only the block names and shapes
+    are pickled to the worker and the grid is built once for all workers.
+
+    Args:
+        grid_specs (dict): Per `IndicatorGrid` field, the (block name, shape,
+                           dtype) of its shared memory block (see `_share_grid`).
+        storage_path (str): Storage backing the shared study (see `open_storage`).
+        study_name (str): Name of the study to attach to.
+        n_trials (int): Number of trials to run in this worker.
+        seed (int | None): Sampler seed for this worker.
+        pruner (str): Pruner name (see `optimize.make_pruner`).
+        n_splits (int): Number of equal-size folds (see `optimize.cv_folds`).
+        folds (list[tuple[int, int]] | None): Explicit fold ranges. Overrides `n_splits`.
+
+    Returns:
+        dict | None: The worker's profiler snapshot when profiling is on.
+    """
+    # A forked worker inherits whatever the parent had recorded so far
+    PROFILER.reset()
+    blocks = {name: shared_memory.SharedMemory(name=spec[0])
+              for name, spec in grid_specs.items()}
+    try:
+        grid = IndicatorGrid(**{
+            name: np.ndarray(shape, dtype=np.dtype(dtype), buffer=blocks[name].buf)
+            for name, (_, shape, dtype) in grid_specs.items()
+        })
+        train_data = pd.DataFrame({'Close': grid.close}, copy=False)
+
+        optuna.logging.set_verbosity(optuna.logging.WARNING)
+        study = optuna.load_study(
+            study_name=study_name,
+            storage=open_storage(storage_path),
+            sampler=optuna.samplers.TPESampler(seed=seed),
+            pruner=make_pruner(pruner)
+        )
+        study.optimize(lambda trial: optimize(trial, train_data, grid=grid,
+                                              n_splits=n_splits, folds=folds),
+                       n_trials=n_trials)
+        # Views into the blocks must be gone before they can be closed
+        del train_data, grid
+    finally:
+        for shm in blocks.values():
+            shm.close()
+    return PROFILER.snapshot() if PROFILER.enabled else None
+
+
+def _journal_storage(path: str) -> optuna.storages.JournalStorage:
+    """Optuna storage backed by a local journal file shared by every worker."""
+    return optuna.storages.JournalStorage(
+        optuna.storages.journal.JournalFileBackend(path))
+
+
+def open_storage(path: str) -> optuna.storages.BaseStorage:
+    """
+    Open a persistent study storage that several processes can share.
+
+    SQLite is used for 'sqlite:///' URLs and .db/.sqlite files, with heartbeats
+    so trials left running by a crashed worker are failed and retried. Any
+    other path is a journal file.
+
+    Args:
+        path (str): Storage file or SQLite URL.
+
+    Returns:
+        optuna.storages.BaseStorage: The storage.
+    """
+    if path.endswith((".db", ".sqlite", ".sqlite3")) and "://" not in path:
+        path = f"sqlite:///{path}"
+    if path.startswith("sqlite:"):
+        return optuna.storages.RDBStorage(
+            path,
+            heartbeat_interval=60,
+            grace_period=180,
+            failed_trial_callback=optuna.storages.RetryFailedTrialCallback(max_retry=1)
+        )
+    return _journal_storage(path)
+
+
+def study_key(train_data: pd.DataFrame, prefix: str = "optimize", n_splits: int = 7,
+              folds: list[tuple[int, int]] | None = None, pruner: str = "median") -> str:
+    """
+    Study name identifying the training data, the search space and the CV setup.
+
+    Runs on the same prices with the same `optimize.SEARCH_SPACE`, folds and
+    pruner map to the same study, so they resume it; new data, a changed space
+    or different CV or pruning settings start afresh, since their trial values
+    are not comparable.
+
+    Args:
+        train_data (pd.DataFrame): Historical market data for training.
+        prefix (str): Leading part of the name.
+        n_splits (int): Number of equal-size folds (see `optimize.cv_folds`).
+        folds (list[tuple[int, int]] | None): Explicit fold ranges. Overrides `n_splits`.
+        pruner (str): Pruner name (see `optimize.make_pruner`).
+
+    Returns:
+        str: '<prefix>-<data fingerprint>-<search space fingerprint>-<CV fingerprint>'.
+    """
+    def digest(value) -> str:
+        return hashlib.blake2b(json.dumps(value, sort_keys=True).encode(),
+                               digest_size=4).hexdigest()
+
+    data_key = IndicatorCache.fingerprint(train_data['Close'])[:16]
+    space_key = digest(SEARCH_SPACE)
+    cv = n_splits if folds is None else [[int(start), int(end)] for start, end in folds]
+    cv_key = digest({"cv": cv, "pruner": pruner})
+    return f"{prefix}-{data_key}-{space_key}-{cv_key}"
+
+
+def _finished_trials(study: optuna.Study) -> int:
+    """Number of completed or pruned trials of a study."""
+    return len(study.get_trials(deepcopy=False, states=(
+        optuna.trial.TrialState.COMPLETE, optuna.trial.TrialState.PRUNED)))
+
+
+def _run_workers(train_data: pd.DataFrame, storage_path: str, study_name: str,
+                 n_trials: int, n_workers: int, seed: int | None, pruner: str,
+                 n_splits: int, folds: list[tuple[int, int]] | None) -> None:
+    """Share the training prices and their indicator grid, then run `n_trials` trials over `n_workers` processes."""
+    grid = precompute_indicators(train_data['Close'].to_numpy(dtype=np.float64))
+    blocks, specs = _share_grid(grid)
+    del grid
+    try:
+        # Spread the trials as evenly as possible over the workers
+        shares = [n_trials // n_workers + (i < n_trials % n_workers)
+                  for i in range(n_workers)]
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            futures = [
+                pool.submit(_run_worker, specs, storage_path, study_name, share,
+                            None if seed is None else seed + i, pruner, n_splits, folds)
+                for i, share in enumerate(shares)
+            ]
+            for future in futures:
+                snapshot = future.result()
+                if snapshot is not None:
+                    PROFILER.merge(snapshot)
+    finally:
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+
+
+def optimize_parallel(
+    train_data: pd.DataFrame,
+    n_trials: int = 50,
+    n_workers: int | None = None,
+    storage_path: str | None = None,
+    study_name: str | None = None,
+    seed: int | None = None,
+    pruner: str = "median",
+    n_splits: int = 7,
+    folds: list[tuple[int, int]] | None = None
+) -> optuna.Study:
+    """
+    Run the `optimize` objective on a pool of worker processes.
+
+    Each worker is a separate process (no GIL contention) attached to one study
+    kept in a local journal file or SQLite database.
+
+    With a persistent `storage_path` the study is named after the training data,
+    the search space and the CV and pruner settings (see `study_key`), so an interrupted or repeated run
+    resumes it and only runs the trials still missing, and parameter sets the
+    study has already evaluated are not evaluated again. The training prices and
+    their precomputed indicator grid are placed in shared memory once and mapped
+    by every worker instead of being pickled or rebuilt per worker.
+    When profiling is on, the workers' stage timings are merged into
+    `profiling.PROFILER`.
+
+    Args:
+        train_data (pd.DataFrame): Historical market data for training.
+        n_trials (int): Number of finished trials the study should hold; those
+                        already in a resumed study count towards it.
+        n_workers (int | None): Number of worker processes. Defaults to the CPU count.
+        storage_path (str | None): Journal file, .db/.sqlite file or SQLite URL
+                                   for the study (see `open_storage`). A
+                                   temporary journal is used if None.
+        study_name (str | None): Name of the study in the storage. Defaults to
+                                 `study_key` of the data and settings.
+        seed (int | None): Base sampler seed; worker i uses seed + i.
+        pruner (str): 'median', 'successive_halving', 'hyperband' or 'none'.
+        n_splits (int): Number of equal-size folds (see `optimize.cv_folds`).
+        folds (list[tuple[int, int]] | None): Explicit fold ranges. Overrides `n_splits`.
+
+    Returns:
+        optuna.Study: The completed study, loaded in the calling process (in
+                      memory when no `storage_path` was given).
+    """
+    temporary = storage_path is None
+    if temporary:
+        fd, storage_path = tempfile.mkstemp(suffix=".journal")
+        os.close(fd)
+    storage = open_storage(storage_path)
+    study_name = study_name or study_key(train_data, n_splits=n_splits, folds=folds,
+                                         pruner=pruner)
+    study = optuna.create_study(study_name=study_name, storage=storage,
+                                direction="maximize", load_if_exists=True)
+    n_trials = max(n_trials - _finished_trials(study), 0)
+    n_workers = max(1, min(n_workers or os.cpu_count() or 1, n_trials))
+
+    if n_trials:
+        _run_workers(train_data, storage_path, study_name, n_trials, n_workers, seed,
+                     pruner, n_splits, folds)
+
+    if not temporary:
+        return optuna.load_study(study_name=study_name, storage=storage)
+
+    # Move the results into memory and drop the temporary journal
+    in_memory = optuna.storages.InMemoryStorage()
+    optuna.copy_study(from_study_name=study_name, from_storage=storage,
+                      to_storage=in_memory)
+    os.remove(storage_path)
+    return optuna.load_study(study_name=study_name, storage=in_memory)
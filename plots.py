@@ -1,9 +1,50 @@
+import os
+import re
+from collections import Counter
+
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from scipy import stats
 
+# Directory figures are written to instead of being shown (see `set_output_dir`)
+_output_dir: str | None = None
+_saved_names: Counter = Counter()
+
+
+def set_output_dir(path: str | None) -> None:
+    """
+    Write every figure to a PNG file instead of opening a window.
+
+    Args:
+        path (str | None): Directory for the files, created if missing.
+                           None restores interactive windows.
+    """
+    global _output_dir
+    if path is not None:
+        os.makedirs(path, exist_ok=True)
+    _output_dir = path
+    _saved_names.clear()
+
+
+def finish_figure(title: str) -> None:
+    """
+    Show the current figure, or save and close it when an output directory is set.
+
+    Args:
+        title (str): Figure title, used to name the file.
+    """
+    if _output_dir is None:
+        plt.show()
+        return
+    name = re.sub(r"[^a-z0-9]+", "_", title.lower()).strip("_") or "figure"
+    _saved_names[name] += 1
+    if _saved_names[name] > 1:
+        name = f"{name}_{_saved_names[name]}"
+    plt.savefig(os.path.join(_output_dir, name + ".png"), dpi=120, bbox_inches="tight")
+    plt.close()
+
 
 def plot_port_value_train(port_hist: list[float], dates: pd.Series) -> None:
     """
@@ -21,7 +62,7 @@ def plot_port_value_train(port_hist: list[float], dates: pd.Series) -> None:
     plt.grid(linestyle=':', alpha=0.7)
     plt.xticks(rotation=45)
     plt.tight_layout()
-    plt.show()
+    finish_figure("Portfolio Value Over Time")
 
 
 def plot_port_value_test_val(test_hist: list[float], test_dates: pd.Series,
@@ -56,7 +97,7 @@ def plot_port_value_test_val(test_hist: list[float], test_dates: pd.Series,
     plt.grid(linestyle=':', alpha=0.5)
     plt.xticks(rotation=45)
     plt.tight_layout()
-    plt.show()
+    finish_figure("Portfolio Value: Test + Validation")
 
 
 def plot_return_distribution(port_series: pd.Series, title="Portfolio Return Distribution", bins=30) -> None:
@@ -90,17 +131,19 @@ def plot_return_distribution(port_series: pd.Series, title="Portfolio Return Dis
 
     plt.tight_layout()
     plt.grid(linestyle=':', alpha=0.5)
-    plt.show()
+    finish_figure(title)
 
 
-def plot_rolling_volatility(port_series: pd.Series, window: int = 60) -> None:
+def plot_rolling_volatility(port_series: pd.Series, window: int = 60, title: str | None = None) -> None:
     """
     Plots rolling volatility of hourly returns.
 
     Parameters:
     - returns: pd.Series of periodic returns (index = datetime)
     - window: rolling window size (default=60 periods)
+    - title: plot title (default='Rolling Volatility (<window>-period)')
     """
+    title = title or f'Rolling Volatility ({window}-period)'
 
     returns = port_series.pct_change().dropna()
     rolling_vol = returns.rolling(window).std()
@@ -108,17 +151,18 @@ def plot_rolling_volatility(port_series: pd.Series, window: int = 60) -> None:
     plt.figure(figsize=(10, 5))
     plt.plot(
         rolling_vol, label=f'{window}-period Rolling Volatility', color='lightcoral')
-    plt.title(f'Rolling Volatility ({window}-period)')
+    plt.title(title)
     plt.xlabel('Date')
     plt.ylabel('Volatility (Std. Dev.)')
     plt.legend()
     plt.grid(True, alpha=0.3)
     plt.tight_layout()
     plt.grid(linestyle=':', alpha=0.5)
-    plt.show()
+    finish_figure(title)
 
 
-def plot_signals(df: pd.DataFrame, buy_signals: pd.Series, sell_signals: pd.Series) -> None:
+def plot_signals(df: pd.DataFrame, buy_signals: pd.Series, sell_signals: pd.Series,
+                 title: str = 'Buy/Sell Points on Price Chart') -> None:
     """
     Overlays buy/sell signals on price chart.
 
@@ -126,6 +170,7 @@ def plot_signals(df: pd.DataFrame, buy_signals: pd.Series, sell_signals: pd.Seri
     - price: pd.Series of asset/portfolio prices (index = datetime)
     - buy_signals: list or pd.Series of booleans (True where buy occurs)
     - sell_signals: list or pd.Series of booleans (True where sell occurs)
+    - title: plot title
     """
     plt.figure(figsize=(15, 5))
 
@@ -137,11 +182,11 @@ def plot_signals(df: pd.DataFrame, buy_signals: pd.Series, sell_signals: pd.Seri
     plt.scatter(df.index[sell_signals], df['Close'][sell_signals],
                 label='Sell', marker='v', color='indianred', s=80)
 
-    plt.title('Buy/Sell Points on Price Chart')
+    plt.title(title)
     plt.xlabel('Index')
     plt.ylabel('Price')
     plt.legend()
     plt.grid(True, alpha=0.3)
     plt.tight_layout()
     plt.grid(linestyle=':', alpha=0.5)
-    plt.show()
+    finish_figure(title)
@@ -0,0 +1,263 @@
+import cProfile
+import functools
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from typing import Callable, Iterator, TextIO
+
+import numpy as np
+import pandas as pd
+
+# Set to a non-empty value other than '0' to turn the stage timers on
+PROFILE_ENV = "BACKTEST_PROFILE"
+
+
+class Profiler:
+    """
+    Per-stage wall-clock timers and event counters for the pipeline.
+
+    Stages are timed inclusively: a stage that calls another instrumented
+    function also contains that function's time. Recording is thread-safe, so
+    folds evaluated on a thread pool are all counted.
+
+    Attributes:
+        enabled (bool): Whether timers and counters record anything.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._timings: defaultdict[str, list[float]] = defaultdict(list)
+        self._counters: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def enable(self) -> None:
+        """Start recording, also in worker processes started from now on."""
+        self.enabled = True
+        os.environ[PROFILE_ENV] = "1"
+
+    def disable(self) -> None:
+        """Stop recording; data recorded so far is kept."""
+        self.enabled = False
+        os.environ.pop(PROFILE_ENV, None)
+
+    def reset(self) -> None:
+        """Drop every recorded timing and counter."""
+        with self._lock:
+            self._timings.clear()
+            self._counters.clear()
+
+    def record(self, stage: str, seconds: float) -> None:
+        """
+        Add one timed call of a stage.
+
+        Args:
+            stage (str): Stage name.
+            seconds (float): Wall-clock duration of the call.
+        """
+        with self._lock:
+            self._timings[stage].append(seconds)
+
+    def count(self, name: str, n: int = 1) -> None:
+        """
+        Increment a counter.
+
+        Args:
+            name (str): Counter name.
+            n (int): Amount to add.
+        """
+        with self._lock:
+            self._counters[name] += n
+
+    @contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        """
+        Time the enclosed block as one call of `stage` when enabled.
+
+        Args:
+            stage (str): Stage name.
+        """
+        if not self.enabled:
+            yield
+            return
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - t0)
+
+    def snapshot(self) -> dict:
+        """
+        Copy the recorded data into plain containers (e.g. to send it back
+        from a worker process).
+
+        Returns:
+            dict: 'timings' (stage -> durations) and 'counters' (name -> count).
+        """
+        with self._lock:
+            return {"timings": {k: list(v) for k, v in self._timings.items()},
+                    "counters": dict(self._counters)}
+
+    def merge(self, snapshot: dict) -> None:
+        """
+        Add the data of a snapshot taken in another process.
+
+        Args:
+            snapshot (dict): Output of `snapshot`.
+        """
+        with self._lock:
+            for stage, durations in snapshot["timings"].items():
+                self._timings[stage].extend(durations)
+            self._counters.update(snapshot["counters"])
+
+    def summary(self) -> pd.DataFrame:
+        """
+        Summarize the stage timings.
+
+        Returns:
+            pd.DataFrame: One row per stage, slowest total first, with the number
+                          of calls, the total in seconds and the mean, median,
+                          90th/99th percentile and maximum in milliseconds.
+        """
+        rows = {}
+        for stage, durations in self.snapshot()["timings"].items():
+            ms = np.asarray(durations) * 1e3
+            p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+            rows[stage] = {
+                "calls": len(ms),
+                "total_s": ms.sum() / 1e3,
+                "mean_ms": ms.mean(),
+                "p50_ms": p50,
+                "p90_ms": p90,
+                "p99_ms": p99,
+                "max_ms": ms.max()
+            }
+        columns = ["calls", "total_s", "mean_ms", "p50_ms", "p90_ms", "p99_ms", "max_ms"]
+        table = pd.DataFrame.from_dict(rows, orient="index", columns=columns)
+        return table.sort_values("total_s", ascending=False)
+
+    def report(self, file: TextIO | None = None) -> None:
+        """
+        Print the stage summary and the counters.
+
+        Args:
+            file (TextIO | None): Stream to print to. Defaults to stdout.
+        """
+        file = file or sys.stdout
+        table = self.summary()
+        print("\nProfile (inclusive wall-clock time per stage):", file=file)
+        if table.empty:
+            print("  no instrumented calls recorded", file=file)
+        else:
+            print(table.to_string(float_format=lambda x: f"{x:.3f}"), file=file)
+        counters = self.snapshot()["counters"]
+        if counters:
+            print("\nCounters:", file=file)
+            for name, value in sorted(counters.items()):
+                print(f"  {name}: {value:,}", file=file)
+
+
+PROFILER = Profiler(enabled=os.environ.get(PROFILE_ENV, "0") not in ("", "0"))
+
+
+def instrument(stage: str) -> Callable[[Callable], Callable]:
+    """
+    Decorator timing every call of a function as one call of `stage`.
+
+    When profiling is off the wrapper costs a single attribute check.
+
+    Args:
+        stage (str): Stage name.
+
+    Returns:
+        Callable[[Callable], Callable]: The decorator.
+    """
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled:
+                return fn(*args, **kwargs)
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                PROFILER.record(stage, time.perf_counter() - t0)
+        return wrapper
+    return decorator
+
+
+def count(name: str, n: int = 1) -> None:
+    """
+    Increment a counter of the global profiler when profiling is on.
+
+    Args:
+        name (str): Counter name.
+        n (int): Amount to add.
+    """
+    if PROFILER.enabled:
+        PROFILER.count(name, n)
+
+
+@contextmanager
+def cprofile(path: str) -> Iterator[cProfile.Profile]:
+    """
+    Run the enclosed block under cProfile and save the stats.
+
+    Only the calling process is profiled; worker processes are not.
+
+    Args:
+        path (str): Output file, readable with `pstats` or snakeviz.
+
+    Yields:
+        cProfile.Profile: The running profiler.
+    """
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield profile
+    finally:
+        profile.disable()
+        profile.dump_stats(path)
+
+
+@contextmanager
+def sample_stacks(path: str, interval: float = 0.005) -> Iterator[None]:
+    """
+    Sample the calling thread's stack while the enclosed block runs.
+
+    A background thread snapshots the stack every `interval` seconds, which
+    costs far less than cProfile's per-call hooks. Stacks are written in the
+    folded format ('outer;inner count' per line) read by flamegraph.pl and
+    speedscope.
+
+    Args:
+        path (str): Output file.
+        interval (float): Seconds between samples.
+    """
+    target = threading.get_ident()
+    stacks: Counter = Counter()
+    done = threading.Event()
+
+    def sampler() -> None:
+        while not done.wait(interval):
+            frame = sys._current_frames().get(target)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if names:
+                stacks[";".join(reversed(names))] += 1
+
+    thread = threading.Thread(target=sampler, name="stack-sampler", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        done.set()
+        thread.join()
+        with open(path, "w") as f:
+            for stack, n in stacks.most_common():
+                f.write(f"{stack} {n}\n")
@@ -1,6 +1,22 @@
 import pandas as pd
 
 
+def split_bounds(n_bars: int) -> list[tuple[int, int]]:
+    """
+    Index ranges of the sequential 60/20/20 train/test/validation split.
+
+    Args:
+        n_bars (int): Number of bars to split.
+
+    Returns:
+        list[tuple[int, int]]: (start, end) ranges of the training, testing and
+                               validation sets, end exclusive.
+    """
+    train_end = int(0.60 * n_bars)
+    test_end = int(0.80 * n_bars)
+    return [(0, train_end), (train_end, test_end), (test_end, n_bars)]
+
+
 def data_split(data: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
     """
     Split time series data into training, testing, and validation sets.
@@ -19,11 +35,49 @@ def data_split(data: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataF
             - Testing set
             - Validation set
     """
-    n = len(data)
-    train_end = int(0.60 * n)
-    test_end = int(0.80 * n)
+    (_, train_end), (_, test_end), _ = split_bounds(len(data))
 
     train_data = data.iloc[:train_end, :]
     test_data = data.iloc[train_end:test_end, :]
     val_data = data.iloc[test_end:, :]
     return train_data, test_data, val_data
+
+
+def walk_forward_bounds(
+    n_bars: int,
+    train_size: int,
+    test_size: int,
+    step: int | None = None,
+    anchored: bool = False
+) -> list[tuple[tuple[int, int], tuple[int, int]]]:
+    """
+    Rolling-origin train/test windows for walk-forward validation.
+
+    Each test window directly follows its train window. Sliding windows keep a
+    fixed train length; anchored windows all start at bar 0 and grow. Only
+    index ranges are returned, so no data is copied.
+
+    Args:
+        n_bars (int): Number of bars available.
+        train_size (int): Bars in each train window (the first one if anchored).
+        test_size (int): Bars in each test window.
+        step (int | None): Bars between consecutive windows. Defaults to
+                           `test_size`, so the test windows tile the series.
+        anchored (bool): Grow the train windows from bar 0 instead of sliding.
+
+    Returns:
+        list[tuple[tuple[int, int], tuple[int, int]]]: ((train_start, train_end),
+                                                       (test_start, test_end))
+                                                       pairs, end exclusive.
+    """
+    step = step or test_size
+    if min(train_size, test_size, step) <= 0:
+        raise ValueError("train_size, test_size and step must be positive.")
+
+    windows = []
+    train_end = train_size
+    while train_end + test_size <= n_bars:
+        train_start = 0 if anchored else train_end - train_size
+        windows.append(((train_start, train_end), (train_end, train_end + test_size)))
+        train_end += step
+    return windows
@@ -1,6 +1,8 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 
+from plots import finish_figure
+
 
 def returns_table(port_series: pd.Series) -> pd.DataFrame:
     """
@@ -116,4 +118,4 @@ def show_table(df: pd.DataFrame, title: str = "Table") -> None:
 
     plt.suptitle(title, fontsize=14, y=0.98)
     plt.subplots_adjust(top=0.9, wspace=0.3)
-    plt.show()
+    finish_figure(title)
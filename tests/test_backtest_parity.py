@@ -0,0 +1,274 @@
+import numpy as np
+import optuna
+import pandas as pd
+import pytest
+
+import indicators
+import metrics
+from backtesting import (
+    INITIAL_CASH, BacktestState, backtest, backtest_arrays, backtest_batch,
+    backtest_portfolio, backtest_reference, backtest_stream
+)
+from benchmark import synthetic_data
+from indicators import (
+    IndicatorCache, add_indicators, fused_signals, get_signals, grid_signals,
+    panel_signals, precompute_indicators
+)
+from metrics import OnlineMetrics, fused_metrics, performance_summary
+from optimize import cv_folds, optimize
+
+ENGINES = ("numba", "numpy", "heap")
+SIGNAL_PARAMS = [
+    dict(rsi_window=14, sma_window=20, bb_window=20, bb_dev=2.0, rsi_buy=30, rsi_sell=70),
+    dict(rsi_window=21, sma_window=10, bb_window=25, bb_dev=1.5, rsi_buy=40, rsi_sell=60),
+    dict(rsi_window=7, sma_window=30, bb_window=12, bb_dev=1.8, rsi_buy=45, rsi_sell=55),
+]
+
+
+def signal_frame(n_bars: int, seed: int, sigma: float = 0.02, density: float = 0.1) -> pd.DataFrame:
+    """Random-walk prices with random buy/sell signals (both may fire on the same bar)."""
+    rng = np.random.default_rng(seed)
+    close = 100.0 * np.exp(np.cumsum(rng.normal(-0.5 * sigma ** 2, sigma, n_bars)))
+    return pd.DataFrame({
+        'Close': close,
+        'buy_signal': rng.random(n_bars) < density,
+        'sell_signal': rng.random(n_bars) < density,
+    })
+
+
+def to_arrays(data: pd.DataFrame) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    return (data['Close'].to_numpy(dtype=np.float64),
+            data['buy_signal'].to_numpy(dtype=bool),
+            data['sell_signal'].to_numpy(dtype=bool))
+
+
+# (data, SL, TP, n_shares) per scenario
+CASES = {
+    "random": lambda: (signal_frame(1_500, seed=1), 0.05, 0.05, 1.0),
+    # Each position costs ~25% of the starting cash, so signals go unfunded
+    "cash_exhausted": lambda: (signal_frame(1_500, seed=2, density=0.3), 0.15, 0.15, 2_500.0),
+    # Volatile prices and tight levels: many positions exit on the same bar
+    "same_bar_exits": lambda: (signal_frame(1_500, seed=3, sigma=0.08, density=0.4), 0.02, 0.03, 5.0),
+}
+
+
+@pytest.fixture(params=list(CASES), scope="module")
+def case(request):
+    data, sl, tp, n_shares = CASES[request.param]()
+    hist, final = backtest_reference(data, sl, tp, n_shares)
+    return data, sl, tp, n_shares, np.array(hist), final
+
+
+# --- Single backtest ---
+
+
+@pytest.mark.parametrize("backend", ENGINES + ("python", "auto"))
+def test_backtest_matches_reference(case, backend):
+    data, sl, tp, n_shares, ref_hist, ref_final = case
+    hist, final = backtest(data, sl, tp, n_shares, backend=backend)
+    np.testing.assert_allclose(hist, ref_hist, rtol=1e-10)
+    assert final == pytest.approx(ref_final, rel=1e-10)
+
+
+def test_cases_cover_cash_exhaustion():
+    data, sl, tp, n_shares = CASES["cash_exhausted"]()
+    _, small = backtest_reference(data, sl, tp, 1.0)
+    _, large = backtest_reference(data, sl, tp, n_shares)
+    # P&L scales with the trade size unless some signals went unfunded
+    assert large - INITIAL_CASH != pytest.approx(n_shares * (small - INITIAL_CASH), rel=1e-3)
+
+
+@pytest.mark.parametrize("backend", ENGINES)
+def test_stop_loss_and_take_profit_on_the_same_bar(backend):
+    # Long A (entry 100) hits its take profit and long B (entry 130) its stop
+    # loss at 115; short C (entry 100) hits its stop loss and short D (entry
+    # 130) its take profit on the same bar.
+    data = pd.DataFrame({
+        'Close': [100.0, 130.0, 115.0, 115.0],
+        'buy_signal': [True, True, False, False],
+        'sell_signal': [True, True, False, False],
+    })
+    ref_hist, ref_final = backtest_reference(data, 0.1, 0.1, 10.0)
+
+    state = BacktestState()
+    hist = backtest_arrays(*to_arrays(data), 0.1, 0.1, 10.0, backend=backend, state=state)
+    np.testing.assert_allclose(hist, ref_hist, rtol=1e-12)
+    assert len(state.long_price) == len(state.short_price) == 0
+    assert state.cash == pytest.approx(ref_final, rel=1e-12)
+
+
+# --- Batch, streaming and online metrics ---
+
+
+@pytest.mark.parametrize("backend", ENGINES + ("python",))
+def test_backtest_batch_matches_reference(backend):
+    data = signal_frame(800, seed=4, sigma=0.04, density=0.3)
+    params = np.array([
+        [0.05, 0.05, 1.0],
+        [0.02, 0.03, 5.0],
+        [0.15, 0.15, 2_500.0],
+        [0.10, 0.02, 0.3],
+    ])
+    port = backtest_batch(data, params, return_portfolios=True, backend=backend)
+    for row, (sl, tp, n_shares) in zip(port, params):
+        np.testing.assert_allclose(row, backtest_reference(data, sl, tp, n_shares)[0], rtol=1e-9)
+
+    final, calmar = backtest_batch(data, params, backend=backend)
+    np.testing.assert_allclose(final, port[:, -1])
+    assert calmar.shape == (len(params),)
+
+
+@pytest.mark.parametrize("backend", ENGINES)
+def test_backtest_stream_matches_reference(case, backend):
+    data, sl, tp, n_shares, ref_hist, ref_final = case
+    bounds = [0, 1, 137, 137, 600, 1_499, len(data)]   # includes an empty chunk
+    chunks = [data.iloc[lo:hi] for lo, hi in zip(bounds, bounds[1:])]
+
+    recorded = OnlineMetrics()
+    hist, final = backtest_stream(chunks, sl, tp, n_shares, backend=backend, metrics=recorded)
+    np.testing.assert_allclose(hist, ref_hist, rtol=1e-10)
+    assert final == pytest.approx(ref_final, rel=1e-10)
+    # Compared on the engine's own values: flat bars may differ from the
+    # reference by a rounding-size return, which moves the downside statistics
+    assert_same_metrics(recorded.summary(), performance_summary(pd.Series(hist)))
+
+    online = OnlineMetrics()
+    hist, final = backtest_stream(chunks, sl, tp, n_shares, backend=backend,
+                                  metrics=online, record=False)
+    assert len(hist) == 0
+    assert final == pytest.approx(ref_final, rel=1e-10)
+    assert online.summary() == recorded.summary()
+
+
+def assert_same_metrics(result: dict, expected: dict) -> None:
+    assert result.keys() == expected.keys()
+    for key in expected:
+        assert result[key] == pytest.approx(expected[key], rel=1e-6, abs=1e-12), key
+
+
+@pytest.mark.parametrize("use_jit", [True, False])
+def test_fused_metrics_match_performance_summary(case, monkeypatch, use_jit):
+    *_, ref_hist, _ = case
+    if not use_jit:
+        monkeypatch.setattr(metrics, "_accumulate_rows_jit", None)
+    assert_same_metrics(fused_metrics(ref_hist), performance_summary(pd.Series(ref_hist)))
+
+
+# --- Signals ---
+
+
+@pytest.fixture(scope="module")
+def prices() -> pd.DataFrame:
+    return synthetic_data(3_000, seed=5, s0=100.0, sigma=0.02)[['Close']].reset_index(drop=True)
+
+
+def reference_signals(data: pd.DataFrame, params: dict) -> pd.DataFrame:
+    with_indicators = add_indicators(
+        data.copy(), params['rsi_window'], params['sma_window'],
+        params['bb_window'], params['bb_dev'])
+    return get_signals(with_indicators, params['rsi_buy'], params['rsi_sell'],
+                       params['sma_window'], params['bb_window'], params['bb_dev'])
+
+
+@pytest.mark.parametrize("params", SIGNAL_PARAMS)
+def test_fused_and_grid_signals_match_get_signals(prices, params):
+    ref = reference_signals(prices, params)
+    ref_buy, ref_sell = ref['buy_signal'].to_numpy(), ref['sell_signal'].to_numpy()
+    assert ref_buy.any() and ref_sell.any()
+
+    grid = precompute_indicators(prices['Close'])
+    for start, buy, sell in (
+            fused_signals(prices['Close'], **params),
+            fused_signals(prices['Close'], **params, cache=IndicatorCache()),
+            grid_signals(grid, **params)):
+        assert start == len(prices) - len(ref)
+        np.testing.assert_array_equal(buy, ref_buy)
+        np.testing.assert_array_equal(sell, ref_sell)
+
+    # A window of bars is a slice of the full signals
+    start = len(prices) - len(ref)
+    lo, hi = 1_000, 1_700
+    for sub_start, buy, sell in (fused_signals(prices['Close'], **params, bars=(lo, hi)),
+                                 grid_signals(grid, **params, bars=(lo, hi))):
+        assert sub_start == lo
+        np.testing.assert_array_equal(buy, ref_buy[lo - start:hi - start])
+        np.testing.assert_array_equal(sell, ref_sell[lo - start:hi - start])
+
+
+@pytest.mark.parametrize("params", SIGNAL_PARAMS)
+def test_add_indicators_with_cache_matches_plain(prices, params):
+    indicator_params = {k: params[k] for k in ("rsi_window", "sma_window", "bb_window", "bb_dev")}
+    plain = add_indicators(prices.copy(), **indicator_params)
+    cached = add_indicators(prices.copy(), **indicator_params, cache=IndicatorCache())
+    pd.testing.assert_frame_equal(cached, plain, rtol=1e-10)
+
+
+@pytest.fixture(scope="module")
+def panel(prices) -> np.ndarray:
+    # Three symbols, two of them listed after the first bar
+    close = np.full((len(prices), 3), np.nan)
+    close[:, 0] = prices['Close']
+    close[400:, 1] = synthetic_data(len(prices) - 400, seed=6, s0=50.0, sigma=0.03)['Close']
+    close[1_200:, 2] = synthetic_data(len(prices) - 1_200, seed=7, s0=2.0, sigma=0.01)['Close']
+    return close
+
+
+@pytest.mark.parametrize("use_jit", [True, False])
+@pytest.mark.parametrize("params", SIGNAL_PARAMS)
+def test_panel_signals_match_fused_signals(panel, monkeypatch, params, use_jit):
+    if not use_jit:
+        monkeypatch.setattr(indicators, "_panel_signals_jit", None)
+    buy, sell = panel_signals(panel, **params)
+    assert buy.shape == sell.shape == panel.shape
+
+    for j in range(panel.shape[1]):
+        first = int(np.flatnonzero(~np.isnan(panel[:, j]))[0])
+        start, sym_buy, sym_sell = fused_signals(panel[first:, j], **params)
+        assert not buy[:first + start, j].any() and not sell[:first + start, j].any()
+        np.testing.assert_array_equal(buy[first + start:, j], sym_buy)
+        np.testing.assert_array_equal(sell[first + start:, j], sym_sell)
+
+
+# --- Portfolio ---
+
+
+@pytest.mark.parametrize("backend", ("numba", "numpy"))
+def test_single_symbol_portfolio_matches_backtest_arrays(case, backend):
+    data, sl, tp, n_shares, ref_hist, ref_final = case
+    close, buy, sell = to_arrays(data)
+    result = backtest_portfolio(close[:, None], buy[:, None], sell[:, None],
+                                sl, tp, n_shares, backend=backend)
+    np.testing.assert_allclose(result.port_hist, ref_hist, rtol=1e-10)
+    assert result.final_value == pytest.approx(ref_final, rel=1e-10)
+    assert result.pnl.sum() == pytest.approx(result.final_value - INITIAL_CASH, rel=1e-9)
+
+
+def test_portfolio_backends_agree(panel):
+    buy, sell = panel_signals(panel, **SIGNAL_PARAMS[2])
+    n_shares = np.array([2_000.0, 4_000.0, 50_000.0])   # enough to run out of cash
+    results = [backtest_portfolio(panel, buy, sell, 0.05, 0.05, n_shares, backend=backend)
+               for backend in ("numba", "numpy")]
+    for name in ("port_hist", "trades", "long_open", "short_open", "pnl"):
+        np.testing.assert_allclose(getattr(results[0], name), getattr(results[1], name),
+                                   rtol=1e-9, err_msg=name)
+    assert results[0].cash == pytest.approx(results[1].cash, rel=1e-9)
+    assert results[0].pnl.sum() == pytest.approx(results[0].final_value - INITIAL_CASH, rel=1e-9)
+
+
+# --- Optimization objective ---
+
+
+def test_objective_matches_reference_folds(prices):
+    params = dict(SIGNAL_PARAMS[1], SL=0.05, TP=0.04, n_shares=3.0)
+    ref = reference_signals(prices, params)
+
+    calmars = []
+    for lo, hi in cv_folds(len(ref), n_splits=5):
+        hist, _ = backtest_reference(ref.iloc[lo:hi], params['SL'], params['TP'], params['n_shares'])
+        calmars.append(performance_summary(pd.Series(hist))["Calmar Ratio"])
+    expected = np.mean(calmars)
+
+    grid = precompute_indicators(prices['Close'])
+    for kwargs in ({}, {"grid": grid}):
+        value = optimize(optuna.trial.FixedTrial(params), prices, n_splits=5, **kwargs)
+        assert value == pytest.approx(expected, rel=1e-6)
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from benchmark import synthetic_data
+from indicators import add_indicators, get_signals
+from live import StrategyEngine
+
+PARAMS = [
+    dict(rsi_window=14, sma_window=20, bb_window=20, bb_dev=2.0, rsi_buy=30, rsi_sell=70),
+    # SMA and Bollinger Bands warm up at different bars after the cut
+    dict(rsi_window=21, sma_window=10, bb_window=25, bb_dev=1.5, rsi_buy=40, rsi_sell=60),
+    dict(rsi_window=7, sma_window=30, bb_window=12, bb_dev=1.8, rsi_buy=45, rsi_sell=55),
+]
+
+
+@pytest.mark.parametrize("params", PARAMS)
+def test_replayed_live_signals_match_get_signals(params):
+    data = synthetic_data(2_000, seed=3, sigma=0.02)
+    indicator_params = {k: params[k] for k in ("rsi_window", "sma_window", "bb_window", "bb_dev")}
+    signal_params = {k: params[k] for k in ("rsi_buy", "rsi_sell", "sma_window",
+                                            "bb_window", "bb_dev")}
+    reference = get_signals(add_indicators(data.copy(), **indicator_params), **signal_params)
+    start = len(data) - len(reference)
+
+    engine = StrategyEngine(**params)
+    buy = np.empty(len(data), dtype=bool)
+    sell = np.empty(len(data), dtype=bool)
+    for i, close in enumerate(data['Close'].to_numpy()):
+        engine.on_bar(close)
+        buy[i], sell[i] = engine.last_buy, engine.last_sell
+
+    assert not buy[:start].any() and not sell[:start].any()
+    np.testing.assert_array_equal(buy[start:], reference['buy_signal'].to_numpy())
+    np.testing.assert_array_equal(sell[start:], reference['sell_signal'].to_numpy())
+    # Both signals must fire for the comparison to mean anything
+    assert reference['buy_signal'].any() and reference['sell_signal'].any()
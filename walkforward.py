@@ -0,0 +1,238 @@
+import os
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass
+
+import optuna
+import numpy as np
+import pandas as pd
+
+from split import walk_forward_bounds
+from indicators import precompute_indicators, grid_signals, IndicatorGrid
+from backtesting import backtest_arrays, INITIAL_CASH
+from metrics import OnlineMetrics, fused_metrics
+from optimize import optimize, make_pruner, SIGNAL_PARAMS
+
+
+@dataclass
+class WindowResult:
+    """
+    Optimization on one train window and its out-of-sample test.
+
+    Attributes:
+        train (tuple[int, int]): (start, end) positions of the train bars.
+        test (tuple[int, int]): (start, end) positions of the test bars.
+        params (dict): Best parameters found on the train window.
+        train_value (float): Objective value of `params` on the train window.
+        n_trials (int): Number of trials run on the window.
+        port_hist (np.ndarray): Portfolio value at each test bar, from fresh capital.
+        metrics (dict): Performance metrics of the test window.
+    """
+    train: tuple[int, int]
+    test: tuple[int, int]
+    params: dict
+    train_value: float
+    n_trials: int
+    port_hist: np.ndarray
+    metrics: dict
+
+
+@dataclass
+class WalkForwardResult:
+    """
+    Every window of a walk-forward run, in time order.
+
+    Attributes:
+        windows (list[WindowResult]): Per-window results.
+    """
+    windows: list[WindowResult]
+
+    def summary(self) -> pd.DataFrame:
+        """
+        Tabulate the windows.
+
+        Returns:
+            pd.DataFrame: One row per window with its bounds, train objective,
+                          test metrics and final test portfolio value.
+        """
+        return pd.DataFrame([{
+            "train_start": w.train[0],
+            "train_end": w.train[1],
+            "test_start": w.test[0],
+            "test_end": w.test[1],
+            "train_value": w.train_value,
+            **w.metrics,
+            "final_value": w.port_hist[-1] if len(w.port_hist) else np.nan
+        } for w in self.windows])
+
+    def oos_equity(self) -> np.ndarray:
+        """
+        Chain the test windows into one out-of-sample equity curve.
+
+        Each window's growth over its starting capital is compounded on the
+        level the previous window ended at.
+
+        Returns:
+            np.ndarray: Portfolio value at each test bar.
+        """
+        level = float(INITIAL_CASH)
+        curves = []
+        for w in self.windows:
+            if len(w.port_hist):
+                curves.append(w.port_hist / INITIAL_CASH * level)
+                level = curves[-1][-1]
+        return np.concatenate(curves) if curves else np.empty(0)
+
+    def oos_metrics(self, risk_free_rate: float = 0.0, periods_per_year: int = 8760) -> dict:
+        """
+        Performance metrics of the chained out-of-sample equity curve.
+
+        Args:
+            risk_free_rate (float): Annual risk-free rate.
+            periods_per_year (int): Number of periods per year.
+
+        Returns:
+            dict: Same keys as `performance_summary`.
+        """
+        return fused_metrics(self.oos_equity(), risk_free_rate, periods_per_year)
+
+
+def _test_window(grid: IndicatorGrid, test: tuple[int, int], params: dict) -> tuple[np.ndarray, dict]:
+    """Backtest parameters on one test window, with indicators warmed up by the bars before it."""
+    start, buy, sell = grid_signals(grid, **{k: params[k] for k in SIGNAL_PARAMS}, bars=test)
+    metrics = OnlineMetrics()
+    port_hist = backtest_arrays(
+        grid.close[start:start + len(buy)], buy, sell,
+        params["SL"], params["TP"], params["n_shares"],
+        metrics=metrics
+    )
+    return port_hist, metrics.summary(periods_per_year=8760)
+
+
+def _top_params(study: optuna.Study, n: int) -> list[dict]:
+    """Parameters of the `n` best completed trials of a study."""
+    complete = [t for t in study.trials if t.state == optuna.trial.TrialState.COMPLETE]
+    complete.sort(key=lambda t: t.value, reverse=True)
+    return [t.params for t in complete[:n]]
+
+
+def _run_window(data: pd.DataFrame, grid: IndicatorGrid,
+                train: tuple[int, int], test: tuple[int, int],
+                n_trials: int, n_splits: int, n_jobs: int, seed: int | None,
+                pruner: str, enqueue: list[dict]) -> tuple[WindowResult, optuna.Study]:
+    """
+    Optimize on one train window and evaluate the best parameters on its test window.
+
+    Args:
+        data (pd.DataFrame): Full price data.
+        grid (IndicatorGrid): Indicators precomputed on the full 'Close' series.
+        train (tuple[int, int]): Train window.
+        test (tuple[int, int]): Test window.
+        n_trials (int): Number of trials, enqueued ones included.
+        n_splits (int): Cross-validation folds per trial.
+        n_jobs (int): Threads running trials of the study.
+        seed (int | None): Sampler seed.
+        pruner (str): Pruner name (see `optimize.make_pruner`).
+        enqueue (list[dict]): Parameter sets to try first.
+
+    Returns:
+        tuple[WindowResult, optuna.Study]: The window's result and its study.
+    """
+    study = optuna.create_study(direction="maximize",
+                                sampler=optuna.samplers.TPESampler(seed=seed),
+                                pruner=make_pruner(pruner))
+    for params in enqueue:
+        study.enqueue_trial(params, skip_if_exists=True)
+    study.optimize(
+        lambda trial: optimize(trial, data, grid=grid, n_splits=n_splits, window=train),
+        n_trials=n_trials, n_jobs=n_jobs)
+
+    params = study.best_params
+    port_hist, metrics = _test_window(grid, test, params)
+    result = WindowResult(train=train, test=test, params=params,
+                          train_value=study.best_value, n_trials=len(study.trials),
+                          port_hist=port_hist, metrics=metrics)
+    return result, study
+
+
+def walk_forward(
+    data: pd.DataFrame,
+    train_size: int,
+    test_size: int,
+    step: int | None = None,
+    anchored: bool = False,
+    n_trials: int = 50,
+    n_splits: int = 7,
+    warm_start: bool = True,
+    n_enqueue: int = 3,
+    n_jobs: int = 1,
+    seed: int | None = None,
+    pruner: str = "median",
+    executor: Executor | None = None,
+    grid: IndicatorGrid | None = None
+) -> WalkForwardResult:
+    """
+    Re-optimize the strategy on rolling train windows and test each on the bars that follow.
+
+    Indicators are computed once for the whole series (every window of the
+    search space) and every trial and test only indexes into them, so a window
+    starts with its indicators already warmed up by the bars before it.
+
+    With `warm_start`, each window's study first re-evaluates the best
+    `n_enqueue` parameter sets of the previous window, which usually stay good
+    after a small shift, so the sampler starts from a strong incumbent. Windows
+    then run one after another (trials can still run on `n_jobs` threads).
+    Without it the windows are independent and run concurrently on `executor`.
+
+    Args:
+        data (pd.DataFrame): Full chronological price data with a 'Close' column.
+        train_size (int): Bars in each train window (the first one if anchored).
+        test_size (int): Bars in each test window.
+        step (int | None): Bars between windows. Defaults to `test_size`.
+        anchored (bool): Grow the train windows from bar 0 instead of sliding.
+        n_trials (int): Trials per window, enqueued ones included.
+        n_splits (int): Cross-validation folds per trial.
+        warm_start (bool): Seed each study with the previous window's best trials.
+        n_enqueue (int): Number of previous best trials to enqueue.
+        n_jobs (int): Threads running the trials of each study.
+        seed (int | None): Base sampler seed; window i uses seed + i.
+        pruner (str): Pruner name (see `optimize.make_pruner`).
+        executor (Executor | None): Runs independent windows when not
+                                    `warm_start`. A thread pool is used if None.
+        grid (IndicatorGrid | None): Indicators precomputed on `data.Close`;
+                                     computed here if None.
+
+    Returns:
+        WalkForwardResult: Results of every window.
+    """
+    bounds = walk_forward_bounds(len(data), train_size, test_size, step, anchored)
+    if not bounds:
+        raise ValueError("The data is too short for a single train/test window.")
+    if grid is None:
+        grid = precompute_indicators(data['Close'])
+
+    def window_seed(i: int) -> int | None:
+        return None if seed is None else seed + i
+
+    if warm_start:
+        windows, enqueue = [], []
+        for i, (train, test) in enumerate(bounds):
+            result, study = _run_window(data, grid, train, test, n_trials, n_splits,
+                                        n_jobs, window_seed(i), pruner, enqueue)
+            windows.append(result)
+            enqueue = _top_params(study, n_enqueue)
+        return WalkForwardResult(windows)
+
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor(max_workers=min(len(bounds), os.cpu_count() or 1))
+    try:
+        futures = [
+            executor.submit(_run_window, data, grid, train, test, n_trials, n_splits,
+                            n_jobs, window_seed(i), pruner, [])
+            for i, (train, test) in enumerate(bounds)
+        ]
+        windows = [future.result()[0] for future in futures]
+    finally:
+        if own_executor:
+            executor.shutdown()
+    return WalkForwardResult(windows)